@@ -1,9 +1,12 @@
 from django.contrib import admin
-from django.http import HttpResponseRedirect
-from django.urls import reverse
+from django.contrib.admin import helpers
+from django.shortcuts import render
 from django.contrib import messages
 from .models import Employee, AuditLog
+import time
 from authentication.ldap_service import ldap_service
+from authentication.eligibility import eligible_usernames
+from authentication.profile import ad_profiles
 
 
 @admin.register(Employee)
@@ -15,6 +18,8 @@ class EmployeeAdmin(admin.ModelAdmin):
     - Displays current OU from Active Directory
     - Reads distinguishedName
     - Parses and shows OU path
+    - The list view reads the locally stored OU path (ad_ou_path), so it
+      can be sorted, filtered and searched without contacting AD
     
     Task 13: Move User Between OUs
     - Move employees to different organizational units
@@ -42,6 +47,7 @@ class EmployeeAdmin(admin.ModelAdmin):
     # Filters
     list_filter = [
         'department',
+        'ad_ou_path',
         'is_active',
         'hire_date',
         'created_at'
@@ -55,7 +61,8 @@ class EmployeeAdmin(admin.ModelAdmin):
         'first_name_ar',
         'last_name_ar',
         'national_id',
-        'job_title'
+        'job_title',
+        'ad_ou_path'
     ]
     
     # Readonly fields
@@ -102,17 +109,19 @@ class EmployeeAdmin(admin.ModelAdmin):
     date_hierarchy = 'hire_date'
     
     # Actions
-    actions = ['activate_employees', 'deactivate_employees']
+    actions = ['activate_employees', 'deactivate_employees', 'move_user_ou']
     
     def activate_employees(self, request, queryset):
         """Activate selected employees"""
         updated = queryset.update(is_active=True)
+        eligible_usernames.invalidate()
         self.message_user(request, f'{updated} employee(s) activated successfully.')
     activate_employees.short_description = "Activate selected employees"
     
     def deactivate_employees(self, request, queryset):
         """Deactivate selected employees"""
         updated = queryset.update(is_active=False)
+        eligible_usernames.invalidate()
         self.message_user(request, f'{updated} employee(s) deactivated successfully.')
     deactivate_employees.short_description = "Deactivate selected employees"
     
@@ -128,26 +137,29 @@ class EmployeeAdmin(admin.ModelAdmin):
     def get_current_ou(self, obj):
         """
         Task 11: Display current OU in list view
-        Fetches OU from Active Directory
+        Reads the locally stored OU path, so rendering the list makes no AD calls
         """
-        try:
-            ou_info = ldap_service.get_user_ou_info(obj.ad_username)
-            if ou_info and ou_info.get('ou_path'):
-                return ou_info['ou_path']
-            return '—'
-        except Exception as e:
-            # Gracefully handle errors without breaking the list view
-            return '⚠️  Error fetching OU'
+        return obj.ad_ou_path or '—'
     get_current_ou.short_description = 'Current OU'
+    get_current_ou.admin_order_field = 'ad_ou_path'
     
     def get_current_ou_display(self, obj):
         """
         Task 11: Display detailed OU information in detail view
         Shows full DN and parsed OU path
         """
+        if not ldap_service.is_available():
+            from django.utils.html import format_html
+            return format_html(
+                '<span style="color: #856404;">OU unavailable (Active Directory is not reachable)</span>'
+                '<br><small>Last known OU: {}</small>',
+                obj.ad_ou_path or 'N/A'
+            )
+        
         try:
-            ou_info = ldap_service.get_user_ou_info(obj.ad_username)
+            ou_info = ldap_service.get_user_ou_info(obj.ad_username, **obj.ad_locator())
             if ou_info:
+                obj.remember_ad_location(ou_info)
                 html = '<div style="background-color: #f0f0f0; padding: 10px; border-radius: 5px; font-family: monospace;">'
                 html += f'<strong>Current OU:</strong> {ou_info.get("ou_name", "N/A")}<br>'
                 html += f'<strong>OU Path:</strong> {ou_info.get("ou_path", "N/A")}<br>'
@@ -213,27 +225,97 @@ class EmployeeAdmin(admin.ModelAdmin):
     def move_user_ou(self, request, queryset):
         """
         Task 13: Admin action to move users between OUs
-        Move selected employees to a new organizational unit
+        Move all selected employees to one organizational unit
+        
+        The first request shows a confirmation page to pick the target OU;
+        submitting it runs the moves concurrently over pooled connections and
+        records every result with a single bulk insert into the AuditLog.
         """
-        # For now, we'll redirect to a change form where they can select OU
-        # In the future, this could be a custom form action
+        employees = list(queryset)
         
-        if queryset.count() == 1:
-            # Get the single selected employee
-            employee = queryset.first()
-            # Redirect to employee detail page where they can see the move UI
-            return HttpResponseRedirect(
-                reverse('admin:Employee_employee_change', args=[employee.pk]) + 
-                '#move-ou-section'
+        if 'apply' not in request.POST:
+            return render(request, 'admin/Employee/move_ou_action.html', {
+                **self.admin_site.each_context(request),
+                'title': 'Move employees to a different OU',
+                'opts': self.model._meta,
+                'employees': employees,
+                'available_ous': ldap_service.get_all_ous(),
+                'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+            })
+        
+        if not ldap_service.is_available():
+            self.message_user(
+                request,
+                '<strong>❌ Active Directory Unavailable</strong><br>No employees were moved. Please try again shortly.',
+                messages.ERROR
             )
-        else:
+            return None
+        
+        target_ou = ldap_service.find_ou(dn=request.POST.get('target_ou_dn', ''))
+        if not target_ou:
             self.message_user(
                 request,
-                'Please select exactly one employee to move.',
-                messages.WARNING
+                '<strong>❌ OU Not Found</strong><br>Please select an organizational unit to move to.',
+                messages.ERROR
             )
-    
-    move_user_ou.short_description = "Move selected employee to different OU"
+            return None
+        
+        started = time.monotonic()
+        results = ldap_service.move_users(
+            [employee.ad_username for employee in employees],
+            target_ou['dn']
+        )
+        elapsed = time.monotonic() - started
+        
+        audit_logs = []
+        relocated = []
+        lines = []
+        moved = failed = unchanged = 0
+        
+        for employee, result in zip(employees, results):
+            if result['already_in_ou']:
+                unchanged += 1
+                lines.append(f'ℹ️ {employee.ad_username}: already in {target_ou["path"]}')
+                continue
+            
+            audit_logs.append(AuditLog(
+                employee=employee,
+                old_ou=result['old_ou_path'] or 'Unknown',
+                new_ou=target_ou['path'],
+                changed_by=request.user.username,
+                status='success' if result['success'] else 'failed',
+                error_message=result['error'],
+                old_dn=result['old_dn'],
+                new_dn=result['new_dn'] or None
+            ))
+            
+            if result['success']:
+                moved += 1
+                employee.ad_dn = result['new_dn']
+                employee.ad_ou_path = target_ou['path']
+                relocated.append(employee)
+                lines.append(f'✅ {employee.ad_username}: {result["old_ou_path"]} → {target_ou["path"]}')
+            else:
+                failed += 1
+                lines.append(f'❌ {employee.ad_username}: {result["error"] or "Unknown error occurred"}')
+        
+        AuditLog.objects.bulk_create(audit_logs)
+        Employee.objects.bulk_update(relocated, ['ad_dn', 'ad_ou_path'])
+        # The profile pages show the OU, so drop the moved users' snapshots
+        ad_profiles.invalidate(*[employee.ad_username for employee in relocated])
+        
+        throughput = len(results) / elapsed if elapsed > 0 else 0
+        summary = (
+            f'<strong>Bulk Move to {target_ou["path"]}</strong><br>'
+            f'<strong>Moved:</strong> {moved} &nbsp; <strong>Failed:</strong> {failed} &nbsp; '
+            f'<strong>Already there:</strong> {unchanged}<br>'
+            f'<strong>Completed in:</strong> {elapsed:.2f}s ({throughput:.1f} employees/s)<br><br>'
+            + '<br>'.join(lines)
+        )
+        self.message_user(request, summary, messages.ERROR if failed else messages.SUCCESS)
+        return None
+    
+    move_user_ou.short_description = "Move selected employees to different OU"
     
     def response_change(self, request, obj):
         """
@@ -252,26 +334,19 @@ class EmployeeAdmin(admin.ModelAdmin):
                 )
                 return super().response_change(request, obj)
             
+            if not ldap_service.is_available():
+                self.message_user(
+                    request,
+                    '<strong>❌ Active Directory Unavailable</strong><br>The employee was not moved. Please try again shortly.',
+                    messages.ERROR
+                )
+                return super().response_change(request, obj)
+            
             try:
-                # Get current OU info
-                old_ou_info = ldap_service.get_user_ou_info(obj.ad_username)
-                old_ou_name = old_ou_info.get('ou_name', 'Unknown') if old_ou_info else 'Unknown'
-                old_ou_path = old_ou_info.get('ou_path', 'Unknown') if old_ou_info else 'Unknown'
-                old_dn = old_ou_info.get('dn', '') if old_ou_info else ''
-                old_ou_dn = old_ou_info.get('ou_dn', '') if old_ou_info else ''
-                
-                # Get list of OUs to find the DN for the new OU
-                all_ous = ldap_service.get_all_ous()
-                new_ou_dn = None
-                new_ou_path = None
-                
-                for ou in all_ous:
-                    if ou['name'] == new_ou_name:
-                        new_ou_dn = ou['dn']
-                        new_ou_path = ou['path']
-                        break
+                # Find the DN for the new OU in the cached OU index
+                target_ou = ldap_service.find_ou(name=new_ou_name)
                 
-                if not new_ou_dn:
+                if not target_ou:
                     self.message_user(
                         request,
                         f'<strong>❌ OU Not Found</strong><br>The organizational unit "{new_ou_name}" could not be found in Active Directory.',
@@ -279,8 +354,16 @@ class EmployeeAdmin(admin.ModelAdmin):
                     )
                     return super().response_change(request, obj)
                 
+                new_ou_path = target_ou['path']
+                
+                # Execute the move (looks up the user and moves it on one connection)
+                result = ldap_service.move_user(obj.ad_username, target_ou['dn'], **obj.ad_locator())
+                old_ou_path = result['old_ou_path'] or 'Unknown'
+                old_dn = result['old_dn']
+                error_msg = result['error']
+                
                 # Check if already in target OU
-                if new_ou_dn == old_ou_dn:
+                if result['already_in_ou']:
                     self.message_user(
                         request,
                         f'<strong>ℹ️ Already in OU</strong><br>{obj.ad_username} is already assigned to <strong>{new_ou_name}</strong> organizational unit.',
@@ -288,13 +371,9 @@ class EmployeeAdmin(admin.ModelAdmin):
                     )
                     return super().response_change(request, obj)
                 
-                # Execute the move
-                success, error_msg = ldap_service.move_user_to_ou(obj.ad_username, new_ou_dn)
-                
-                if success:
-                    # Verify the move by checking the new OU
-                    new_ou_info = ldap_service.get_user_ou_info(obj.ad_username)
-                    new_dn = new_ou_info.get('dn', '') if new_ou_info else ''
+                if result['success']:
+                    obj.remember_ad_location({'dn': result['new_dn'], 'ou_path': new_ou_path})
+                    ad_profiles.invalidate(obj.ad_username)
                     
                     # Create audit log entry
                     AuditLog.objects.create(
@@ -304,7 +383,7 @@ class EmployeeAdmin(admin.ModelAdmin):
                         changed_by=request.user.username,
                         status='success',
                         old_dn=old_dn,
-                        new_dn=new_dn
+                        new_dn=result['new_dn']
                     )
                     
                     # Enhanced success message with better formatting
@@ -370,12 +449,16 @@ class EmployeeAdmin(admin.ModelAdmin):
         from django.shortcuts import get_object_or_404
         obj = get_object_or_404(Employee, pk=object_id)
         
-        # Get available OUs
+        # Get available OUs (served from the OU cache while AD is unavailable)
         available_ous = ldap_service.get_all_ous()
         
         # Get current OU
-        current_ou_info = ldap_service.get_user_ou_info(obj.ad_username)
-        current_ou = current_ou_info.get('ou_name', 'Unknown') if current_ou_info else 'Unknown'
+        if ldap_service.is_available():
+            current_ou_info = ldap_service.get_user_ou_info(obj.ad_username, **obj.ad_locator())
+            obj.remember_ad_location(current_ou_info)
+            current_ou = current_ou_info.get('ou_name', 'Unknown') if current_ou_info else 'Unknown'
+        else:
+            current_ou = 'OU unavailable'
         
         extra_context['available_ous'] = available_ous
         extra_context['current_ou'] = current_ou
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.11 on 2026-10-16 23:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Employee', '0002_auditlog'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='ad_dn',
+            field=models.CharField(blank=True, editable=False, help_text='Last known Distinguished Name in Active Directory', max_length=512, null=True, verbose_name='AD Distinguished Name'),
+        ),
+        migrations.AddField(
+            model_name='employee',
+            name='ad_object_guid',
+            field=models.CharField(blank=True, editable=False, max_length=36, null=True, verbose_name='AD objectGUID'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.11 on 2026-10-16 23:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Employee', '0003_employee_ad_location'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='ad_ou_path',
+            field=models.CharField(blank=True, default='', editable=False, help_text='OU path in Active Directory (e.g., IT/New), kept up to date by the AD sync and OU moves', max_length=255, verbose_name='Current OU'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['ad_ou_path'], name='employees_ad_ou_p_d3c977_idx'),
+        ),
+    ]
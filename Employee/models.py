@@ -67,6 +67,32 @@ class Employee(models.Model):
     # Status
     is_active = models.BooleanField(default=True, verbose_name="Active")
     
+    # Known AD location, filled in on first lookup so later reads can go
+    # straight to the object instead of searching the whole domain
+    ad_object_guid = models.CharField(
+        max_length=36,
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name="AD objectGUID"
+    )
+    ad_dn = models.CharField(
+        max_length=512,
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name="AD Distinguished Name",
+        help_text="Last known Distinguished Name in Active Directory"
+    )
+    ad_ou_path = models.CharField(
+        max_length=255,
+        blank=True,
+        default='',
+        editable=False,
+        verbose_name="Current OU",
+        help_text="OU path in Active Directory (e.g., IT/New), kept up to date by the AD sync and OU moves"
+    )
+    
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -80,6 +106,7 @@ class Employee(models.Model):
             models.Index(fields=['ad_username']),
             models.Index(fields=['national_id']),
             models.Index(fields=['department']),
+            models.Index(fields=['ad_ou_path']),
         ]
     
     def __str__(self):
@@ -93,6 +120,41 @@ class Employee(models.Model):
         """Return full name in Arabic"""
         return f"{self.first_name_ar} {self.last_name_ar}"
     
+    def ad_locator(self):
+        """Return the known AD location as search hints (dn, guid)"""
+        return {'dn': self.ad_dn or None, 'guid': self.ad_object_guid or None}
+    
+    def remember_ad_location(self, user_data):
+        """
+        Store the objectGUID, DN and OU path from an AD lookup when they changed
+        
+        Saved with a queryset update so updated_at is not touched.
+        
+        Lookups served from the LDAP user cache (marked 'from_cache') are
+        ignored: they may predate a move made by another worker, and would
+        overwrite the location that move stored.
+        
+        Args:
+            user_data: dict with 'dn' and optionally 'guid' and 'ou_path'
+                       (or 'ou', as returned by LDAPService.search_user)
+        """
+        if not user_data or not user_data.get('dn') or user_data.get('from_cache'):
+            return
+        
+        changes = {}
+        if user_data['dn'] != self.ad_dn:
+            changes['ad_dn'] = user_data['dn']
+        if user_data.get('guid') and user_data['guid'] != self.ad_object_guid:
+            changes['ad_object_guid'] = user_data['guid']
+        ou_path = user_data.get('ou_path', user_data.get('ou'))
+        if ou_path is not None and ou_path != self.ad_ou_path:
+            changes['ad_ou_path'] = ou_path
+        
+        if changes:
+            Employee.objects.filter(pk=self.pk).update(**changes)
+            for field, value in changes.items():
+                setattr(self, field, value)
+    
     @property
     def full_name_en(self):
         return self.get_full_name_en()
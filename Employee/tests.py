@@ -1,3 +1,252 @@
-from django.test import TestCase
+"""
+Tests for the Employee admin interface
+"""
 
-# Create your tests here.
+from django.test import TestCase, Client
+from django.contrib.auth.models import User
+from django.urls import reverse
+from Employee.models import Employee, AuditLog
+from authentication.ldap_service import ldap_service
+from authentication.profile import ad_profiles
+from datetime import date
+from unittest.mock import patch
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class EmployeeAdminChangelistTests(TestCase):
+    """
+    Test the Employee changelist OU column
+    """
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.client = Client()
+        self.admin_user = User.objects.create_superuser(
+            username='admin',
+            email='admin@eissa.local',
+            password='admin_password_123'
+        )
+        self.client.force_login(self.admin_user)
+        self.changelist_url = reverse('admin:Employee_employee_changelist')
+
+        for i in range(3):
+            Employee.objects.create(
+                ad_username=f'user.{i}',
+                first_name_en='Test',
+                last_name_en=f'User {i}',
+                first_name_ar='اختبار',
+                last_name_ar='مستخدم',
+                job_title='Software Engineer',
+                department='IT',
+                hire_date=date(2023, 1, 1),
+                national_id=f'1234567890123{i}',
+            )
+
+    @patch('Employee.admin.ldap_service')
+    def test_changelist_renders_ou_without_ldap(self, mock_ldap):
+        """
+        Test that the OU column is read from the database, with no AD calls
+        """
+        Employee.objects.filter(ad_username='user.0').update(ad_ou_path='IT/New')
+        Employee.objects.filter(ad_username='user.1').update(ad_ou_path='HR/New')
+
+        response = self.client.get(self.changelist_url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mock_ldap.mock_calls, [])
+        self.assertContains(response, 'IT/New')
+        self.assertContains(response, 'HR/New')
+        logger.info("✅ Changelist OU column test passed")
+
+    @patch('Employee.admin.ldap_service')
+    def test_changelist_filters_and_sorts_by_ou(self, mock_ldap):
+        """
+        Test filtering and ordering the changelist by OU path
+        """
+        Employee.objects.filter(ad_username='user.0').update(ad_ou_path='HR/New')
+        Employee.objects.filter(ad_username='user.1').update(ad_ou_path='HR/New')
+        Employee.objects.filter(ad_username='user.2').update(ad_ou_path='IT/New')
+
+        response = self.client.get(self.changelist_url, {'ad_ou_path': 'HR/New'})
+        self.assertEqual(response.context['cl'].result_count, 2)
+
+        response = self.client.get(self.changelist_url, {'o': '7'})
+        self.assertEqual(
+            [employee.ad_ou_path for employee in response.context['cl'].result_list],
+            ['HR/New', 'HR/New', 'IT/New']
+        )
+        self.assertEqual(mock_ldap.mock_calls, [])
+        logger.info("✅ Changelist OU filter/sort test passed")
+
+    @patch.object(ldap_service, 'get_all_ous', return_value=[])
+    @patch.object(ldap_service, 'get_user_ou_info')
+    def test_change_view_degrades_while_ad_unavailable(self, mock_ou_info, mock_all_ous):
+        """
+        Test that the detail page shows placeholders instead of calling AD
+        """
+        employee = Employee.objects.get(ad_username='user.0')
+        employee.remember_ad_location({'dn': 'CN=user.0,OU=IT,OU=New,DC=eissa,DC=local', 'ou_path': 'IT/New'})
+        for _ in range(ldap_service.breaker.failure_threshold):
+            ldap_service.breaker.record_failure()
+        self.addCleanup(ldap_service.breaker.reset)
+
+        response = self.client.get(reverse('admin:Employee_employee_change', args=[employee.pk]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'OU unavailable')
+        self.assertContains(response, 'Last known OU: IT/New')
+        mock_ou_info.assert_not_called()
+        logger.info("✅ Change view AD outage test passed")
+
+
+class EmployeeAdminBulkMoveTests(TestCase):
+    """
+    Test the bulk "move to OU" admin action
+    """
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.client = Client()
+        self.admin_user = User.objects.create_superuser(
+            username='admin',
+            email='admin@eissa.local',
+            password='admin_password_123'
+        )
+        self.client.force_login(self.admin_user)
+        self.changelist_url = reverse('admin:Employee_employee_changelist')
+        self.target_ou = {'name': 'HR', 'dn': 'OU=HR,OU=New,DC=eissa,DC=local', 'path': 'HR/New'}
+
+        self.employees = [
+            Employee.objects.create(
+                ad_username=f'user.{i}',
+                first_name_en='Test',
+                last_name_en=f'User {i}',
+                first_name_ar='اختبار',
+                last_name_ar='مستخدم',
+                job_title='Software Engineer',
+                department='IT',
+                hire_date=date(2023, 1, 1),
+                national_id=f'1234567890123{i}',
+            )
+            for i in range(3)
+        ]
+
+    def move_result(self, username, success=True, error=None):
+        return {
+            'username': username,
+            'success': success,
+            'error': error,
+            'already_in_ou': False,
+            'old_dn': f'CN={username},OU=IT,OU=New,DC=eissa,DC=local',
+            'new_dn': f'CN={username},OU=HR,OU=New,DC=eissa,DC=local' if success else '',
+            'old_ou_path': 'IT/New',
+            'new_ou_path': 'HR/New',
+        }
+
+    @patch('Employee.admin.ldap_service')
+    def test_action_shows_ou_selection(self, mock_ldap):
+        """
+        Test that the action first asks for the target OU
+        """
+        mock_ldap.get_all_ous.return_value = [self.target_ou]
+
+        response = self.client.post(self.changelist_url, {
+            'action': 'move_user_ou',
+            '_selected_action': [employee.pk for employee in self.employees],
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'admin/Employee/move_ou_action.html')
+        self.assertContains(response, self.target_ou['dn'])
+        mock_ldap.move_users.assert_not_called()
+        logger.info("✅ Bulk move OU selection test passed")
+
+    @patch('Employee.admin.ldap_service')
+    def test_action_moves_all_and_bulk_logs(self, mock_ldap):
+        """
+        Test that all selected employees are moved in one call and audited in bulk
+        """
+        mock_ldap.find_ou.return_value = self.target_ou
+        for i in range(3):
+            ad_profiles.store(f'user.{i}', {'ou': 'IT/New'})
+        results = {
+            'user.0': self.move_result('user.0'),
+            'user.1': self.move_result('user.1'),
+            'user.2': self.move_result('user.2', success=False, error='Move failed: insufficientAccessRights'),
+        }
+        mock_ldap.move_users.side_effect = lambda usernames, target_dn: [results[name] for name in usernames]
+
+        response = self.client.post(self.changelist_url, {
+            'action': 'move_user_ou',
+            '_selected_action': [employee.pk for employee in self.employees],
+            'target_ou_dn': self.target_ou['dn'],
+            'apply': '1',
+        }, follow=True)
+
+        self.assertEqual(response.status_code, 200)
+        mock_ldap.move_users.assert_called_once()
+        self.assertEqual(AuditLog.objects.filter(status='success').count(), 2)
+        self.assertEqual(AuditLog.objects.filter(status='failed').count(), 1)
+        self.assertContains(response, 'employees/s')
+        self.assertEqual(Employee.objects.filter(ad_ou_path='HR/New').count(), 2)
+        self.assertIsNone(ad_profiles.get_snapshot('user.0'))
+        self.assertIsNotNone(ad_profiles.get_snapshot('user.2'))
+        logger.info("✅ Bulk move execution test passed")
+
+
+class EmployeeADLocationTests(TestCase):
+    """
+    Test persisting the AD location of an employee
+    """
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.employee = Employee.objects.create(
+            ad_username='john.doe',
+            first_name_en='John',
+            last_name_en='Doe',
+            first_name_ar='جون',
+            last_name_ar='دو',
+            job_title='Software Engineer',
+            department='IT',
+            hire_date=date(2023, 1, 1),
+            national_id='12345678901234',
+        )
+
+    def test_remember_ad_location(self):
+        """
+        Test that the GUID and DN are stored without touching updated_at
+        """
+        updated_at = self.employee.updated_at
+        self.assertEqual(self.employee.ad_locator(), {'dn': None, 'guid': None})
+
+        self.employee.remember_ad_location({
+            'dn': 'CN=John Doe,OU=IT,OU=New,DC=eissa,DC=local',
+            'guid': '7b95f0d5-a3ed-486c-919c-077b8c9731f2',
+        })
+
+        self.employee.refresh_from_db()
+        self.assertEqual(self.employee.ad_locator(), {
+            'dn': 'CN=John Doe,OU=IT,OU=New,DC=eissa,DC=local',
+            'guid': '7b95f0d5-a3ed-486c-919c-077b8c9731f2',
+        })
+        self.assertEqual(self.employee.updated_at, updated_at)
+        logger.info("✅ AD location persistence test passed")
+
+    def test_cached_lookup_is_not_remembered(self):
+        """
+        Test that a lookup served from the LDAP user cache does not overwrite the stored location
+        """
+        self.employee.remember_ad_location({'dn': 'CN=John Doe,OU=HR,OU=New,DC=eissa,DC=local', 'ou_path': 'HR/New'})
+
+        self.employee.remember_ad_location({
+            'dn': 'CN=John Doe,OU=IT,OU=New,DC=eissa,DC=local',
+            'ou_path': 'IT/New',
+            'from_cache': True,
+        })
+
+        self.employee.refresh_from_db()
+        self.assertEqual(self.employee.ad_ou_path, 'HR/New')
+        logger.info("✅ Cached lookup write-back test passed")
@@ -0,0 +1,269 @@
+"""
+AD to database sync
+Mirrors the AD user attributes the app displays into ADUserRecord
+"""
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.functions import Lower
+from django.utils import timezone
+from ldap3 import BASE, ALL_ATTRIBUTES
+from ldap3.core.exceptions import LDAPException
+from Employee.models import Employee
+from .ldap_service import ldap_service, DomainControllerPool
+from .models import ADUserRecord, ADSyncState
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# User accounts only (computer accounts are objectClass=user as well)
+USER_FILTER = '(&(objectCategory=person)(objectClass=user))'
+
+SYNC_ATTRIBUTES = [
+    'sAMAccountName', 'objectGUID', 'mail', 'telephoneNumber', 'displayName',
+    'givenName', 'sn', 'userPrincipalName', 'department', 'title', 'uSNChanged'
+]
+
+# Employee fields kept in line with the synced AD location
+EMPLOYEE_FIELDS = ['ad_dn', 'ad_object_guid', 'ad_ou_path']
+
+# ADUserRecord fields compared and written on every sync
+RECORD_FIELDS = [
+    'object_guid', 'dn', 'ou_path', 'email', 'phone', 'display_name',
+    'first_name', 'last_name', 'upn', 'department', 'title', 'usn_changed'
+]
+
+
+class ADSyncEngine:
+    """
+    Incremental AD-to-database sync
+    
+    The first run (or a forced full run) reads every user with a paged
+    search. Later runs only ask for users whose uSNChanged is above the
+    stored watermark. Changes are written with one bulk_create and one
+    bulk_update per batch, and the DN, objectGUID and OU path stored on
+    linked employees are brought up to date at the same time.
+    
+    The new watermark is the DC's highestCommittedUSN read before the
+    search, not the highest uSNChanged returned: an object changed while the
+    search pages through the directory may get a USN below that of an object
+    on a later page, and would otherwise never be picked up.
+    
+    Incremental runs cannot see deleted accounts; a full run removes
+    records of users that are no longer in AD. uSNChanged is local to each
+    domain controller, so the watermark is kept per DC and the first run
+    against another DC is a full one.
+    """
+    
+    def __init__(self, service=None, batch_size=None):
+        self.service = service or ldap_service
+        self.batch_size = batch_size or settings.AD_SYNC_BATCH_SIZE
+    
+    def run(self, full=False, connection=None):
+        """
+        Sync AD users into ADUserRecord
+        
+        Args:
+            full: Re-read every user even when a watermark exists
+            connection: Existing LDAP connection (optional)
+        
+        Returns:
+            dict: {'full', 'seen', 'created', 'updated', 'deleted', 'linked',
+                   'highest_usn', 'seconds'}
+        """
+        return self.service._with_service_connection(lambda conn: self._run_on(conn, full), connection)
+    
+    def _run_on(self, conn, full):
+        started = time.monotonic()
+        # uSNChanged values are local to each domain controller, so every DC
+        # has its own watermark
+        server = DomainControllerPool.server_name(conn.server)
+        state, _ = ADSyncState.objects.get_or_create(server=server)
+        full = full or not state.highest_usn
+        
+        stats = {
+            'full': full, 'seen': 0, 'created': 0, 'updated': 0,
+            'deleted': 0, 'linked': 0, 'highest_usn': state.highest_usn
+        }
+        seen = set()
+        # Everything committed up to here is covered by this run
+        committed_usn = self._highest_committed_usn(conn)
+        
+        search_filter = USER_FILTER
+        if not full:
+            search_filter = f'(&{USER_FILTER}(uSNChanged>={state.highest_usn + 1}))'
+        
+        batch = []
+        for record in self.service.iter_search(search_filter, SYNC_ATTRIBUTES, connection=conn):
+            values = self._record_values(record)
+            if values:
+                batch.append(values)
+            if len(batch) >= self.batch_size:
+                self._apply_batch(batch, stats, seen)
+                batch = []
+        if batch:
+            self._apply_batch(batch, stats, seen)
+        
+        if full:
+            stats['deleted'] = self._delete_missing(seen)
+        stats['linked'] = self._link_employees()
+        
+        if committed_usn is not None:
+            stats['highest_usn'] = max(state.highest_usn, committed_usn)
+        
+        # Only advance the watermark once the whole run has been applied
+        now = timezone.now()
+        state.highest_usn = stats['highest_usn']
+        state.last_sync = now
+        if full:
+            state.last_full_sync = now
+        state.save()
+        
+        stats['seconds'] = time.monotonic() - started
+        logger.info(
+            f"AD sync ({'full' if full else 'incremental'}) from {server} done in {stats['seconds']:.2f}s: "
+            f"{stats['seen']} seen, {stats['created']} created, {stats['updated']} updated, "
+            f"{stats['deleted']} deleted, watermark {stats['highest_usn']}"
+        )
+        return stats
+    
+    def _highest_committed_usn(self, conn):
+        """
+        Read highestCommittedUSN from the rootDSE of the connection's DC
+        
+        Returns:
+            int: The DC's highest committed USN, or None if it cannot be read,
+            in which case the highest uSNChanged seen becomes the watermark
+        """
+        try:
+            # All attributes: the rootDSE's are not in the schema, so they cannot be named
+            conn.search('', '(objectClass=*)', BASE, attributes=[ALL_ATTRIBUTES])
+            usn = self.service.first_value(conn.response[0]['attributes'], 'highestCommittedUSN')
+        except (LDAPException, IndexError, KeyError) as e:
+            logger.warning(f"Could not read highestCommittedUSN, using the highest uSNChanged seen: {str(e)}")
+            return None
+        return int(usn) if usn.isdigit() else None
+    
+    def _record_values(self, record):
+        """Map a search record to ADUserRecord field values, or None"""
+        attributes = record['attributes']
+        first = self.service.first_value
+        
+        username = first(attributes, 'sAMAccountName')
+        if not username or not record['dn']:
+            return None
+        
+        raw_guid = record.get('raw_attributes', {}).get('objectGUID')
+        usn = first(attributes, 'uSNChanged')
+        
+        return {
+            'ad_username': username.lower(),
+            'object_guid': self.service.parse_guid(raw_guid[0]) if raw_guid else '',
+            'dn': record['dn'],
+            'ou_path': self.service.extract_ou_from_dn(record['dn']) or '',
+            'email': first(attributes, 'mail'),
+            'phone': first(attributes, 'telephoneNumber'),
+            'display_name': first(attributes, 'displayName'),
+            'first_name': first(attributes, 'givenName'),
+            'last_name': first(attributes, 'sn'),
+            'upn': first(attributes, 'userPrincipalName'),
+            'department': first(attributes, 'department'),
+            'title': first(attributes, 'title'),
+            'usn_changed': int(usn) if usn.isdigit() else 0,
+        }
+    
+    def _apply_batch(self, batch, stats, seen):
+        """Upsert one batch of records"""
+        now = timezone.now()
+        usernames = [values['ad_username'] for values in batch]
+        existing = ADUserRecord.objects.in_bulk(usernames, field_name='ad_username')
+        employees = {
+            employee.key: employee
+            for employee in Employee.objects.annotate(key=Lower('ad_username')).filter(key__in=usernames)
+        }
+        
+        created = []
+        updated = []
+        for values in batch:
+            username = values['ad_username']
+            seen.add(username)
+            stats['seen'] += 1
+            stats['highest_usn'] = max(stats['highest_usn'], values['usn_changed'])
+            
+            record = existing.get(username)
+            if record is None:
+                employee = employees.get(username)
+                created.append(ADUserRecord(employee=employee, synced_at=now, **values))
+                continue
+            
+            if any(getattr(record, field) != values[field] for field in RECORD_FIELDS):
+                for field in RECORD_FIELDS:
+                    setattr(record, field, values[field])
+                record.synced_at = now
+                updated.append(record)
+        
+        relocated = self._relocated_employees(employees, batch)
+        
+        with transaction.atomic():
+            ADUserRecord.objects.bulk_create(created)
+            ADUserRecord.objects.bulk_update(updated, RECORD_FIELDS + ['synced_at'])
+            Employee.objects.bulk_update(relocated, EMPLOYEE_FIELDS)
+        
+        stats['created'] += len(created)
+        stats['updated'] += len(updated)
+    
+    def _relocated_employees(self, employees, batch):
+        """Return the employees whose stored AD location differs from the synced values"""
+        relocated = []
+        for values in batch:
+            employee = employees.get(values['ad_username'])
+            if employee is None:
+                continue
+            location = (values['dn'], values['object_guid'] or employee.ad_object_guid, values['ou_path'])
+            if (employee.ad_dn, employee.ad_object_guid, employee.ad_ou_path) != location:
+                employee.ad_dn, employee.ad_object_guid, employee.ad_ou_path = location
+                relocated.append(employee)
+        return relocated
+    
+    def _delete_missing(self, seen):
+        """Delete records of users not returned by a full sync"""
+        missing = [
+            username for username in ADUserRecord.objects.values_list('ad_username', flat=True)
+            if username not in seen
+        ]
+        for i in range(0, len(missing), self.batch_size):
+            ADUserRecord.objects.filter(ad_username__in=missing[i:i + self.batch_size]).delete()
+        return len(missing)
+    
+    def _link_employees(self):
+        """Link records to employees added since the record was created"""
+        employees = {
+            employee.ad_username.lower(): employee
+            for employee in Employee.objects.filter(ad_record__isnull=True)
+        }
+        if not employees:
+            return 0
+        
+        records = []
+        usernames = list(employees)
+        for i in range(0, len(usernames), self.batch_size):
+            for record in ADUserRecord.objects.filter(
+                ad_username__in=usernames[i:i + self.batch_size], employee__isnull=True
+            ):
+                employee = employees[record.ad_username]
+                employee.ad_dn = record.dn
+                employee.ad_object_guid = record.object_guid or employee.ad_object_guid
+                employee.ad_ou_path = record.ou_path
+                record.employee = employee
+                records.append(record)
+        
+        with transaction.atomic():
+            ADUserRecord.objects.bulk_update(records, ['employee'])
+            Employee.objects.bulk_update([record.employee for record in records], EMPLOYEE_FIELDS)
+        return len(records)
+
+
+def sync_ad_users(full=False):
+    """Run one AD sync with the default settings"""
+    return ADSyncEngine().run(full=full)
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class AuthenticationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'authentication'
+    
+    def ready(self):
+        # Register signal handlers
+        from . import signals  # noqa: F401
+        from . import metrics  # noqa: F401
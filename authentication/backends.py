@@ -5,7 +5,9 @@ Custom Django Authentication Backend for Active Directory (LDAP)
 from django.contrib.auth.backends import BaseBackend
 from django.contrib.auth.models import User
 from Employee.models import Employee
-from .ldap_service import ldap_service
+from .ldap_service import ldap_service, INVALID_CREDENTIALS
+from .eligibility import eligible_usernames
+from .throttle import bind_failures, client_ip
 import logging
 
 logger = logging.getLogger(__name__)
@@ -32,48 +34,44 @@ class LDAPAuthenticationBackend(BaseBackend):
             return None
         
         try:
-            # Step 1: Authenticate against Active Directory
-            success, connection, error = ldap_service.bind_with_credentials(username, password)
-            
-            if not success:
-                logger.warning(f"AD authentication failed for user: {username}")
+            # Step 1: Reject usernames of unknown or inactive employees from
+            # memory, without a database query or AD round trip
+            if not eligible_usernames.is_eligible(username):
+                logger.warning(f"Login attempt for {username}, who is not an active employee")
                 return None
             
-            # Step 2: Search for user in AD to get additional information
-            ad_user_data = ldap_service.search_user(username, connection)
-            
-            if connection:
-                connection.unbind()
-            
-            if not ad_user_data:
-                logger.warning(f"User found in AD but could not retrieve data: {username}")
+            # Step 2: Refuse to bind while the account or client is cooling
+            # down after repeated failures (protects the DC and AD lockout)
+            ip = client_ip(request)
+            retry_after = bind_failures.is_blocked(username, ip)
+            if retry_after:
+                logger.warning(f"Login for {username} from {ip} throttled for {retry_after}s")
                 return None
             
-            # Step 3: Check if employee exists in database
+            # Step 3: Load the employee record
             try:
                 employee = Employee.objects.get(ad_username=username)
             except Employee.DoesNotExist:
-                logger.warning(f"User {username} authenticated in AD but not found in Employee database")
+                logger.warning(f"Login attempt for {username}, who is not in the Employee database")
                 return None
             
-            # Step 4: Get or create Django User for session management
-            user, created = User.objects.get_or_create(
-                username=username,
-                defaults={
-                    'email': ad_user_data.get('email', ''),
-                    'first_name': ad_user_data.get('first_name', ''),
-                    'last_name': ad_user_data.get('last_name', ''),
-                    'is_staff': False,
-                    'is_superuser': False,
-                }
+            # Step 4: Authenticate against Active Directory and read the user's
+            # attributes on the same connection
+            success, ad_user_data, error = ldap_service.authenticate_user(
+                username, password, **employee.ad_locator()
             )
             
-            # Update user information from AD
-            if not created:
-                user.email = ad_user_data.get('email', '')
-                user.first_name = ad_user_data.get('first_name', '')
-                user.last_name = ad_user_data.get('last_name', '')
-                user.save()
+            if not success:
+                logger.warning(f"AD authentication failed for user: {username}")
+                if error == INVALID_CREDENTIALS:
+                    bind_failures.record_failure(username, ip)
+                return None
+            
+            bind_failures.record_success(username)
+            employee.remember_ad_location(ad_user_data)
+            
+            # Step 5: Get or create Django User for session management
+            user = self._sync_user(username, ad_user_data)
             
             # Attach employee and AD data to user object for use in views
             user.employee = employee
@@ -86,6 +84,37 @@ class LDAPAuthenticationBackend(BaseBackend):
             logger.error(f"Error during authentication for user {username}: {str(e)}")
             return None
     
+    def _sync_user(self, username, ad_user_data):
+        """
+        Get or create the Django User and copy the AD attributes onto it
+        
+        The row is only written when one of the attributes actually changed,
+        and then only those columns are updated.
+        """
+        ad_fields = {
+            'email': ad_user_data.get('email', ''),
+            'first_name': ad_user_data.get('first_name', ''),
+            'last_name': ad_user_data.get('last_name', ''),
+        }
+        
+        user, created = User.objects.get_or_create(
+            username=username,
+            defaults={
+                **ad_fields,
+                'is_staff': False,
+                'is_superuser': False,
+            }
+        )
+        
+        if not created:
+            changed = [field for field, value in ad_fields.items() if getattr(user, field) != value]
+            if changed:
+                for field in changed:
+                    setattr(user, field, ad_fields[field])
+                user.save(update_fields=changed)
+        
+        return user
+    
     def get_user(self, user_id):
         """
         Get user by ID for session management
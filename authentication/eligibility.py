@@ -0,0 +1,100 @@
+"""
+Login eligibility check
+Rejects usernames that do not belong to an active employee before any AD traffic
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from Employee.models import Employee
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class EligibleUsernames:
+    """
+    In-process set of the lowercased ad_usernames of active employees
+    
+    Membership tests are a set lookup, so logins for unknown or inactive
+    accounts (typos, scanners, password sprayers) are rejected without a
+    database query or a DC bind.
+    
+    The set is rebuilt from the Employee table when:
+    - an Employee is saved or deleted in this process (see signals.py)
+    - another process bumped the shared generation in the Django cache;
+      this is checked at most every AD_ELIGIBILITY_REFRESH seconds
+    - it is older than AD_ELIGIBILITY_MAX_AGE seconds, as a backstop for
+      changes made outside the ORM
+    """
+    
+    GENERATION_KEY = 'authentication:eligible_usernames:generation'
+    
+    def __init__(self, refresh_interval=None, max_age=None):
+        self.refresh_interval = settings.AD_ELIGIBILITY_REFRESH if refresh_interval is None else refresh_interval
+        self.max_age = settings.AD_ELIGIBILITY_MAX_AGE if max_age is None else max_age
+        self._lock = threading.Lock()
+        self._usernames = None
+        self._generation = None
+        self._loaded_at = 0.0
+        self._checked_at = 0.0
+    
+    def is_eligible(self, username):
+        """
+        Check whether a username belongs to an active employee
+        
+        Args:
+            username: AD username (case-insensitive)
+            
+        Returns:
+            bool: True if an active Employee has this ad_username
+        """
+        if not username:
+            return False
+        return username.lower() in self._current()
+    
+    def invalidate(self):
+        """Drop the set here and tell the other processes to rebuild theirs"""
+        with self._lock:
+            self._usernames = None
+        try:
+            cache.add(self.GENERATION_KEY, 0, None)
+            cache.incr(self.GENERATION_KEY)
+        except ValueError:
+            # Evicted between add() and incr(); the max age covers it
+            pass
+    
+    def __len__(self):
+        return len(self._current())
+    
+    def _current(self):
+        """Return the current set, rebuilding it when it is stale"""
+        now = time.monotonic()
+        usernames = self._usernames
+        if (usernames is not None
+                and now - self._checked_at < self.refresh_interval
+                and now - self._loaded_at < self.max_age):
+            return usernames
+        
+        with self._lock:
+            now = time.monotonic()
+            # Read the generation before the table, so a change made while
+            # loading triggers another rebuild
+            generation = cache.get(self.GENERATION_KEY, 0)
+            if (self._usernames is None
+                    or generation != self._generation
+                    or now - self._loaded_at >= self.max_age):
+                self._usernames = frozenset(
+                    username.lower() for username in
+                    Employee.objects.filter(is_active=True).values_list('ad_username', flat=True)
+                )
+                self._generation = generation
+                self._loaded_at = now
+                logger.info(f"Loaded {len(self._usernames)} eligible usernames")
+            self._checked_at = now
+            return self._usernames
+
+
+# Singleton instance
+eligible_usernames = EligibleUsernames()
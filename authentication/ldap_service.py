@@ -3,13 +3,1246 @@ LDAP Service for Active Directory Integration
 Provides utilities for connecting, binding, and searching AD
 """
 
-from ldap3 import Server, Connection, ALL, SUBTREE, MODIFY_REPLACE
-from ldap3.core.exceptions import LDAPException, LDAPBindError
+from ldap3 import Server, Connection, ALL, NONE, BASE, SUBTREE, MODIFY_REPLACE
+from ldap3.protocol.rfc4512 import DsaInfo, SchemaInfo
+from ldap3.utils.conv import escape_filter_chars
+from ldap3.utils.dn import to_dn
+from ldap3.core.exceptions import (
+    LDAPException, LDAPBindError, LDAPCommunicationError, LDAPResponseTimeoutError
+)
 from django.conf import settings
+from django.core.cache import cache
+from django.dispatch import Signal
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, TimeoutError as FutureTimeoutError, wait
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+import copy
+import functools
 import logging
+import os
+import threading
+import time
+import uuid
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: no node-wide admission limit (see AdmissionGate)
+    fcntl = None
 
 logger = logging.getLogger(__name__)
 
+# Errors that mean the socket is gone and the connection must not be reused
+CONNECTION_ERRORS = (LDAPCommunicationError, LDAPResponseTimeoutError)
+
+# modify_dn result code when the entry being moved no longer exists at its DN
+RESULT_NO_SUCH_OBJECT = 32
+
+# File names of the persisted server info (see LDAPService.save_server_info)
+DSA_INFO_FILE = 'dsa_info.json'
+SCHEMA_INFO_FILE = 'schema_info.json'
+
+# Error returned when AD rejects a username/password
+INVALID_CREDENTIALS = "Invalid credentials"
+
+# Sent after every timed LDAP operation, with operation, server, seconds,
+# error (the call raised) and failed (the call returned False)
+ldap_operation_recorded = Signal()
+
+# Sent on every lookup in a process-level cache, with cache (its name) and hit
+cache_lookup = Signal()
+
+# Sent when a hedged read (see HedgedReads) has fired, with operation and
+# winner ('primary' or 'hedge')
+hedged_read = Signal()
+
+# Sent when a connection to a domain controller was opened or failed (see
+# DomainControllerPool), with server, failed, latency (moving average in
+# seconds, or None) and quarantined_until (epoch seconds, 0 when healthy)
+domain_controller_recorded = Signal()
+
+# Sent when an LDAP operation leaves the admission gate (see AdmissionGate),
+# with operation, seconds waited and outcome ('admitted', 'queue_full' or 'timeout')
+ldap_admission = Signal()
+
+# Sent whenever the LDAP operations of this process running (active) or
+# waiting for admission (waiting) change
+ldap_admission_state = Signal()
+
+# AD fast concurrent bind extended operation: binds on the connection only
+# verify credentials, without building a security context
+FAST_BIND_OID = '1.2.840.113556.1.4.1781'
+
+# Django cache key bumped when a user record changes, e.g. after a move
+# (see TTLCache.broadcast_invalidation)
+USER_CACHE_GENERATION_KEY = 'authentication:ldap_users:generation'
+
+# Simple paged results control (RFC 2696)
+PAGED_RESULTS_OID = '1.2.840.113556.1.4.319'
+
+# Attributes read for every user lookup
+USER_ATTRIBUTES = [
+    'cn', 'sAMAccountName', 'mail', 'telephoneNumber',
+    'displayName', 'givenName', 'sn', 'distinguishedName',
+    'memberOf', 'userPrincipalName', 'department', 'title', 'objectGUID'
+]
+
+
+class LDAPServiceError(LDAPException):
+    """Raised when a service account connection cannot be provided"""
+
+
+class LDAPUnavailableError(LDAPServiceError):
+    """Raised without contacting AD while the circuit breaker is open"""
+
+
+# Lookups memoized for the current request (see ldap_request_scope)
+_request_memo = ContextVar('ldap_request_memo', default=None)
+
+
+@contextmanager
+def ldap_request_scope():
+    """
+    Memoize LDAPService lookups until the block exits
+    
+    Used by LDAPRequestScopeMiddleware so that identical directory lookups
+    within one HTTP request cost a single round trip.
+    """
+    token = _request_memo.set({})
+    try:
+        yield
+    finally:
+        _request_memo.reset(token)
+
+
+class LDAPDeadlineExceeded(LDAPServiceError):
+    """Raised instead of starting an LDAP call once the request's time budget is spent"""
+
+
+class LDAPOverloadedError(LDAPServiceError):
+    """Raised without contacting AD when the admission gate's queue is full or the wait timed out"""
+
+
+# time.monotonic() by which the current request's LDAP calls must be done (see ldap_deadline)
+_request_deadline = ContextVar('ldap_request_deadline', default=None)
+
+
+@contextmanager
+def ldap_deadline(seconds):
+    """
+    Give the LDAP calls made until the block exits `seconds` in total
+    
+    Used by LDAPRequestScopeMiddleware: once a request has spent its budget,
+    LDAPService raises LDAPDeadlineExceeded instead of starting another
+    directory call, so the view degrades as if the lookup had failed rather
+    than waiting out one timeout after another. A nested deadline can only
+    shorten the outer one. Falsy `seconds` sets no deadline.
+    """
+    if not seconds:
+        yield
+        return
+    deadline = time.monotonic() + seconds
+    outer = _request_deadline.get()
+    if outer is not None:
+        deadline = min(deadline, outer)
+    token = _request_deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _request_deadline.reset(token)
+
+
+def remaining_budget():
+    """Seconds left before the current deadline, or None without one"""
+    deadline = _request_deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def check_deadline():
+    """
+    Raises:
+        LDAPDeadlineExceeded: if the current deadline has passed
+    """
+    remaining = remaining_budget()
+    if remaining is not None and remaining <= 0:
+        raise LDAPDeadlineExceeded("LDAP time budget of this request is spent")
+
+
+class LDAPConnectionPool:
+    """
+    Thread-safe pool of long-lived, pre-bound service account connections
+    
+    Connections are opened lazily (up to `size`) by calling `factory`, handed
+    out to one caller at a time and kept open between uses. Connections idle
+    for longer than `max_idle` seconds are closed, and a connection idle for
+    longer than `ping_after` seconds is checked with a Who Am I request before
+    it is handed out again. Dead connections are replaced transparently.
+    
+    With `require_bound=False` connections that are open but not bound (e.g.
+    after a rejected user bind) are kept as well.
+    """
+    
+    def __init__(self, factory, size=5, max_idle=300, ping_after=60, timeout=10, require_bound=True):
+        self.factory = factory
+        self.require_bound = require_bound
+        self.size = max(1, size)
+        self.max_idle = max_idle
+        self.ping_after = ping_after
+        self.timeout = timeout
+        self._idle = []  # [(connection, last_used)], most recently used last
+        self._in_use = 0
+        self._condition = threading.Condition()
+        self._pid = os.getpid()
+    
+    def acquire(self, timeout=None):
+        """
+        Borrow a bound connection, opening a new one if none is idle
+        
+        Args:
+            timeout: Seconds to wait for a free connection, at most the pool's `timeout`
+        
+        Raises:
+            LDAPServiceError: if no connection frees up in time
+        """
+        wait = self.timeout if timeout is None else min(self.timeout, timeout)
+        deadline = time.monotonic() + wait
+        with self._condition:
+            self._reset_after_fork()
+            expired = self._pop_expired()
+            while True:
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    break
+                if self._in_use < self.size:
+                    conn, last_used = None, None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise LDAPServiceError("Timed out waiting for a pooled LDAP connection")
+                self._condition.wait(remaining)
+            self._in_use += 1
+        
+        for stale in expired:
+            self._close(stale)
+        
+        try:
+            if conn is not None and not self._is_alive(conn, last_used):
+                self._close(conn)
+                conn = None
+            if conn is None:
+                conn = self.factory()
+        except Exception:
+            with self._condition:
+                self._in_use -= 1
+                self._condition.notify()
+            raise
+        return conn
+    
+    def release(self, conn, discard=False):
+        """Return a borrowed connection; discarded or closed connections are unbound"""
+        with self._condition:
+            if os.getpid() != self._pid:
+                # Borrowed before a fork; the socket belongs to the parent
+                return
+            self._in_use -= 1
+            keep = not discard and not conn.closed
+            if keep:
+                self._idle.append((conn, time.monotonic()))
+            self._condition.notify()
+        if not keep:
+            self._close(conn)
+    
+    def clear(self):
+        """Close every idle connection"""
+        with self._condition:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            self._close(conn)
+    
+    def stats(self):
+        """Return current pool occupancy"""
+        with self._condition:
+            return {'size': self.size, 'idle': len(self._idle), 'in_use': self._in_use}
+    
+    def _reset_after_fork(self):
+        # Connections inherited from a parent process share its sockets;
+        # drop them without unbinding so the parent's sessions stay intact.
+        if os.getpid() != self._pid:
+            self._pid = os.getpid()
+            self._idle = []
+            self._in_use = 0
+    
+    def _pop_expired(self):
+        cutoff = time.monotonic() - self.max_idle
+        expired = [conn for conn, last_used in self._idle if last_used < cutoff]
+        if expired:
+            self._idle = [(conn, last_used) for conn, last_used in self._idle if last_used >= cutoff]
+        return expired
+    
+    def _is_alive(self, conn, last_used):
+        if conn.closed or (self.require_bound and not conn.bound):
+            return False
+        if time.monotonic() - last_used < self.ping_after:
+            return True
+        try:
+            with ldap_stats.timer('who_am_i', ldap_stats.server_name(conn)):
+                return conn.extend.standard.who_am_i() is not None
+        except LDAPException as e:
+            logger.info(f"Dropping dead pooled LDAP connection: {str(e)}")
+            return False
+    
+    @staticmethod
+    def _close(conn):
+        try:
+            conn.unbind()
+        except Exception:
+            pass
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache with a time to live per entry
+    
+    A value of None is a negative entry ("looked up, does not exist") and is
+    kept for `negative_ttl` seconds instead of `ttl`. Once `maxsize` entries
+    are stored, the least recently used entry is evicted.
+    
+    With a `generation_key`, the cache follows a generation counter in the
+    Django cache: broadcast_invalidation() bumps it, and every other process
+    drops all of its entries on its next lookup.
+    """
+    
+    MISSING = object()
+    
+    def __init__(self, maxsize=1024, ttl=300, negative_ttl=60, name=None, generation_key=None):
+        self.name = name
+        self.generation_key = generation_key
+        self._generation = None
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    def get(self, key):
+        """Return the cached value (possibly None) or TTLCache.MISSING"""
+        value = self._get(key)
+        cache_lookup.send(sender=self.__class__, cache=self.name, hit=value is not self.MISSING)
+        return value
+    
+    def _get(self, key):
+        self._sync_generation()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return self.MISSING
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return self.MISSING
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def set(self, key, value):
+        ttl = self.negative_ttl if value is None else self.ttl
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+    
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+    
+    def broadcast_invalidation(self, key):
+        """Drop `key` here and make the other processes drop their entries"""
+        self.invalidate(key)
+        if not self.generation_key:
+            return
+        try:
+            cache.add(self.generation_key, 0, None)
+            generation = cache.incr(self.generation_key)
+        except ValueError:
+            # Evicted between add() and incr(): every process sees a new generation
+            return
+        with self._lock:
+            # Keep the rest of this process' entries unless another process
+            # bumped the generation too
+            if self._generation is not None and generation == self._generation + 1:
+                self._generation = generation
+    
+    def _sync_generation(self):
+        if not self.generation_key:
+            return
+        generation = cache.get(self.generation_key, 0)
+        with self._lock:
+            if generation != self._generation:
+                self._data.clear()
+                self._generation = generation
+    
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+    
+    def stats(self):
+        """Return size and hit/miss/eviction counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+            }
+
+
+class OUTreeCache:
+    """
+    Process-level cache of the OU list, served stale while it revalidates
+    
+    Data checked within the last `ttl` seconds is served as is. Older data is
+    still served, while a revalidation asks AD whether any OU has a uSNChanged
+    above the highest one seen at load time. The OU list is only re-read when
+    that finds something, or when it is older than `max_age` (deleting an OU
+    leaves no trace among live objects, so only a reload picks that up).
+    
+    uSNChanged is local to each DC, so the watermark is kept together with
+    the server it was read from; has_changed() must report a change when it
+    runs against another server.
+    
+    Args:
+        load: callable returning (ous, highest_usn, server)
+        has_changed: callable(highest_usn, server) returning True if OUs changed since
+        ttl: seconds before cached data is revalidated
+        max_age: seconds before the OU list is re-read regardless
+        background: revalidate in a background thread instead of inline
+    """
+    
+    def __init__(self, load, has_changed, ttl=60, max_age=3600, background=True):
+        self.load = load
+        self.has_changed = has_changed
+        self.ttl = ttl
+        self.max_age = max_age
+        self.background = background
+        self._ous = None
+        self._by_dn = {}
+        self._by_name = {}
+        self._highest_usn = 0
+        self._server = None
+        self._loaded_at = 0
+        self._checked_at = 0
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._revalidating = False
+        self.reloads = 0
+        self.revalidations = 0
+    
+    def get(self):
+        """Return the cached OU list, loading it on first use"""
+        with self._lock:
+            ous = self._ous
+            stale = time.monotonic() - self._checked_at >= self.ttl
+            start_revalidation = ous is not None and stale and not self._revalidating
+            if start_revalidation:
+                self._revalidating = True
+        
+        cache_lookup.send(sender=self.__class__, cache='ldap_ous', hit=ous is not None)
+        if ous is None:
+            return self._load_initial()
+        
+        if start_revalidation:
+            if self.background:
+                threading.Thread(target=self._revalidate, name='ou-cache-revalidate', daemon=True).start()
+            else:
+                self._revalidate()
+                with self._lock:
+                    ous = self._ous
+        return ous
+    
+    def find(self, dn=None, name=None):
+        """Look up one OU by DN or by name in the cached index"""
+        self.get()
+        with self._lock:
+            if dn is not None:
+                return self._by_dn.get(dn.lower())
+            return self._by_name.get(name)
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'cached_ous': len(self._ous) if self._ous is not None else 0,
+                'highest_usn': self._highest_usn,
+                'server': self._server,
+                'reloads': self.reloads,
+                'revalidations': self.revalidations,
+            }
+    
+    def _load_initial(self):
+        # Only one thread loads; the others wait for its result
+        with self._load_lock:
+            with self._lock:
+                if self._ous is not None:
+                    return self._ous
+            ous, highest_usn, server = self.load()
+            self._store(ous, highest_usn, server)
+            return ous
+    
+    def _store(self, ous, highest_usn, server):
+        now = time.monotonic()
+        by_name = {}
+        for ou in ous:
+            # Same OU name in several branches: keep the first, as listed
+            by_name.setdefault(ou['name'], ou)
+        with self._lock:
+            self._ous = ous
+            self._by_dn = {ou['dn'].lower(): ou for ou in ous}
+            self._by_name = by_name
+            self._highest_usn = highest_usn
+            self._server = server
+            self._loaded_at = now
+            self._checked_at = now
+            self.reloads += 1
+    
+    def _revalidate(self):
+        try:
+            with self._lock:
+                highest_usn = self._highest_usn
+                server = self._server
+                expired = time.monotonic() - self._loaded_at >= self.max_age
+                self.revalidations += 1
+            if expired or self.has_changed(highest_usn, server):
+                ous, highest_usn, server = self.load()
+                self._store(ous, highest_usn, server)
+            else:
+                with self._lock:
+                    self._checked_at = time.monotonic()
+        except Exception as e:
+            # Keep serving the cached list; retry after another ttl
+            logger.error(f"Error revalidating OU cache: {str(e)}")
+            with self._lock:
+                self._checked_at = time.monotonic()
+        finally:
+            with self._lock:
+                self._revalidating = False
+
+
+class LDAPOperationStats:
+    """
+    Thread-safe latency aggregates of LDAP operations
+    
+    Every timed operation updates a call count, an error count (the call
+    raised), a failure count (the call returned False, e.g. rejected
+    credentials or noSuchObject), the total and maximum latency and a
+    cumulative histogram, per operation type and per server. Recording is a
+    clock read and a few additions under a lock, cheap enough to stay on.
+    """
+    
+    # Histogram upper bounds in seconds
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float('inf'))
+    
+    # Connection methods that are timed (see instrument()); rebind() is
+    # timed through the bind() it makes
+    OPERATIONS = ('bind', 'search', 'modify', 'modify_dn', 'add', 'delete')
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+    
+    def instrument(self, conn):
+        """Time the LDAP operations of a connection; returns the connection"""
+        server = self.server_name(conn)
+        for operation in self.OPERATIONS:
+            method = getattr(conn, operation, None)
+            if method is not None:
+                setattr(conn, operation, self._timed(operation, server, method))
+        return conn
+    
+    @staticmethod
+    def server_name(conn):
+        server = getattr(conn, 'server', None)
+        return str(getattr(server, 'host', None) or server or 'unknown')
+    
+    @contextmanager
+    def timer(self, operation, server):
+        """Time a block as one operation; an exception counts as an error"""
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.record(operation, server, time.perf_counter() - started, error=True)
+            raise
+        self.record(operation, server, time.perf_counter() - started)
+    
+    def _timed(self, operation, server, method):
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                result = method(*args, **kwargs)
+            except Exception:
+                self.record(operation, server, time.perf_counter() - started, error=True)
+                raise
+            self.record(operation, server, time.perf_counter() - started, failed=result is False)
+            return result
+        return timed
+    
+    def record(self, operation, server, seconds, error=False, failed=False):
+        """Add one observation"""
+        with self._lock:
+            stats = self._stats.get((operation, server))
+            if stats is None:
+                stats = self._stats[(operation, server)] = {
+                    'count': 0, 'errors': 0, 'failures': 0,
+                    'total_seconds': 0.0, 'max_seconds': 0.0,
+                    'buckets': [0] * len(self.BUCKETS),
+                }
+            stats['count'] += 1
+            stats['errors'] += error
+            stats['failures'] += failed
+            stats['total_seconds'] += seconds
+            stats['max_seconds'] = max(stats['max_seconds'], seconds)
+            for i, bound in enumerate(self.BUCKETS):
+                if seconds <= bound:
+                    stats['buckets'][i] += 1
+        ldap_operation_recorded.send(
+            sender=self.__class__, operation=operation, server=server,
+            seconds=seconds, error=error, failed=failed
+        )
+    
+    def snapshot(self):
+        """
+        Return a copy of the aggregates
+        
+        Returns:
+            dict: {operation: {server: {'count', 'errors', 'failures',
+                   'total_seconds', 'max_seconds', 'avg_seconds',
+                   'histogram': [(upper bound, cumulative count), ...]}}}
+        """
+        result = {}
+        with self._lock:
+            for (operation, server), stats in self._stats.items():
+                result.setdefault(operation, {})[server] = {
+                    'count': stats['count'],
+                    'errors': stats['errors'],
+                    'failures': stats['failures'],
+                    'total_seconds': stats['total_seconds'],
+                    'max_seconds': stats['max_seconds'],
+                    'avg_seconds': stats['total_seconds'] / stats['count'],
+                    'histogram': list(zip(self.BUCKETS, stats['buckets'])),
+                }
+        return result
+    
+    def reset(self):
+        """Drop all aggregates"""
+        with self._lock:
+            self._stats.clear()
+
+
+# Process-wide LDAP operation stats
+ldap_stats = LDAPOperationStats()
+
+
+# Server label of end-to-end timings (see timed_operation): one call can
+# use several DCs (failover, hedged reads), so it is not attributed to one
+SERVICE_SERVER_LABEL = 'service'
+
+
+def timed_operation(method):
+    """
+    Record an LDAPService method end to end in ldap_stats under its own name
+    
+    Compared with the per-request timings (bind, search, ...) this shows how
+    much of an operation is spent outside the directory server. The
+    per-request timings carry the DC that answered them.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with ldap_stats.timer(method.__name__, SERVICE_SERVER_LABEL):
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class CircuitBreaker:
+    """
+    Fail fast while the directory server is unreachable
+    
+    Closed: calls go through. After `failure_threshold` consecutive
+    connection errors or timeouts the breaker opens and every call raises
+    LDAPUnavailableError at once instead of waiting for a socket timeout.
+    After `reset_timeout` seconds it is half-open: a single probe call goes
+    through while the others keep failing fast. The probe closes the
+    breaker if the server answers and reopens it if it does not.
+    
+    Any answer from the server, including a rejected bind or a failed
+    search, counts as success; only errors of the connection itself count
+    as failures.
+    """
+    
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+    
+    # Connection methods that go through the breaker (see guard())
+    OPERATIONS = LDAPOperationStats.OPERATIONS
+    
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0
+        self._probing = False
+        self.rejected = 0
+        self.trips = 0
+    
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+    
+    @property
+    def is_open(self):
+        """True while calls are failing fast (no probe due yet)"""
+        return self.state == self.OPEN
+    
+    def before_call(self):
+        """
+        Let a call through or fail fast
+        
+        Raises:
+            LDAPUnavailableError: while open, or half-open with a probe in flight
+        """
+        if self.failure_threshold <= 0:
+            return
+        with self._lock:
+            if self._state == self.CLOSED:
+                return
+            if not self._probing and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._state = self.HALF_OPEN
+                self._probing = True
+                logger.info("LDAP circuit breaker half-open, probing the server")
+                return
+            self.rejected += 1
+        raise LDAPUnavailableError("Active Directory is unavailable (circuit breaker open)")
+    
+    def check(self):
+        """
+        Like before_call(), but without taking the probe slot
+        
+        Raises:
+            LDAPUnavailableError: if a call made now would fail fast
+        """
+        with self._lock:
+            if self._state == self.CLOSED or self.failure_threshold <= 0:
+                return
+            if not self._probing and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return
+            self.rejected += 1
+        raise LDAPUnavailableError("Active Directory is unavailable (circuit breaker open)")
+    
+    def record_success(self):
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info("LDAP server answered, circuit breaker closed")
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probing = False
+    
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or (
+                self._state == self.CLOSED and self._failures >= self.failure_threshold
+            ):
+                logger.warning(
+                    f"LDAP circuit breaker open after {self._failures} consecutive failures, "
+                    f"failing fast for {self.reset_timeout}s"
+                )
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self.trips += 1
+            self._probing = False
+    
+    def guard(self, conn):
+        """Route the LDAP operations of a connection through the breaker; returns the connection"""
+        for operation in self.OPERATIONS:
+            method = getattr(conn, operation, None)
+            if method is not None:
+                setattr(conn, operation, self._guarded(method))
+        return conn
+    
+    def _guarded(self, method):
+        def guarded(*args, **kwargs):
+            self.before_call()
+            try:
+                result = method(*args, **kwargs)
+            except CONNECTION_ERRORS:
+                self.record_failure()
+                raise
+            except Exception:
+                # The server answered (or the call never left the client)
+                self.record_success()
+                raise
+            self.record_success()
+            return result
+        return guarded
+    
+    def reset(self):
+        """Close the breaker"""
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probing = False
+    
+    def stats(self):
+        return {
+            'state': self.state,
+            'consecutive_failures': self._failures,
+            'rejected': self.rejected,
+            'trips': self.trips,
+        }
+
+
+class AdmissionGate:
+    """
+    Bound the LDAP operations in flight to the domain controllers
+    
+    At most `limit` operations of this process run at once and, with
+    `node_limit` set, at most `node_limit` of all processes sharing
+    `lock_dir` (one lock file per slot, held with flock). An operation over
+    either limit waits in a queue of at most `max_queue` operations for up
+    to `timeout` seconds, or until the request deadline if that is sooner;
+    when the queue is full or the wait times out it fails with
+    LDAPOverloadedError without contacting AD. A limit of 0 disables it.
+    """
+    
+    # Connection methods that go through the gate (see guard())
+    OPERATIONS = LDAPOperationStats.OPERATIONS
+    
+    # Seconds between attempts to take a node slot held by another process
+    NODE_POLL_INTERVAL = 0.01
+    
+    def __init__(self, limit=0, node_limit=0, max_queue=100, timeout=5, lock_dir=None):
+        if node_limit and fcntl is None:
+            logger.warning("File locks are not available on this platform, ignoring the node-wide LDAP limit")
+            node_limit = 0
+        self.limit = limit
+        self.node_limit = node_limit
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.lock_dir = lock_dir
+        self._condition = threading.Condition()
+        self._active = 0
+        self._waiting = 0
+        self._pid = os.getpid()
+        # Node slot number -> lock file descriptor of this process
+        self._slot_files = {}
+        self._held_slots = set()
+        self.admitted = 0
+        self.rejected = 0
+        self.timeouts = 0
+    
+    @property
+    def enabled(self):
+        return bool(self.limit or self.node_limit)
+    
+    @contextmanager
+    def admit(self, operation):
+        """
+        Hold a slot for one LDAP operation
+        
+        Raises:
+            LDAPOverloadedError: if the queue is full or no slot freed up in time
+        """
+        if not self.enabled:
+            yield
+            return
+        
+        started = time.monotonic()
+        timeout = self.timeout
+        budget = remaining_budget()
+        if budget is not None:
+            timeout = min(timeout, budget)
+        deadline = started + timeout
+        
+        try:
+            slot = self._acquire(deadline)
+        except LDAPOverloadedError as e:
+            ldap_admission.send(
+                sender=self.__class__, operation=operation,
+                seconds=time.monotonic() - started, outcome=e.outcome
+            )
+            raise
+        ldap_admission.send(
+            sender=self.__class__, operation=operation,
+            seconds=time.monotonic() - started, outcome='admitted'
+        )
+        try:
+            yield
+        finally:
+            self._release(slot)
+    
+    def guard(self, conn):
+        """Route the LDAP operations of a connection through the gate; returns the connection"""
+        for operation in self.OPERATIONS:
+            method = getattr(conn, operation, None)
+            if method is not None:
+                setattr(conn, operation, self._gated(operation, method))
+        return conn
+    
+    def _gated(self, operation, method):
+        def gated(*args, **kwargs):
+            with self.admit(operation):
+                return method(*args, **kwargs)
+        return gated
+    
+    def _acquire(self, deadline):
+        """Take a process slot and, with a node limit, a node slot; returns the node slot"""
+        with self._condition:
+            queued = self._over_limit()
+            if queued:
+                if self._waiting >= self.max_queue:
+                    self.rejected += 1
+                    raise self._overloaded('queue_full', "LDAP admission queue is full")
+                self._waiting += 1
+                self._send_state()
+                try:
+                    while self._over_limit():
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self.timeouts += 1
+                            raise self._overloaded('timeout', "Timed out waiting for an LDAP admission slot")
+                        self._condition.wait(remaining)
+                finally:
+                    self._waiting -= 1
+            self._active += 1
+            self.admitted += 1
+            self._send_state()
+        
+        try:
+            return self._acquire_node_slot(deadline)
+        except LDAPOverloadedError:
+            self._release(None)
+            raise
+    
+    def _over_limit(self):
+        return bool(self.limit) and self._active >= self.limit
+    
+    def _acquire_node_slot(self, deadline):
+        if not self.node_limit:
+            return None
+        
+        queued = False
+        try:
+            while True:
+                with self._condition:
+                    slot = self._try_node_slot()
+                    if slot is not None:
+                        return slot
+                    if not queued:
+                        queued = True
+                        self._waiting += 1
+                        self._send_state()
+                    if time.monotonic() >= deadline:
+                        self.timeouts += 1
+                        raise self._overloaded('timeout', "Timed out waiting for a node-wide LDAP admission slot")
+                time.sleep(self.NODE_POLL_INTERVAL)
+        finally:
+            if queued:
+                with self._condition:
+                    self._waiting -= 1
+                    self._send_state()
+    
+    def _try_node_slot(self):
+        """Lock a free node slot without blocking; returns its number or None"""
+        self._reset_after_fork()
+        for slot in range(self.node_limit):
+            if slot in self._held_slots:
+                continue
+            if slot not in self._slot_files:
+                os.makedirs(self.lock_dir, exist_ok=True)
+                path = os.path.join(self.lock_dir, f'ldap_slot_{slot}.lock')
+                self._slot_files[slot] = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(self._slot_files[slot], fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                continue
+            self._held_slots.add(slot)
+            return slot
+        return None
+    
+    def _release(self, slot):
+        with self._condition:
+            if slot is not None and slot in self._held_slots:
+                fcntl.flock(self._slot_files[slot], fcntl.LOCK_UN)
+                self._held_slots.discard(slot)
+            self._active -= 1
+            self._send_state()
+            self._condition.notify()
+    
+    def _reset_after_fork(self):
+        # Lock files inherited from a parent process share its locks; close
+        # them without unlocking so the parent keeps its slots
+        if os.getpid() != self._pid:
+            for fd in self._slot_files.values():
+                os.close(fd)
+            self._slot_files = {}
+            self._held_slots = set()
+            self._pid = os.getpid()
+    
+    def _overloaded(self, outcome, message):
+        error = LDAPOverloadedError(message)
+        error.outcome = outcome
+        return error
+    
+    def _send_state(self):
+        # Called with the lock held, so receivers see the changes in order
+        ldap_admission_state.send(sender=self.__class__, active=self._active, waiting=self._waiting)
+    
+    def stats(self):
+        with self._condition:
+            return {
+                'limit': self.limit,
+                'node_limit': self.node_limit,
+                'active': self._active,
+                'waiting': self._waiting,
+                'admitted': self.admitted,
+                'rejected': self.rejected,
+                'timeouts': self.timeouts,
+            }
+
+
+class DomainControllerPool:
+    """
+    The domain controllers to use and the order in which to try them
+    
+    candidates() lists the servers for the next connection: healthy ones
+    first, ordered by the strategy ('first': as configured, 'round_robin':
+    rotating, 'latency': lowest measured bind latency first, unmeasured
+    servers before measured ones), followed by quarantined ones as a last
+    resort. A server that fails with a connection error is quarantined for
+    `quarantine` seconds.
+    """
+    
+    FIRST = 'first'
+    ROUND_ROBIN = 'round_robin'
+    LATENCY = 'latency'
+    STRATEGIES = (FIRST, ROUND_ROBIN, LATENCY)
+    
+    # Weight of the newest sample in the moving average of bind latency
+    LATENCY_WEIGHT = 0.3
+    
+    def __init__(self, servers, strategy=FIRST, quarantine=60):
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Unknown DC selection strategy {strategy!r}, expected one of {self.STRATEGIES}")
+        self.servers = list(servers)
+        self.strategy = strategy
+        self.quarantine = quarantine
+        self._lock = threading.Lock()
+        self._next = 0
+        self._stats = {
+            self.server_name(server): {
+                'connections': 0, 'failures': 0, 'latency': None, 'quarantined_until': 0
+            }
+            for server in self.servers
+        }
+    
+    @staticmethod
+    def server_name(server):
+        return str(getattr(server, 'host', server))
+    
+    def candidates(self):
+        """Return the servers in the order a new connection should try them"""
+        now = time.monotonic()
+        with self._lock:
+            servers = self.servers
+            if self.strategy == self.ROUND_ROBIN:
+                start = self._next % len(servers)
+                servers = servers[start:] + servers[:start]
+                self._next += 1
+            elif self.strategy == self.LATENCY:
+                servers = sorted(servers, key=lambda server: self._stats[self.server_name(server)]['latency'] or 0)
+            
+            healthy = [server for server in servers if self._stats[self.server_name(server)]['quarantined_until'] <= now]
+            quarantined = sorted(
+                (server for server in servers if server not in healthy),
+                key=lambda server: self._stats[self.server_name(server)]['quarantined_until']
+            )
+        return healthy + quarantined
+    
+    def record_success(self, server, seconds=None):
+        """A connection to `server` was opened, in `seconds` if measured"""
+        with self._lock:
+            stats = self._stats.get(self.server_name(server))
+            if stats is None:
+                return
+            stats['connections'] += 1
+            stats['quarantined_until'] = 0
+            if seconds is not None:
+                if stats['latency'] is None:
+                    stats['latency'] = seconds
+                else:
+                    stats['latency'] += self.LATENCY_WEIGHT * (seconds - stats['latency'])
+            latency = stats['latency']
+        domain_controller_recorded.send(
+            sender=self.__class__, server=self.server_name(server), failed=False,
+            latency=latency, quarantined_until=0
+        )
+    
+    def record_failure(self, server):
+        """`server` failed with a connection error: take it out of rotation"""
+        name = self.server_name(server)
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                return
+            stats['failures'] += 1
+            stats['quarantined_until'] = time.monotonic() + self.quarantine
+            latency = stats['latency']
+        domain_controller_recorded.send(
+            sender=self.__class__, server=name, failed=True,
+            latency=latency, quarantined_until=time.time() + self.quarantine
+        )
+        logger.warning(f"Domain controller {name} unreachable, skipping it for {self.quarantine}s")
+    
+    def stats(self):
+        """
+        Return per-server stats
+        
+        Returns:
+            dict: {host: {'connections', 'failures', 'latency_ms', 'quarantined', 'quarantined_for'}}
+        """
+        now = time.monotonic()
+        with self._lock:
+            return {
+                name: {
+                    'connections': stats['connections'],
+                    'failures': stats['failures'],
+                    'latency_ms': None if stats['latency'] is None else stats['latency'] * 1000,
+                    'quarantined': stats['quarantined_until'] > now,
+                    'quarantined_for': max(0, stats['quarantined_until'] - now),
+                }
+                for name, stats in self._stats.items()
+            }
+
+
+class HedgedReads:
+    """
+    Send a slow read-only operation to a second server and take the first answer
+    
+    run() starts the primary call in a worker thread. If it has not returned
+    after the `percentile` of the operation's recent latencies (at least
+    `min_delay`; `initial_delay` until `min_samples` are collected), the
+    hedge call is started as well and whichever succeeds first wins. The
+    loser finishes in the background.
+    """
+    
+    def __init__(self, percentile=95, min_delay=0.05, initial_delay=0.5, window=200, min_samples=20,
+                 max_workers=32):
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.initial_delay = initial_delay
+        self.window = window
+        self.min_samples = min_samples
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._samples = {}
+        self._executor = None
+        self.fired = 0
+        self.won = 0
+    
+    def delay(self, operation):
+        """Seconds to wait for the primary before hedging `operation`"""
+        with self._lock:
+            samples = sorted(self._samples.get(operation, ()))
+        if len(samples) < self.min_samples:
+            return max(self.min_delay, self.initial_delay)
+        index = min(len(samples) - 1, int(len(samples) * self.percentile / 100))
+        return max(self.min_delay, samples[index])
+    
+    def observe(self, operation, seconds):
+        with self._lock:
+            samples = self._samples.get(operation)
+            if samples is None:
+                samples = self._samples[operation] = deque(maxlen=self.window)
+            samples.append(seconds)
+    
+    def run(self, operation, primary, hedge, can_hedge=None):
+        """
+        Return primary(), or hedge() if that answers first once the delay has passed
+        
+        When `can_hedge` is given and returns False once the delay has passed,
+        no hedge is sent and the primary's answer is awaited.
+        
+        Raises:
+            The primary's exception if it fails before the delay, otherwise the
+            first exception when both fail
+        """
+        started = time.monotonic()
+        first = self._submit(primary)
+        first.add_done_callback(lambda future: self.observe(operation, time.monotonic() - started))
+        try:
+            return first.result(timeout=self.delay(operation))
+        except FutureTimeoutError:
+            if first.done():
+                # The primary itself raised a TimeoutError
+                raise
+        if can_hedge is not None and not can_hedge():
+            return first.result()
+        
+        pending = {first: 'primary', self._submit(hedge): 'hedge'}
+        with self._lock:
+            self.fired += 1
+        error = None
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                winner = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    error = error or e
+                    continue
+                if winner == 'hedge':
+                    with self._lock:
+                        self.won += 1
+                hedged_read.send(sender=self.__class__, operation=operation, winner=winner)
+                return result
+        raise error
+    
+    def _submit(self, call):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='ldap-hedge')
+        # Each call runs in its own copy of the caller's context (request deadline)
+        return self._executor.submit(copy_context().run, call)
+    
+    def stats(self):
+        """Return how often hedges fired and won, and the current delays"""
+        with self._lock:
+            operations = list(self._samples)
+            stats = {'fired': self.fired, 'won': self.won}
+        stats['delays'] = {operation: self.delay(operation) for operation in operations}
+        return stats
+
 
 class LDAPService:
     """
@@ -21,140 +1254,540 @@ class LDAPService:
         self.server_port = settings.AD_PORT
         self.base_dn = settings.AD_BASE_DN
         self.use_ssl = settings.AD_USE_SSL
-        self.server = None
+        self.dc_pool = None
         self.connection = None
+        self.stats = ldap_stats
+        self.breaker = CircuitBreaker(
+            failure_threshold=settings.AD_BREAKER_FAILURES,
+            reset_timeout=settings.AD_BREAKER_RESET_TIMEOUT
+        )
+        self.gate = AdmissionGate(
+            limit=settings.AD_MAX_CONCURRENT,
+            node_limit=settings.AD_NODE_MAX_CONCURRENT,
+            max_queue=settings.AD_ADMISSION_QUEUE,
+            timeout=settings.AD_ADMISSION_TIMEOUT,
+            lock_dir=settings.AD_ADMISSION_LOCK_DIR
+        )
+        self.hedger = HedgedReads(
+            percentile=settings.AD_HEDGE_PERCENTILE,
+            min_delay=settings.AD_HEDGE_MIN_DELAY,
+            initial_delay=settings.AD_HEDGE_INITIAL_DELAY
+        )
+        self.pool = LDAPConnectionPool(
+            self._open_service_connection,
+            size=settings.AD_POOL_SIZE,
+            max_idle=settings.AD_POOL_MAX_IDLE,
+            ping_after=settings.AD_POOL_PING_AFTER,
+            timeout=settings.AD_POOL_TIMEOUT
+        )
+        # Open connections that only verify user credentials (see authenticate_user)
+        self.auth_pool = LDAPConnectionPool(
+            self._open_auth_connection,
+            size=settings.AD_AUTH_POOL_SIZE,
+            max_idle=settings.AD_POOL_MAX_IDLE,
+            ping_after=settings.AD_POOL_PING_AFTER,
+            timeout=settings.AD_POOL_TIMEOUT,
+            require_bound=False
+        )
+        # User records keyed by lowercased sAMAccountName
+        self.user_cache = TTLCache(
+            maxsize=settings.AD_USER_CACHE_SIZE,
+            ttl=settings.AD_USER_CACHE_TTL,
+            negative_ttl=settings.AD_USER_CACHE_NEGATIVE_TTL,
+            name='ldap_users',
+            generation_key=USER_CACHE_GENERATION_KEY
+        )
+        self.ou_cache = OUTreeCache(
+            load=lambda: self._with_service_connection(self._load_ous_on),
+            has_changed=lambda usn, server: self._with_service_connection(
+                lambda conn: self._ous_changed_on(conn, usn, server)
+            ),
+            ttl=settings.AD_OU_CACHE_TTL,
+            max_age=settings.AD_OU_CACHE_MAX_AGE,
+            background=settings.AD_OU_CACHE_BACKGROUND
+        )
     
-    def get_server(self):
-        """Get LDAP server instance"""
-        if not self.server:
-            self.server = Server(
-                self.server_address,
-                port=self.server_port,
-                use_ssl=self.use_ssl,
-                get_info=ALL
+    def _instrument(self, conn):
+        """
+        Time a new connection's operations and route them through the circuit
+        breaker and the admission gate; none is started once the request
+        deadline has passed
+        """
+        # The gate is outermost, so operations it turns away neither count
+        # for the breaker nor show up as LDAP latency
+        conn = self.gate.guard(self.breaker.guard(ldap_stats.instrument(conn)))
+        for operation in LDAPOperationStats.OPERATIONS:
+            method = getattr(conn, operation, None)
+            if method is not None:
+                setattr(conn, operation, self._within_deadline(method))
+        return conn
+    
+    @staticmethod
+    def _within_deadline(method):
+        def checked(*args, **kwargs):
+            check_deadline()
+            return method(*args, **kwargs)
+        return checked
+    
+    def is_available(self):
+        """
+        False while the circuit breaker fails calls fast, i.e. AD calls
+        would not be attempted
+        """
+        return not self.breaker.is_open
+    
+    def get_dc_pool(self):
+        """
+        Get the pool of domain controllers (AD_SERVERS)
+        
+        How server and schema info are obtained depends on AD_SERVER_INFO:
+        'all' downloads them on the first bind to each DC, 'cached' loads
+        them from AD_SERVER_INFO_DIR (falling back to 'none' when the files
+        are missing) and 'none' works without them. The DCs of one domain
+        share the schema, so the cached info is attached to all of them.
+        """
+        if not self.dc_pool:
+            hosts = settings.AD_SERVERS or [self.server_address]
+            cached_info = self._load_cached_info() if settings.AD_SERVER_INFO == 'cached' else None
+            servers = []
+            for host in hosts:
+                if cached_info:
+                    # get_info=NONE so binding does not download the info again
+                    # (Server.from_definition keeps ALL and would re-read it on bind)
+                    server = self._new_server(NONE, host)
+                    server.attach_dsa_info(cached_info[0])
+                    server.attach_schema_info(cached_info[1])
+                else:
+                    server = self._new_server(ALL if settings.AD_SERVER_INFO == 'all' else NONE, host)
+                servers.append(server)
+            self.dc_pool = DomainControllerPool(
+                servers,
+                strategy=settings.AD_SERVER_STRATEGY,
+                quarantine=settings.AD_SERVER_QUARANTINE
             )
-        return self.server
+        return self.dc_pool
+    
+    def get_server(self):
+        """Get the first configured domain controller's Server instance"""
+        return self.get_dc_pool().servers[0]
+    
+    def _new_server(self, get_info, host=None):
+        """Create a Server for a DC (defaults to AD_SERVER)"""
+        return Server(
+            host or self.server_address,
+            port=self.server_port,
+            use_ssl=self.use_ssl,
+            get_info=get_info,
+            connect_timeout=settings.AD_CONNECT_TIMEOUT or None
+        )
+    
+    def _load_cached_info(self):
+        """Load the persisted (DsaInfo, SchemaInfo), or None"""
+        directory = settings.AD_SERVER_INFO_DIR
+        try:
+            dsa_info = DsaInfo.from_file(os.path.join(directory, DSA_INFO_FILE))
+            schema_info = SchemaInfo.from_file(os.path.join(directory, SCHEMA_INFO_FILE))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Cached AD server info not available in {directory}, continuing without it: {str(e)}")
+            return None
+        return dsa_info, schema_info
+    
+    def save_server_info(self, directory=None):
+        """
+        Download the DSA and schema info and store them for AD_SERVER_INFO='cached'
+        
+        Args:
+            directory: Target directory (defaults to AD_SERVER_INFO_DIR)
+            
+        Returns:
+            tuple: (success: bool, message: str)
+        """
+        directory = directory or settings.AD_SERVER_INFO_DIR
+        server = self._new_server(ALL)
+        
+        success, conn, error = self.bind_with_credentials(
+            settings.AD_BIND_USER, settings.AD_BIND_PASSWORD, server=server
+        )
+        if not success:
+            return False, f"Could not bind service account: {error}"
+        
+        try:
+            if not server.info or not server.schema:
+                return False, "The server did not return its DSA or schema info"
+            
+            os.makedirs(directory, exist_ok=True)
+            for info, name in ((server.info, DSA_INFO_FILE), (server.schema, SCHEMA_INFO_FILE)):
+                # Write next to the target and swap it in, so running workers
+                # never read a half-written file
+                target = os.path.join(directory, name)
+                info.to_file(f"{target}.tmp")
+                os.replace(f"{target}.tmp", target)
+        except OSError as e:
+            return False, f"Could not write server info: {str(e)}"
+        finally:
+            conn.unbind()
+        
+        return True, f"Saved server info of {self.server_address} to {directory}"
+    
+    def bind_with_credentials(self, username, password, server=None):
+        """
+        Bind to LDAP server with user credentials
+        
+        Without an explicit server the domain controllers are tried in the
+        order of DomainControllerPool.candidates(); one that cannot be
+        reached is quarantined and the next one is tried.
+        
+        Args:
+            username: AD username (sAMAccountName)
+            password: User password
+            server: Server to bind to (defaults to the DC pool)
+            
+        Returns:
+            tuple: (success: bool, connection: Connection or None, error_message: str or None)
+        """
+        dc_pool = self.get_dc_pool()
+        servers = [server] if server else dc_pool.candidates()
+        error = None
+        
+        for server in servers:
+            try:
+                # Format username for AD binding (AD_USER_FORMAT, e.g. DOMAIN\{username} or {username}@domain)
+                user_dn = settings.AD_USER_FORMAT.format(username=username)
+                
+                conn = self._instrument(Connection(
+                    server,
+                    user=user_dn,
+                    password=password,
+                    receive_timeout=settings.AD_RECEIVE_TIMEOUT or None
+                ))
+                
+                # A single bind; the connection is opened by it
+                started = time.perf_counter()
+                bound = conn.bind()
+                dc_pool.record_success(server, time.perf_counter() - started)
+                if bound:
+                    logger.info(f"Successfully authenticated user: {username}")
+                    return True, conn, None
+                else:
+                    conn.unbind()
+                    logger.warning(f"Failed to authenticate user: {username}")
+                    return False, None, INVALID_CREDENTIALS
+                    
+            except CONNECTION_ERRORS as e:
+                # Try the next domain controller
+                dc_pool.record_failure(server)
+                logger.error(f"LDAP connection error for user {username} on {dc_pool.server_name(server)}: {str(e)}")
+                error = f"LDAP error: {str(e)}"
+            except LDAPBindError as e:
+                logger.error(f"LDAP bind error for user {username}: {str(e)}")
+                return False, None, INVALID_CREDENTIALS
+            except LDAPServiceError as e:
+                # Circuit breaker open or request deadline passed
+                logger.warning(f"Not binding {username}: {str(e)}")
+                return False, None, str(e)
+            except LDAPException as e:
+                logger.error(f"LDAP exception for user {username}: {str(e)}")
+                return False, None, f"LDAP error: {str(e)}"
+            except Exception as e:
+                logger.error(f"Unexpected error during bind for user {username}: {str(e)}")
+                return False, None, f"Authentication error: {str(e)}"
+        
+        return False, None, error
+    
+    @timed_operation
+    def authenticate_user(self, username, password, dn=None, guid=None):
+        """
+        Verify a user's credentials and read their AD attributes
+        
+        With AD_AUTH_POOL_SIZE set, the password is checked with a rebind on
+        an already open connection from the authentication pool, so a login
+        skips the TCP/TLS handshake (see _authenticate_pooled). Otherwise a
+        new connection is bound as the user.
+        
+        The attributes are read right after the bind on the same connection
+        and with the user's own credentials, so when the DN or objectGUID is
+        known a login costs a single base-scope read on top of the bind. The
+        result refreshes the user cache.
+        
+        Args:
+            username: AD username (sAMAccountName)
+            password: User password
+            dn, guid: Known AD location of the user (optional, see search_user)
+            
+        Returns:
+            tuple: (success: bool, user_data: dict or None, error_message: str or None)
+        """
+        if settings.AD_AUTH_POOL_SIZE > 0:
+            result = self._authenticate_pooled(username, password, dn=dn, guid=guid)
+            if result is not None:
+                return result
+        
+        success, conn, error = self.bind_with_credentials(username, password)
+        if not success:
+            return False, None, error
+        
+        try:
+            user_data = self._search_user_on(conn, username, dn=dn, guid=guid)
+        except LDAPException as e:
+            logger.error(f"LDAP error reading {username} after bind: {str(e)}")
+            return False, None, f"LDAP error: {str(e)}"
+        finally:
+            conn.unbind()
+        
+        return self._login_result(username, user_data)
     
-    def bind_with_credentials(self, username, password):
+    def _authenticate_pooled(self, username, password, dn=None, guid=None):
         """
-        Bind to LDAP server with user credentials
+        Verify credentials with a rebind on a pooled authentication connection
+        
+        A connection in AD fast bind mode (AD_AUTH_FAST_BIND) only checks the
+        password and stays anonymous, so the attributes come from the user
+        cache or a service account lookup instead; with a warm cache the
+        login is a single bind round trip.
         
-        Args:
-            username: AD username (sAMAccountName)
-            password: User password
-            
         Returns:
-            tuple: (success: bool, connection: Connection or None, error_message: str or None)
+            tuple: Like authenticate_user(), or None if no pooled connection
+            could be used and the login should bind a new connection
         """
         try:
-            # Format username for AD binding
-            # Try different formats: DOMAIN\username or username@domain
-            user_dn = f"EISSA\\{username}"
-            
-            server = self.get_server()
-            conn = Connection(
-                server,
-                user=user_dn,
-                password=password,
-                auto_bind=True
-            )
+            conn = self.auth_pool.acquire(timeout=remaining_budget())
+        except LDAPException as e:
+            logger.info(f"No pooled authentication connection for {username}: {str(e)}")
+            return None
+        
+        discard = False
+        try:
+            user_dn = settings.AD_USER_FORMAT.format(username=username)
+            if not conn.rebind(user_dn, password, read_server_info=False):
+                logger.warning(f"Failed to authenticate user: {username}")
+                return False, None, INVALID_CREDENTIALS
             
-            if conn.bind():
-                logger.info(f"Successfully authenticated user: {username}")
-                return True, conn, None
+            logger.info(f"Successfully authenticated user: {username}")
+            if getattr(conn, 'fast_bind', False):
+                user_data = self.search_user(username, dn=dn, guid=guid)
             else:
-                logger.warning(f"Failed to authenticate user: {username}")
-                return False, None, "Invalid credentials"
-                
-        except LDAPBindError as e:
-            logger.error(f"LDAP bind error for user {username}: {str(e)}")
-            return False, None, "Invalid username or password"
+                user_data = self._search_user_on(conn, username, dn=dn, guid=guid)
+        except (LDAPBindError,) + CONNECTION_ERRORS as e:
+            # E.g. the DC closed the idle socket; bind a new connection instead
+            discard = True
+            logger.info(f"Pooled authentication connection failed for {username}, reconnecting: {str(e)}")
+            return None
+        except LDAPServiceError as e:
+            # Circuit breaker open or request deadline passed
+            logger.warning(f"Not binding {username}: {str(e)}")
+            return False, None, str(e)
         except LDAPException as e:
-            logger.error(f"LDAP exception for user {username}: {str(e)}")
+            discard = True
+            logger.error(f"LDAP error authenticating {username}: {str(e)}")
             return False, None, f"LDAP error: {str(e)}"
-        except Exception as e:
-            logger.error(f"Unexpected error during bind for user {username}: {str(e)}")
-            return False, None, f"Authentication error: {str(e)}"
+        finally:
+            self.auth_pool.release(conn, discard=discard)
+        
+        return self._login_result(username, user_data)
+    
+    def _login_result(self, username, user_data):
+        """authenticate_user() result for a user whose password was accepted"""
+        if not user_data:
+            logger.warning(f"User {username} bound but could not be read from AD")
+            return False, None, "User not found in AD"
+        
+        if not user_data.get('from_cache'):
+            self.user_cache.set(username.lower(), user_data)
+        return True, user_data, None
+    
+    def _open_auth_connection(self):
+        """Open an unbound connection to the first reachable DC (authentication pool factory)"""
+        check_deadline()
+        self.breaker.check()
+        
+        dc_pool = self.get_dc_pool()
+        error = None
+        for server in dc_pool.candidates():
+            conn = self._instrument(Connection(server, receive_timeout=settings.AD_RECEIVE_TIMEOUT or None))
+            try:
+                started = time.perf_counter()
+                conn.open(read_server_info=False)
+                dc_pool.record_success(server, time.perf_counter() - started)
+            except CONNECTION_ERRORS as e:
+                dc_pool.record_failure(server)
+                error = e
+                continue
+            conn.fast_bind = settings.AD_AUTH_FAST_BIND and self._enable_fast_bind(conn)
+            return conn
+        raise LDAPServiceError(f"Could not connect to a domain controller: {error}")
+    
+    def _enable_fast_bind(self, conn):
+        """Switch an unbound connection to AD fast concurrent bind mode; returns True on success"""
+        try:
+            with ldap_stats.timer('fast_bind', ldap_stats.server_name(conn)):
+                enabled = conn.extended(FAST_BIND_OID)
+        except LDAPException as e:
+            enabled = False
+            conn.result = {'description': str(e)}
+        if not enabled:
+            logger.warning(
+                f"{ldap_stats.server_name(conn)} refused fast bind mode, verifying passwords with "
+                f"regular binds: {(conn.result or {}).get('description')}"
+            )
+        return bool(enabled)
+    
+    def _open_service_connection(self):
+        """Open a new connection bound as the service account (pool factory)"""
+        admin_user = settings.AD_BIND_USER
+        admin_password = settings.AD_BIND_PASSWORD
+        
+        if not admin_user or not admin_password:
+            raise LDAPServiceError("No admin credentials configured")
+        
+        success, conn, error = self.bind_with_credentials(admin_user, admin_password)
+        if not success or not conn:
+            raise LDAPServiceError(f"Could not bind service account: {error}")
+        return conn
     
-    def search_user(self, username, connection=None):
+    @contextmanager
+    def service_connection(self):
+        """
+        Borrow a pooled service account connection
+        
+        The connection goes back to the pool afterwards, unless the socket
+        failed, in which case it is discarded.
+        """
+        conn = self.pool.acquire(timeout=remaining_budget())
+        discard = False
+        try:
+            yield conn
+        except CONNECTION_ERRORS:
+            discard = True
+            self.get_dc_pool().record_failure(conn.server)
+            raise
+        finally:
+            self.pool.release(conn, discard=discard)
+    
+    def _memoized(self, key, compute):
+        """Return compute() once per request scope for the same key"""
+        memo = _request_memo.get()
+        if memo is None:
+            return compute()
+        if key not in memo:
+            memo[key] = compute()
+        return copy.copy(memo[key])
+    
+    def _forget(self, key):
+        memo = _request_memo.get()
+        if memo is not None:
+            memo.pop(key, None)
+    
+    def _with_service_connection(self, operation, connection=None):
+        """
+        Run operation(conn) on the given connection or on a pooled one
+        
+        A pooled connection that turns out to be dead (e.g. closed by the DC
+        while idle) is discarded and the operation retried once on a new one.
+        """
+        if connection is not None:
+            return operation(connection)
+        
+        # Fail fast rather than wait for a pooled connection
+        check_deadline()
+        self.breaker.check()
+        try:
+            with self.service_connection() as conn:
+                return operation(conn)
+        except CONNECTION_ERRORS as e:
+            logger.warning(f"Pooled LDAP connection failed, reconnecting: {str(e)}")
+        
+        with self.service_connection() as conn:
+            return operation(conn)
+    
+    def _read(self, name, operation, connection=None):
+        """
+        Run a read-only operation(conn) like _with_service_connection
+        
+        With AD_HEDGE_READS on and more than one DC configured, a primary that
+        is slower than usual is hedged: the same operation is sent to another
+        DC over a fresh service account connection and the first answer wins.
+        """
+        if connection is not None or not settings.AD_HEDGE_READS or len(self.get_dc_pool().servers) < 2:
+            return self._with_service_connection(operation, connection)
+        
+        # Servers of the pooled connections the primary borrowed (a retry borrows a second one)
+        primary_servers = []
+        
+        def primary():
+            def run(conn):
+                primary_servers.append(conn.server)
+                return operation(conn)
+            return self._with_service_connection(run)
+        
+        def excluded():
+            # Still waiting for a pooled connection: that will most likely be on the first DC
+            return primary_servers or self.get_dc_pool().servers[:1]
+        
+        def can_hedge():
+            return any(server not in excluded() for server in self.get_dc_pool().servers)
+        
+        def hedge():
+            others = [server for server in self.get_dc_pool().candidates() if server not in excluded()]
+            if not others:
+                raise LDAPServiceError("No other domain controller to hedge the read to")
+            success, conn, error = self.bind_with_credentials(
+                settings.AD_BIND_USER, settings.AD_BIND_PASSWORD, server=others[0]
+            )
+            if not success:
+                raise LDAPServiceError(f"Could not bind service account for a hedged read: {error}")
+            try:
+                return operation(conn)
+            finally:
+                conn.unbind()
+        
+        return self.hedger.run(name, primary, hedge, can_hedge)
+    
+    @timed_operation
+    def search_user(self, username, connection=None, dn=None, guid=None):
         """
         Search for user in Active Directory
         
+        Lookups without a connection are memoized for the current request
+        and served from the user cache when possible; every successful
+        lookup refreshes the cache.
+        
+        When the user's objectGUID or last known DN is passed, the user is
+        read with a base-scope search on that object; the subtree search by
+        sAMAccountName is only the fallback (e.g. after a move).
+        
         Args:
             username: AD username (sAMAccountName)
             connection: Existing LDAP connection (optional)
+            dn: Last known distinguishedName (optional)
+            guid: objectGUID as a UUID string (optional)
             
         Returns:
-            dict: User attributes or None if not found
+            dict: User attributes or None if not found; 'from_cache' is
+            True when they were served from the user cache
         """
+        if connection is None:
+            return self._memoized(
+                ('user', username.lower()),
+                lambda: self._lookup_user(username, dn=dn, guid=guid)
+            )
+        return self._lookup_user(username, connection, dn=dn, guid=guid)
+    
+    def _lookup_user(self, username, connection=None, dn=None, guid=None):
+        cache_key = username.lower()
+        if connection is None:
+            cached = self.user_cache.get(cache_key)
+            if cached is not TTLCache.MISSING:
+                # Marked so it is not written back over the Employee's stored location
+                return dict(cached, from_cache=True) if cached else None
+        
         try:
-            # Use provided connection or create admin connection
-            conn = connection
-            close_after = False
-            
-            if not conn:
-                # Use admin bind credentials if available
-                admin_user = settings.AD_BIND_USER
-                admin_password = settings.AD_BIND_PASSWORD
-                
-                if admin_user and admin_password:
-                    _, conn, _ = self.bind_with_credentials(admin_user, admin_password)
-                    close_after = True
-                else:
-                    logger.error("No connection provided and no admin credentials configured")
-                    return None
-            
-            if not conn:
-                return None
-            
-            # Search for user
-            search_filter = f'(sAMAccountName={username})'
-            attributes = [
-                'cn', 'sAMAccountName', 'mail', 'telephoneNumber',
-                'displayName', 'givenName', 'sn', 'distinguishedName',
-                'memberOf', 'userPrincipalName', 'department', 'title'
-            ]
-            
-            conn.search(
-                search_base=self.base_dn,
-                search_filter=search_filter,
-                search_scope=SUBTREE,
-                attributes=attributes
+            user_data = self._read(
+                'search_user',
+                lambda conn: self._search_user_on(conn, username, dn=dn, guid=guid),
+                connection
             )
-            
-            if conn.entries:
-                entry = conn.entries[0]
-                user_data = {
-                    'username': str(entry.sAMAccountName) if hasattr(entry, 'sAMAccountName') else username,
-                    'email': str(entry.mail) if hasattr(entry, 'mail') else '',
-                    'phone': str(entry.telephoneNumber) if hasattr(entry, 'telephoneNumber') else '',
-                    'display_name': str(entry.displayName) if hasattr(entry, 'displayName') else '',
-                    'first_name': str(entry.givenName) if hasattr(entry, 'givenName') else '',
-                    'last_name': str(entry.sn) if hasattr(entry, 'sn') else '',
-                    'dn': str(entry.distinguishedName) if hasattr(entry, 'distinguishedName') else '',
-                    'upn': str(entry.userPrincipalName) if hasattr(entry, 'userPrincipalName') else '',
-                    'department': str(entry.department) if hasattr(entry, 'department') else '',
-                    'title': str(entry.title) if hasattr(entry, 'title') else '',
-                }
-                
-                # Extract OU from DN
-                if user_data['dn']:
-                    user_data['ou'] = self.extract_ou_from_dn(user_data['dn'])
-                else:
-                    user_data['ou'] = ''
-                
-                logger.info(f"Found user in AD: {username}")
-                
-                if close_after:
-                    conn.unbind()
-                
-                return user_data
-            else:
-                logger.warning(f"User not found in AD: {username}")
-                if close_after and conn:
-                    conn.unbind()
-                return None
-                
+            self.user_cache.set(cache_key, user_data)
+            return dict(user_data) if user_data else None
         except LDAPException as e:
             logger.error(f"LDAP error during user search for {username}: {str(e)}")
             return None
@@ -162,6 +1795,253 @@ class LDAPService:
             logger.error(f"Unexpected error during user search for {username}: {str(e)}")
             return None
     
+    def _search_user_on(self, conn, username, dn=None, guid=None):
+        """Search for a user on an already bound connection"""
+        # Read the known object directly; AD resolves <GUID=...> wherever
+        # the object lives now, a DN only while the user has not moved
+        bases = []
+        if guid:
+            bases.append(f'<GUID={guid}>')
+        if dn:
+            bases.append(dn)
+        
+        for base in bases:
+            conn.search(
+                search_base=base,
+                search_filter='(objectClass=user)',
+                search_scope=BASE,
+                attributes=USER_ATTRIBUTES
+            )
+            if conn.entries:
+                user_data = self._entry_to_user_data(conn.entries[0], username)
+                if user_data['username'].lower() == username.lower():
+                    logger.info(f"Found user in AD: {username}")
+                    return user_data
+        
+        if bases:
+            logger.info(f"Known AD location of {username} is stale, searching by username")
+        
+        search_filter = f'(sAMAccountName={username})'
+        
+        conn.search(
+            search_base=self.base_dn,
+            search_filter=search_filter,
+            search_scope=SUBTREE,
+            attributes=USER_ATTRIBUTES
+        )
+        
+        if not conn.entries:
+            logger.warning(f"User not found in AD: {username}")
+            return None
+        
+        user_data = self._entry_to_user_data(conn.entries[0], username)
+        logger.info(f"Found user in AD: {username}")
+        return user_data
+    
+    def _entry_to_user_data(self, entry, username):
+        """Convert a user search entry to the dict returned by search_user"""
+        user_data = {
+            'username': str(entry.sAMAccountName) if hasattr(entry, 'sAMAccountName') else username,
+            'email': str(entry.mail) if hasattr(entry, 'mail') else '',
+            'phone': str(entry.telephoneNumber) if hasattr(entry, 'telephoneNumber') else '',
+            'display_name': str(entry.displayName) if hasattr(entry, 'displayName') else '',
+            'first_name': str(entry.givenName) if hasattr(entry, 'givenName') else '',
+            'last_name': str(entry.sn) if hasattr(entry, 'sn') else '',
+            'dn': str(entry.distinguishedName) if hasattr(entry, 'distinguishedName') else '',
+            'upn': str(entry.userPrincipalName) if hasattr(entry, 'userPrincipalName') else '',
+            'department': str(entry.department) if hasattr(entry, 'department') else '',
+            'title': str(entry.title) if hasattr(entry, 'title') else '',
+            'guid': self.parse_guid(entry.objectGUID.raw_values[0]) if hasattr(entry, 'objectGUID') and entry.objectGUID.raw_values else '',
+        }
+        
+        # Extract OU from DN
+        if user_data['dn']:
+            user_data['ou'] = self.extract_ou_from_dn(user_data['dn'])
+        else:
+            user_data['ou'] = ''
+        
+        return user_data
+    
+    @timed_operation
+    def search_users(self, usernames, attributes=None, connection=None):
+        """
+        Look up many users with OR-filtered searches
+        
+        Usernames are resolved in chunks of AD_SEARCH_BATCH_SIZE per search so
+        the filter stays within the DC's request size limits. Full records
+        (default attributes, no connection given) go through the user cache.
+        
+        Args:
+            usernames: Iterable of AD usernames (sAMAccountName)
+            attributes: LDAP attributes to read (defaults to USER_ATTRIBUTES)
+            connection: Existing LDAP connection (optional)
+            
+        Returns:
+            dict: {lowercased username: user data dict}; users not found in AD
+            are missing from the result
+        """
+        names = sorted({name for name in usernames if name}, key=str.lower)
+        use_cache = attributes is None and connection is None
+        found = {}
+        
+        if use_cache:
+            missing = []
+            for name in names:
+                cached = self.user_cache.get(name.lower())
+                if cached is TTLCache.MISSING:
+                    missing.append(name)
+                elif cached:
+                    found[name.lower()] = dict(cached, from_cache=True)
+            names = missing
+        
+        if not names:
+            return found
+        
+        attributes = list(attributes or USER_ATTRIBUTES)
+        if 'sAMAccountName' not in attributes:
+            attributes.append('sAMAccountName')
+        batch_size = max(1, settings.AD_SEARCH_BATCH_SIZE)
+        
+        def search(conn):
+            found = {}
+            for start in range(0, len(names), batch_size):
+                chunk = names[start:start + batch_size]
+                search_filter = '(|{})'.format(''.join(
+                    f'(sAMAccountName={escape_filter_chars(name)})' for name in chunk
+                ))
+                conn.search(
+                    search_base=self.base_dn,
+                    search_filter=search_filter,
+                    search_scope=SUBTREE,
+                    attributes=attributes
+                )
+                for entry in conn.entries:
+                    user_data = self._entry_to_user_data(entry, '')
+                    if user_data['username']:
+                        found[user_data['username'].lower()] = user_data
+            return found
+        
+        try:
+            results = self._with_service_connection(search, connection)
+        except LDAPException as e:
+            logger.error(f"LDAP error during batched user search: {str(e)}")
+            return found
+        except Exception as e:
+            logger.error(f"Unexpected error during batched user search: {str(e)}")
+            return found
+        
+        logger.info(f"Found {len(results)} of {len(names)} users in AD")
+        if use_cache:
+            for name in names:
+                self.user_cache.set(name.lower(), results.get(name.lower()))
+        found.update(results)
+        return found
+    
+    def iter_search(self, search_filter, attributes, page_size=None, search_base=None,
+                    search_scope=SUBTREE, connection=None):
+        """
+        Stream search results page by page with the simple paged results control
+        
+        Only one page (at most AD_PAGE_SIZE entries) is held in memory at a
+        time, so directory-wide searches are not cut off at the DC's
+        MaxPageSize and do not grow with the size of the directory. A pooled
+        connection is held until the generator is exhausted or closed.
+        
+        Args:
+            search_filter: LDAP filter
+            attributes: LDAP attributes to read
+            page_size: Entries per page (defaults to AD_PAGE_SIZE)
+            search_base: Base DN (defaults to AD_BASE_DN)
+            search_scope: Search scope (defaults to SUBTREE)
+            connection: Existing LDAP connection (optional)
+            
+        Yields:
+            dict: {'dn': entry DN, 'attributes': {attribute name: value(s)},
+                   'raw_attributes': {attribute name: [bytes]}}
+        """
+        page_size = page_size or settings.AD_PAGE_SIZE
+        search_base = search_base or self.base_dn
+        
+        if connection is not None:
+            yield from self._iter_search_on(
+                connection, search_base, search_filter, search_scope, attributes, page_size
+            )
+            return
+        
+        with self.service_connection() as conn:
+            yield from self._iter_search_on(
+                conn, search_base, search_filter, search_scope, attributes, page_size
+            )
+    
+    def _iter_search_on(self, conn, search_base, search_filter, search_scope, attributes, page_size):
+        cookie = None
+        try:
+            while True:
+                conn.search(
+                    search_base=search_base,
+                    search_filter=search_filter,
+                    search_scope=search_scope,
+                    attributes=attributes,
+                    paged_size=page_size,
+                    paged_cookie=cookie
+                )
+                for item in conn.response or []:
+                    if item.get('type') == 'searchResEntry':
+                        yield {
+                            'dn': item['dn'],
+                            'attributes': item['attributes'],
+                            'raw_attributes': item.get('raw_attributes', {})
+                        }
+                
+                cookie = (conn.result or {}).get('controls', {}).get(
+                    PAGED_RESULTS_OID, {}
+                ).get('value', {}).get('cookie')
+                if not cookie:
+                    break
+        finally:
+            if cookie:
+                # Stopped before the last page: release the server-side paging state
+                try:
+                    conn.search(
+                        search_base=search_base,
+                        search_filter=search_filter,
+                        search_scope=search_scope,
+                        attributes=['1.1'],
+                        paged_size=0,
+                        paged_cookie=cookie
+                    )
+                except LDAPException:
+                    pass
+    
+    @staticmethod
+    def parse_guid(value):
+        """
+        Convert an objectGUID value to its canonical UUID string
+        
+        Accepts the raw 16-byte (little-endian) value or an already formatted
+        string such as '{7b95f0d5-a3ed-486c-919c-077b8c9731f2}'.
+        """
+        try:
+            if isinstance(value, bytes) and len(value) == 16:
+                return str(uuid.UUID(bytes_le=value))
+            if isinstance(value, str):
+                return str(uuid.UUID(value.strip('{}')))
+        except ValueError:
+            pass
+        return ''
+    
+    @staticmethod
+    def first_value(attributes, name):
+        """Return the first value of an attribute from a search record as a string"""
+        value = attributes.get(name)
+        if isinstance(value, (list, tuple)):
+            value = value[0] if value else None
+        if value is None:
+            return ''
+        if isinstance(value, bytes):
+            return value.decode('utf-8', 'replace')
+        return str(value)
+    
     def extract_ou_from_dn(self, dn):
         """
         Extract Organizational Unit from Distinguished Name
@@ -180,7 +2060,8 @@ class LDAPService:
             logger.error(f"Error extracting OU from DN {dn}: {str(e)}")
             return ''
     
-    def get_user_ou_info(self, username):
+    @timed_operation
+    def get_user_ou_info(self, username, dn=None, guid=None):
         """
         Get complete OU information for a user
         
@@ -191,6 +2072,8 @@ class LDAPService:
         
         Args:
             username: AD username (sAMAccountName)
+            dn: Last known distinguishedName (optional, see search_user)
+            guid: objectGUID as a UUID string (optional, see search_user)
             
         Returns:
             dict: {
@@ -202,45 +2085,49 @@ class LDAPService:
             or None if user not found
         """
         try:
-            user_data = self.search_user(username)
+            user_data = self.search_user(username, dn=dn, guid=guid)
             
             if not user_data or not user_data.get('dn'):
                 logger.warning(f"Could not get OU info for user {username}: User not found")
                 return None
             
-            dn = user_data['dn']
-            
-            # Extract OU path (e.g., "projects/New")
-            ou_path = self.extract_ou_from_dn(dn)
-            
-            # Extract immediate OU name (first OU in the hierarchy)
-            parts = dn.split(',')
-            ou_name = ''
-            ou_dn = ''
-            
-            for i, part in enumerate(parts):
-                if part.strip().startswith('OU='):
-                    if not ou_name:
-                        # This is the immediate OU
-                        ou_name = part.split('=')[1]
-                    # Build the OU DN from this point onwards
-                    ou_dn = ','.join(parts[i:])
-                    break
-            
-            result = {
-                'dn': dn,
-                'ou_path': ou_path,
-                'ou_name': ou_name,
-                'ou_dn': ou_dn
-            }
+            result = self._build_ou_info(user_data['dn'])
+            result['guid'] = user_data.get('guid', '')
+            result['from_cache'] = user_data.get('from_cache', False)
             
-            logger.info(f"Retrieved OU info for user {username}: {ou_path}")
+            logger.info(f"Retrieved OU info for user {username}: {result['ou_path']}")
             return result
             
         except Exception as e:
             logger.error(f"Error getting OU info for user {username}: {str(e)}")
             return None
     
+    def _build_ou_info(self, dn):
+        """Build the OU info dict for a user DN"""
+        # Extract OU path (e.g., "projects/New")
+        ou_path = self.extract_ou_from_dn(dn)
+        
+        # Extract immediate OU name (first OU in the hierarchy)
+        parts = dn.split(',')
+        ou_name = ''
+        ou_dn = ''
+        
+        for i, part in enumerate(parts):
+            if part.strip().startswith('OU='):
+                if not ou_name:
+                    # This is the immediate OU
+                    ou_name = part.split('=')[1]
+                # Build the OU DN from this point onwards
+                ou_dn = ','.join(parts[i:])
+                break
+        
+        return {
+            'dn': dn,
+            'ou_path': ou_path,
+            'ou_name': ou_name,
+            'ou_dn': ou_dn
+        }
+    
     def move_user_to_ou(self, username, new_ou, connection=None):
         """
         Move user to a different Organizational Unit (Phase 2)
@@ -253,60 +2140,171 @@ class LDAPService:
         Returns:
             tuple: (success: bool, error_message: str or None)
         """
+        result = self.move_user(username, new_ou, connection)
+        if result['already_in_ou']:
+            return True, None
+        return result['success'], result['error']
+    
+    @timed_operation
+    def move_user(self, username, new_ou, connection=None, dn=None, guid=None):
+        """
+        Move a user to another OU on a single connection
+        
+        The user's DN comes from the user cache when it is warm (otherwise
+        one search on the same connection), and the new DN is derived from
+        the modify_dn request instead of being searched for again. The cache
+        entry is updated in place with the new DN. If the cached DN turns out
+        to be stale, the user is looked up again and the move retried once.
+        
+        Args:
+            username: AD username
+            new_ou: Target OU DN
+            connection: Existing LDAP connection (optional)
+            dn, guid: Known AD location of the user (optional, see search_user)
+            
+        Returns:
+            dict: {
+                'success': bool,
+                'error': error message or None,
+                'already_in_ou': True if the user was already in new_ou,
+                'old_dn', 'new_dn': user DN before and after the move,
+                'old_ou_path', 'new_ou_path': parsed OU paths
+            }
+        """
+        result = {
+            'success': False,
+            'error': None,
+            'already_in_ou': False,
+            'old_dn': '',
+            'new_dn': '',
+            'old_ou_path': '',
+            'new_ou_path': self.extract_ou_from_dn(new_ou),
+        }
+        
         try:
-            # Get current user DN
-            user_data = self.search_user(username, connection)
+            return self._with_service_connection(
+                lambda conn: self._move_user_on(conn, username, new_ou, result, dn, guid),
+                connection
+            )
+        except LDAPException as e:
+            logger.error(f"LDAP error during user move for {username}: {str(e)}")
+            result['error'] = f"LDAP error: {str(e)}"
+        except Exception as e:
+            logger.error(f"Unexpected error during user move for {username}: {str(e)}")
+            result['error'] = f"Error: {str(e)}"
+        return result
+    
+    def _move_user_on(self, conn, username, new_ou, result, dn=None, guid=None):
+        """Look up and move a user on one bound connection"""
+        cache_key = username.lower()
+        cached = self.user_cache.get(cache_key)
+        user_data = None if cached is TTLCache.MISSING or not cached else dict(cached)
+        from_cache = bool(user_data and user_data.get('dn'))
+        
+        while True:
+            if not from_cache:
+                user_data = self._search_user_on(conn, username, dn=dn, guid=guid)
             if not user_data or not user_data.get('dn'):
-                return False, "User not found in AD"
+                result['error'] = "User not found in AD"
+                return result
             
             old_dn = user_data['dn']
+            rdns = to_dn(old_dn)
+            result['old_dn'] = old_dn
+            result['old_ou_path'] = self.extract_ou_from_dn(old_dn)
             
-            # Extract CN from old DN
-            cn = old_dn.split(',')[0]
-            
-            # Use provided connection or create admin connection
-            conn = connection
-            close_after = False
-            
-            if not conn:
-                admin_user = settings.AD_BIND_USER
-                admin_password = settings.AD_BIND_PASSWORD
-                
-                if admin_user and admin_password:
-                    _, conn, _ = self.bind_with_credentials(admin_user, admin_password)
-                    close_after = True
-                else:
-                    return False, "No admin credentials configured"
+            if ','.join(rdns[1:]).lower() == new_ou.lower():
+                result['already_in_ou'] = True
+                result['new_dn'] = old_dn
+                return result
             
-            if not conn:
-                return False, "Could not establish LDAP connection"
+            # Move user, keeping its RDN (CN=...)
+            if conn.modify_dn(old_dn, rdns[0], new_superior=new_ou):
+                break
             
-            # Move user
-            success = conn.modify_dn(old_dn, cn, new_superior=new_ou)
+            if from_cache and conn.result.get('result') == RESULT_NO_SUCH_OBJECT:
+                # Moved or renamed behind our back: look it up again and retry
+                self.user_cache.invalidate(cache_key)
+                from_cache = False
+                continue
             
-            if close_after:
-                conn.unbind()
+            logger.error(f"Failed to move user {username}: {conn.result}")
+            result['error'] = f"Move failed: {conn.result}"
+            return result
+        
+        new_dn = f"{rdns[0]},{new_ou}"
+        user_data['dn'] = new_dn
+        user_data['ou'] = self.extract_ou_from_dn(new_dn)
+        self.user_cache.broadcast_invalidation(cache_key)
+        self.user_cache.set(cache_key, user_data)
+        self._forget(('user', cache_key))
+        
+        result['success'] = True
+        result['new_dn'] = new_dn
+        logger.info(f"Successfully moved user {username} from {old_dn} to {new_ou}")
+        return result
+    
+    @timed_operation
+    def move_users(self, usernames, new_ou, max_workers=None):
+        """
+        Move many users to one OU with bounded concurrency
+        
+        All user DNs are resolved up front with one batched search (which
+        warms the user cache), then the modify_dn requests run on up to
+        `max_workers` pooled connections at once. The worker threads do not
+        inherit the request deadline, so a started bulk move is not cut short.
+        
+        Args:
+            usernames: AD usernames to move
+            new_ou: Target OU DN
+            max_workers: Concurrent moves (defaults to AD_BULK_MOVE_CONCURRENCY,
+                capped at the connection pool size)
             
-            if success:
-                logger.info(f"Successfully moved user {username} from {old_dn} to {new_ou}")
-                return True, None
-            else:
-                logger.error(f"Failed to move user {username}: {conn.result}")
-                return False, f"Move failed: {conn.result}"
-                
-        except LDAPException as e:
-            logger.error(f"LDAP error during user move for {username}: {str(e)}")
-            return False, f"LDAP error: {str(e)}"
+        Returns:
+            list: move_user() result dicts with an added 'username' key,
+            in the same order as `usernames`
+        """
+        usernames = list(usernames)
+        if not usernames:
+            return []
+        
+        self.search_users(usernames)
+        
+        workers = max_workers or settings.AD_BULK_MOVE_CONCURRENCY
+        workers = max(1, min(workers, self.pool.size, len(usernames)))
+        
+        def move(username):
+            result = self.move_user(username, new_ou)
+            result['username'] = username
+            return result
+        
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ou-move') as executor:
+            return list(executor.map(move, usernames))
+    
+    def find_ou(self, name=None, dn=None):
+        """
+        Look up one OU by name or DN in the cached OU index
+        
+        Returns:
+            dict: OU info as listed by get_all_ous, or None if not found
+        """
+        try:
+            return self.ou_cache.find(dn=dn, name=name)
         except Exception as e:
-            logger.error(f"Unexpected error during user move for {username}: {str(e)}")
-            return False, f"Error: {str(e)}"
+            logger.error(f"Error looking up OU {name or dn}: {str(e)}")
+            return None
     
+    @timed_operation
     def get_all_ous(self):
         """
         Task 12: List Available OUs
         
         Query Active Directory for all Organizational Units
         
+        The list is memoized for the current request and served from the
+        process-level OU cache, which only re-reads it from AD when an OU
+        changed (see OUTreeCache).
+        
         Returns:
             list: List of dicts with OU information:
                 [{
@@ -317,70 +2315,85 @@ class LDAPService:
             
             or empty list if none found or error
         """
+        return self._memoized(('ous',), self._list_ous)
+    
+    def _list_ous(self):
         try:
-            # Get or create privileged connection
-            admin_user = settings.AD_BIND_USER
-            admin_password = settings.AD_BIND_PASSWORD
-            
-            if not admin_user or not admin_password:
-                logger.warning("No admin credentials configured for OU listing")
-                return []
-            
-            success, conn, error = self.bind_with_credentials(admin_user, admin_password)
-            
-            if not conn or not success:
-                logger.error(f"Failed to bind for OU listing: {error}")
-                return []
-            
+            return list(self.ou_cache.get())
+        except LDAPException as e:
+            logger.error(f"Error searching for OUs: {str(e)}")
+            return []
+        except Exception as e:
+            logger.error(f"Unexpected error during OU listing: {str(e)}")
+            return []
+    
+    def _search_ous_on(self, conn):
+        """
+        List all organizational units on a bound connection
+        
+        Returns:
+            tuple: (sorted list of OU dicts, highest uSNChanged among them)
+        """
+        ous = []
+        highest_usn = 0
+        
+        # Search for all organizational units
+        records = self.iter_search(
+            '(objectClass=organizationalUnit)',
+            ['ou', 'uSNChanged'],
+            connection=conn
+        )
+        
+        for record in records:
             try:
-                # Search for all organizational units
-                search_filter = '(objectClass=organizationalUnit)'
-                attributes = ['ou', 'distinguishedName']
-                
-                conn.search(
-                    search_base=self.base_dn,
-                    search_filter=search_filter,
-                    search_scope=SUBTREE,
-                    attributes=attributes
-                )
-                
-                ous = []
+                attributes = record['attributes']
+                usn = self.first_value(attributes, 'uSNChanged')
+                if usn:
+                    highest_usn = max(highest_usn, int(usn))
                 
-                for entry in conn.entries:
-                    try:
-                        ou_name = str(entry.ou[0]) if hasattr(entry, 'ou') and entry.ou else ''
-                        dn = str(entry.distinguishedName) if hasattr(entry, 'distinguishedName') else ''
-                        
-                        if ou_name and dn:
-                            ou_path = self.extract_ou_from_dn(dn)
-                            
-                            ou_info = {
-                                'name': ou_name,
-                                'dn': dn,
-                                'path': ou_path
-                            }
-                            
-                            ous.append(ou_info)
-                    except Exception as e:
-                        logger.warning(f"Error processing OU entry: {str(e)}")
-                        continue
-                
-                conn.unbind()
-                
-                # Sort by name for better display
-                ous.sort(key=lambda x: x['name'])
-                
-                logger.info(f"Retrieved {len(ous)} OUs from AD")
-                return ous
+                ou_name = self.first_value(attributes, 'ou')
+                dn = record['dn']
                 
+                if ou_name and dn:
+                    ou_info = {
+                        'name': ou_name,
+                        'dn': dn,
+                        'path': self.extract_ou_from_dn(dn)
+                    }
+                    
+                    ous.append(ou_info)
             except Exception as e:
-                logger.error(f"Error searching for OUs: {str(e)}")
-                conn.unbind()
-                return []
-                
-        except Exception as e:
-            logger.error(f"Unexpected error during OU listing: {str(e)}")
-            return []
+                logger.warning(f"Error processing OU entry: {str(e)}")
+                continue
+        
+        # Sort by name for better display
+        ous.sort(key=lambda x: x['name'])
+        
+        logger.info(f"Retrieved {len(ous)} OUs from AD")
+        return ous, highest_usn
+    
+    def _load_ous_on(self, conn):
+        """List all OUs for the OU cache: (ous, highest uSNChanged, server it is local to)"""
+        ous, highest_usn = self._search_ous_on(conn)
+        return ous, highest_usn, DomainControllerPool.server_name(conn.server)
+    
+    def _ous_changed_on(self, conn, highest_usn, server):
+        """
+        Check whether any OU was created or modified after highest_usn, read
+        from `server`; on another DC the USNs are not comparable and the OU
+        list has to be re-read
+        """
+        if DomainControllerPool.server_name(conn.server) != server:
+            logger.info(f"OU watermark is from {server}, re-reading the OUs on {conn.server}")
+            return True
+        conn.search(
+            search_base=self.base_dn,
+            search_filter=f'(&(objectClass=organizationalUnit)(uSNChanged>={highest_usn + 1}))',
+            search_scope=SUBTREE,
+            attributes=['1.1'],
+            size_limit=1
+        )
+        return bool(conn.entries)
     
     def test_connection(self):
         """
@@ -392,7 +2405,9 @@ class LDAPService:
         try:
             server = self.get_server()
             # Try anonymous bind just to test connection
-            conn = Connection(server, auto_bind=True)
+            conn = self._instrument(Connection(server, receive_timeout=settings.AD_RECEIVE_TIMEOUT or None))
+            if not conn.bind():
+                return False, f"Connection failed: {conn.result.get('description')}"
             conn.unbind()
             return True, f"Successfully connected to {self.server_address}:{self.server_port}"
         except Exception as e:
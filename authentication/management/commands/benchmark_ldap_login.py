@@ -0,0 +1,195 @@
+"""
+Measure login throughput of LDAPAuthenticationBackend against a simulated DC
+"""
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from ldap3 import Server, Connection, MOCK_SYNC, OFFLINE_AD_2012_R2
+from unittest.mock import patch
+from datetime import date
+from Employee.models import Employee
+from authentication.backends import LDAPAuthenticationBackend
+from authentication.eligibility import eligible_usernames
+from authentication.ldap_service import ldap_service, DomainControllerPool, LDAPConnectionPool, FAST_BIND_OID
+import statistics
+import time
+
+BASE_DN = 'DC=bench,DC=local'
+USER_FORMAT = 'CN={username},OU=Bench,' + BASE_DN
+PASSWORD = 'Bench_password_123'
+SERVICE_ACCOUNT = 'bench.service'
+
+# Login modes: AD_AUTH_POOL_SIZE and AD_AUTH_FAST_BIND
+MODES = {
+    'direct': (0, False),
+    'rebind': (5, False),
+    'fast_bind': (5, True),
+}
+
+
+class SimulatedDC:
+    """
+    In-memory directory (ldap3 MOCK_SYNC) that sleeps `latency` seconds per
+    LDAP round trip (bind, search, unbind, extended operation) and
+    `connect_latency` seconds per new socket (TCP and TLS handshake)
+    """
+    
+    def __init__(self, users, latency, connect_latency):
+        self.latency = latency
+        self.connect_latency = connect_latency
+        self.round_trips = 0
+        self.connects = 0
+        self.server = Server('simulated-dc', get_info=OFFLINE_AD_2012_R2)
+        
+        seed = Connection(self.server, client_strategy=MOCK_SYNC)
+        for username in list(users) + [SERVICE_ACCOUNT]:
+            dn = USER_FORMAT.format(username=username)
+            seed.strategy.add_entry(dn, {
+                'objectClass': 'user',
+                'objectCategory': 'person',
+                'sAMAccountName': username,
+                'distinguishedName': dn,
+                'mail': f'{username}@bench.local',
+                'givenName': 'Bench',
+                'sn': username,
+                'userPassword': PASSWORD,
+            })
+    
+    def connection(self, server, **kwargs):
+        """Drop-in for ldap3.Connection bound to the simulated directory"""
+        conn = Connection(self.server, client_strategy=MOCK_SYNC, **kwargs)
+        for name in ('bind', 'search', 'unbind'):
+            setattr(conn, name, self._delayed(getattr(conn, name)))
+        conn.open = self._connecting(conn.open)
+        conn.extended = self._delayed(self._fast_bind(conn.extended))
+        return conn
+    
+    def _connecting(self, open_socket):
+        def wrapper(*args, **kwargs):
+            self.connects += 1
+            time.sleep(self.connect_latency)
+            return open_socket(*args, **kwargs)
+        return wrapper
+    
+    def _fast_bind(self, extended):
+        # The mock strategy does not know the AD fast bind control
+        def wrapper(request_name, *args, **kwargs):
+            if request_name == FAST_BIND_OID:
+                return True
+            return extended(request_name, *args, **kwargs)
+        return wrapper
+    
+    def _delayed(self, operation):
+        def wrapper(*args, **kwargs):
+            self.round_trips += 1
+            time.sleep(self.latency)
+            return operation(*args, **kwargs)
+        return wrapper
+
+
+class Command(BaseCommand):
+    help = (
+        "Log simulated employees in through LDAPAuthenticationBackend against an in-memory "
+        "DC with a configurable per-request latency and report logins per second. "
+        "Database changes are rolled back"
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50, help='Simulated employees')
+        parser.add_argument('--rounds', type=int, default=3, help='Logins per employee')
+        parser.add_argument('--latency', type=float, default=5, help='Milliseconds per LDAP round trip')
+        parser.add_argument(
+            '--connect-latency', type=float, default=15,
+            help='Milliseconds to open a connection (TCP and TLS handshake)'
+        )
+        parser.add_argument(
+            '--modes', default=','.join(MODES),
+            help='Comma-separated login modes to compare: direct (new connection per login), '
+                 'rebind (pooled connections) and fast_bind (pooled, AD fast bind)'
+        )
+    
+    def handle(self, *args, **options):
+        usernames = [f'bench.user{i}' for i in range(options['users'])]
+        dc = SimulatedDC(usernames, options['latency'] / 1000, options['connect_latency'] / 1000)
+        backend = LDAPAuthenticationBackend()
+        
+        with transaction.atomic(), \
+                override_settings(
+                    AD_USER_FORMAT=USER_FORMAT, AD_BASE_DN=BASE_DN,
+                    AD_BIND_USER=SERVICE_ACCOUNT, AD_BIND_PASSWORD=PASSWORD
+                ), \
+                patch('authentication.ldap_service.Connection', dc.connection), \
+                patch.object(ldap_service, 'base_dn', BASE_DN), \
+                patch.object(ldap_service, 'dc_pool', DomainControllerPool([dc.server])):
+            Employee.objects.bulk_create([
+                Employee(
+                    ad_username=username,
+                    first_name_en='Bench',
+                    last_name_en=username,
+                    first_name_ar='Bench',
+                    last_name_ar=username,
+                    job_title='Benchmark',
+                    department='IT',
+                    hire_date=date(2024, 1, 1),
+                    national_id=f'{90000000000000 + i}',
+                )
+                for i, username in enumerate(usernames)
+            ])
+            # bulk_create sends no post_save signals
+            eligible_usernames.invalidate()
+            
+            for mode in options['modes'].split(','):
+                self.run_mode(mode.strip(), options['rounds'], backend, dc, usernames)
+            
+            # Leave no benchmark data behind
+            transaction.set_rollback(True)
+        eligible_usernames.invalidate()
+    
+    def run_mode(self, mode, rounds, backend, dc, usernames):
+        """Run all rounds with fresh connection pools and caches in one login mode"""
+        pool_size, fast_bind = MODES[mode]
+        auth_pool = LDAPConnectionPool(ldap_service._open_auth_connection, size=pool_size, require_bound=False)
+        service_pool = LDAPConnectionPool(ldap_service._open_service_connection)
+        ldap_service.user_cache.clear()
+        
+        with override_settings(AD_AUTH_POOL_SIZE=pool_size, AD_AUTH_FAST_BIND=fast_bind), \
+                patch.object(ldap_service, 'auth_pool', auth_pool), \
+                patch.object(ldap_service, 'pool', service_pool):
+            for round_number in range(rounds):
+                label = 'first login' if round_number == 0 else f'repeat login #{round_number}'
+                self.run_round(f'{mode}: {label}', backend, dc, usernames)
+        auth_pool.clear()
+        service_pool.clear()
+        ldap_service.user_cache.clear()
+    
+    def run_round(self, label, backend, dc, usernames):
+        """Log every user in once and print the throughput"""
+        dc.round_trips = 0
+        dc.connects = 0
+        timings = []
+        failures = 0
+        
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for username in usernames:
+                login_started = time.perf_counter()
+                user = backend.authenticate(None, username=username, password=PASSWORD)
+                timings.append(time.perf_counter() - login_started)
+                if not isinstance(user, User):
+                    failures += 1
+            elapsed = time.perf_counter() - started
+        
+        count = len(usernames)
+        self.stdout.write(self.style.MIGRATE_HEADING(label))
+        self.stdout.write(
+            f"  {count / elapsed:.1f} logins/s, median {statistics.median(timings) * 1000:.1f} ms, "
+            f"max {max(timings) * 1000:.1f} ms"
+        )
+        self.stdout.write(
+            f"  {dc.connects / count:.2f} connects, {dc.round_trips / count:.1f} LDAP round trips and "
+            f"{len(queries.captured_queries) / count:.1f} SQL queries per login"
+        )
+        if failures:
+            self.stdout.write(self.style.ERROR(f"  {failures} logins failed"))
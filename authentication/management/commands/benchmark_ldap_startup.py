@@ -0,0 +1,94 @@
+"""
+Measure time-to-first-LDAP-result of freshly started worker processes
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from ldap3 import BASE
+from authentication.ldap_service import ldap_service
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+class Command(BaseCommand):
+    help = (
+        "Start several worker processes at once (like a gunicorn restart) and report "
+        "how long each takes to get its first LDAP result, per AD_SERVER_INFO mode"
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Processes started per mode')
+        parser.add_argument(
+            '--modes',
+            default='all,cached,none',
+            help='Comma separated AD_SERVER_INFO modes to compare'
+        )
+        parser.add_argument('--worker', action='store_true', help='Internal: run as one worker')
+    
+    def handle(self, *args, **options):
+        if options['worker']:
+            self.run_worker()
+            return
+        
+        for mode in [m.strip() for m in options['modes'].split(',') if m.strip()]:
+            self.benchmark_mode(mode, options['workers'])
+    
+    def run_worker(self):
+        """Open a service connection and read the base DN, printing the timing as JSON"""
+        result = {'mode': settings.AD_SERVER_INFO, 'ok': False, 'error': None}
+        started = time.perf_counter()
+        try:
+            with ldap_service.service_connection() as conn:
+                conn.search(
+                    search_base=ldap_service.base_dn,
+                    search_filter='(objectClass=*)',
+                    search_scope=BASE,
+                    attributes=['1.1']
+                )
+                result['ok'] = bool(conn.entries)
+        except Exception as e:
+            result['error'] = str(e)
+        result['ldap_seconds'] = time.perf_counter() - started
+        self.stdout.write(json.dumps(result))
+    
+    def benchmark_mode(self, mode, workers):
+        """Start the workers for one mode concurrently and summarize their timings"""
+        env = dict(os.environ, AD_SERVER_INFO=mode)
+        command = [sys.executable, str(settings.BASE_DIR / 'manage.py'), 'benchmark_ldap_startup', '--worker']
+        
+        started = time.perf_counter()
+        processes = [
+            subprocess.Popen(command, env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+            for _ in range(workers)
+        ]
+        
+        ldap_times = []
+        total_times = []
+        errors = []
+        for process in processes:
+            output, _ = process.communicate()
+            total_times.append(time.perf_counter() - started)
+            try:
+                result = json.loads(output.strip().splitlines()[-1])
+            except (ValueError, IndexError):
+                errors.append(f"worker exited with code {process.returncode}")
+                continue
+            if result['ok']:
+                ldap_times.append(result['ldap_seconds'])
+            else:
+                errors.append(result['error'] or 'base DN not found')
+        
+        self.stdout.write(self.style.MIGRATE_HEADING(f"AD_SERVER_INFO={mode} ({workers} workers)"))
+        if ldap_times:
+            self.stdout.write(
+                f"  first LDAP result: min {min(ldap_times) * 1000:.0f} ms, "
+                f"median {statistics.median(ldap_times) * 1000:.0f} ms, "
+                f"max {max(ldap_times) * 1000:.0f} ms"
+            )
+        self.stdout.write(f"  all workers done after {max(total_times) * 1000:.0f} ms (including interpreter and Django startup)")
+        for error in errors:
+            self.stdout.write(self.style.ERROR(f"  {error}"))
@@ -0,0 +1,26 @@
+"""
+Show the failed AD bind counters shared by all workers
+"""
+
+from django.core.management.base import BaseCommand
+from authentication.throttle import bind_failures
+import json
+
+
+class Command(BaseCommand):
+    help = "Show failed AD binds, blocked attempts and lockouts in the current throttling window"
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--json', action='store_true', help='Print the metrics as JSON')
+    
+    def handle(self, *args, **options):
+        metrics = bind_failures.metrics()
+        if options['json']:
+            self.stdout.write(json.dumps(metrics))
+            return
+        
+        self.stdout.write(
+            f"Last {metrics['window_seconds']}s (current {metrics['bucket_seconds']}s bucket in brackets):"
+        )
+        for name in bind_failures.METRICS:
+            self.stdout.write(f"  {name}: {metrics[name]} [{metrics[name + '_current_bucket']}]")
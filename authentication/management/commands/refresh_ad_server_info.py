@@ -0,0 +1,23 @@
+"""
+Download the AD server and schema info used when AD_SERVER_INFO='cached'
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from authentication.ldap_service import ldap_service
+
+
+class Command(BaseCommand):
+    help = "Download the DSA and schema info of the AD server to AD_SERVER_INFO_DIR"
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dir',
+            dest='directory',
+            help='Directory to write the info files to (defaults to AD_SERVER_INFO_DIR)'
+        )
+    
+    def handle(self, *args, **options):
+        success, message = ldap_service.save_server_info(options['directory'])
+        if not success:
+            raise CommandError(message)
+        self.stdout.write(self.style.SUCCESS(message))
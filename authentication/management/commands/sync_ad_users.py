@@ -0,0 +1,36 @@
+"""
+Mirror AD user attributes into the local database
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from authentication.ad_sync import ADSyncEngine
+from ldap3.core.exceptions import LDAPException
+
+
+class Command(BaseCommand):
+    help = (
+        "Sync AD users into the local mirror table. Only users changed since the "
+        "last run (by uSNChanged) are read, unless --full is given"
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Re-read every user and remove records of users no longer in AD'
+        )
+        parser.add_argument('--batch-size', type=int, help='Rows per bulk upsert (defaults to AD_SYNC_BATCH_SIZE)')
+    
+    def handle(self, *args, **options):
+        engine = ADSyncEngine(batch_size=options['batch_size'])
+        try:
+            stats = engine.run(full=options['full'])
+        except LDAPException as e:
+            raise CommandError(f"AD sync failed: {str(e)}")
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"{'Full' if stats['full'] else 'Incremental'} sync finished in {stats['seconds']:.2f}s: "
+            f"{stats['seen']} read, {stats['created']} created, {stats['updated']} updated, "
+            f"{stats['deleted']} deleted, {stats['linked']} linked to employees "
+            f"(watermark uSNChanged {stats['highest_usn']})"
+        ))
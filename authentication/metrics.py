@@ -0,0 +1,230 @@
+"""
+Prometheus metrics
+Request, database, LDAP and cache metrics exported on /metrics
+"""
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.dispatch import receiver
+from django.utils import timezone
+from prometheus_client import (
+    CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest, multiprocess
+)
+from prometheus_client.core import GaugeMetricFamily
+from .ldap_service import (
+    LDAPOperationStats, ldap_operation_recorded, cache_lookup, hedged_read, ldap_admission,
+    ldap_admission_state, domain_controller_recorded
+)
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# Session engines whose sessions can be counted in the database
+DB_SESSION_ENGINES = (
+    'django.contrib.sessions.backends.db',
+    'django.contrib.sessions.backends.cached_db',
+)
+
+HTTP_REQUESTS = Counter(
+    'adtask_http_requests_total',
+    'HTTP requests by URL name, method and status code',
+    ['view', 'method', 'status']
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    'adtask_http_request_duration_seconds',
+    'HTTP request latency by URL name',
+    ['view']
+)
+DB_QUERIES = Histogram(
+    'adtask_db_queries_per_request',
+    'Database queries run by one request, by URL name',
+    ['view'],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, float('inf'))
+)
+DB_SECONDS = Histogram(
+    'adtask_db_query_seconds_per_request',
+    'Time one request spent in database queries, by URL name',
+    ['view']
+)
+LDAP_OPERATIONS = Counter(
+    'adtask_ldap_operations_total',
+    'LDAP operations by operation, server and outcome (ok, failed, error)',
+    ['operation', 'server', 'outcome']
+)
+LDAP_OPERATION_SECONDS = Histogram(
+    'adtask_ldap_operation_duration_seconds',
+    'LDAP operation latency by operation and server',
+    ['operation', 'server'],
+    buckets=LDAPOperationStats.BUCKETS
+)
+LDAP_HEDGES = Counter(
+    'adtask_ldap_hedged_reads_total',
+    'Reads hedged to a second DC by operation and by which answer won (primary, hedge)',
+    ['operation', 'winner']
+)
+LDAP_DC_CONNECTIONS = Counter(
+    'adtask_ldap_dc_connections_total',
+    'Connections opened to each domain controller',
+    ['server']
+)
+LDAP_DC_FAILURES = Counter(
+    'adtask_ldap_dc_failures_total',
+    'Connection errors per domain controller (each one quarantines the DC in that worker)',
+    ['server']
+)
+# Per-worker state: the most recent value of any live worker
+LDAP_DC_LATENCY = Gauge(
+    'adtask_ldap_dc_latency_seconds',
+    'Moving average of the connect/bind latency per domain controller',
+    ['server'],
+    multiprocess_mode='livemostrecent'
+)
+LDAP_DC_QUARANTINED_UNTIL = Gauge(
+    'adtask_ldap_dc_quarantined_until_seconds',
+    'Unix time until which a worker skips the domain controller (0: healthy)',
+    ['server'],
+    multiprocess_mode='livemax'
+)
+LDAP_ADMISSIONS = Counter(
+    'adtask_ldap_admissions_total',
+    'LDAP operations at the admission gate by operation and outcome (admitted, queue_full, timeout)',
+    ['operation', 'outcome']
+)
+LDAP_ADMISSION_WAIT_SECONDS = Histogram(
+    'adtask_ldap_admission_wait_seconds',
+    'Time LDAP operations waited at the admission gate, by operation',
+    ['operation'],
+    buckets=LDAPOperationStats.BUCKETS
+)
+# Summed over the live workers of the node in multiprocess mode
+LDAP_ADMISSION_ACTIVE = Gauge(
+    'adtask_ldap_operations_in_flight',
+    'LDAP operations admitted and not yet finished',
+    multiprocess_mode='livesum'
+)
+LDAP_ADMISSION_QUEUE = Gauge(
+    'adtask_ldap_admission_queue_depth',
+    'LDAP operations waiting at the admission gate',
+    multiprocess_mode='livesum'
+)
+CACHE_LOOKUPS = Counter(
+    'adtask_cache_lookups_total',
+    'Lookups in the LDAP user, OU and AD profile caches by result (hit, miss)',
+    ['cache', 'result']
+)
+
+
+class QueryTimer:
+    """
+    Database execute wrapper counting the queries of a request and their time
+    (see connection.execute_wrapper)
+    """
+    
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+    
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+def view_label(request):
+    """Return the URL name a request was routed to, e.g. 'admin:Employee_employee_changelist'"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.view_name
+
+
+def observe_request(request, response, seconds, queries):
+    """Record one finished request"""
+    view = view_label(request)
+    HTTP_REQUESTS.labels(view=view, method=request.method, status=response.status_code).inc()
+    HTTP_REQUEST_SECONDS.labels(view=view).observe(seconds)
+    DB_QUERIES.labels(view=view).observe(queries.count)
+    DB_SECONDS.labels(view=view).observe(queries.seconds)
+
+
+@receiver(ldap_operation_recorded)
+def observe_ldap_operation(sender, operation, server, seconds, error, failed, **kwargs):
+    outcome = 'error' if error else 'failed' if failed else 'ok'
+    LDAP_OPERATIONS.labels(operation=operation, server=server, outcome=outcome).inc()
+    LDAP_OPERATION_SECONDS.labels(operation=operation, server=server).observe(seconds)
+
+
+@receiver(hedged_read)
+def observe_hedged_read(sender, operation, winner, **kwargs):
+    LDAP_HEDGES.labels(operation=operation, winner=winner).inc()
+
+
+@receiver(domain_controller_recorded)
+def observe_domain_controller(sender, server, failed, latency, quarantined_until, **kwargs):
+    if failed:
+        LDAP_DC_FAILURES.labels(server=server).inc()
+    else:
+        LDAP_DC_CONNECTIONS.labels(server=server).inc()
+    if latency is not None:
+        LDAP_DC_LATENCY.labels(server=server).set(latency)
+    LDAP_DC_QUARANTINED_UNTIL.labels(server=server).set(quarantined_until)
+
+
+@receiver(ldap_admission)
+def observe_ldap_admission(sender, operation, seconds, outcome, **kwargs):
+    LDAP_ADMISSIONS.labels(operation=operation, outcome=outcome).inc()
+    LDAP_ADMISSION_WAIT_SECONDS.labels(operation=operation).observe(seconds)
+
+
+@receiver(ldap_admission_state)
+def observe_ldap_admission_state(sender, active, waiting, **kwargs):
+    LDAP_ADMISSION_ACTIVE.set(active)
+    LDAP_ADMISSION_QUEUE.set(waiting)
+
+
+@receiver(cache_lookup)
+def observe_cache_lookup(sender, cache, hit, **kwargs):
+    CACHE_LOOKUPS.labels(cache=cache or sender.__name__, result='hit' if hit else 'miss').inc()
+
+
+class ActiveSessionsCollector:
+    """Unexpired sessions, counted in the database at scrape time"""
+    
+    def describe(self):
+        # Lets the registry skip a collect() (and its query) at registration
+        return [GaugeMetricFamily('adtask_active_sessions', 'Unexpired sessions')]
+    
+    def collect(self):
+        if settings.SESSION_ENGINE not in DB_SESSION_ENGINES:
+            return
+        try:
+            count = Session.objects.filter(expire_date__gt=timezone.now()).count()
+        except Exception as e:
+            logger.error(f"Could not count active sessions: {str(e)}")
+            return
+        yield GaugeMetricFamily('adtask_active_sessions', 'Unexpired sessions', value=count)
+
+
+_scrape_registry = CollectorRegistry()
+_scrape_registry.register(ActiveSessionsCollector())
+
+
+def render():
+    """
+    Return all metrics in the Prometheus text format
+    
+    With PROMETHEUS_MULTIPROC_DIR set every gunicorn worker writes its
+    counters to files in that directory and a scrape of any worker reports
+    the sum over all of them, so one scrape covers the whole node.
+    """
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry) + generate_latest(_scrape_registry)
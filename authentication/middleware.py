@@ -0,0 +1,46 @@
+"""
+Authentication Middleware
+"""
+
+from django.conf import settings
+from django.db import connection
+from . import metrics
+from .ldap_service import ldap_request_scope, ldap_deadline
+import time
+
+
+class LDAPRequestScopeMiddleware:
+    """
+    Memoize Active Directory lookups for the duration of each request
+    
+    Views and admin pages that look up the same user or the OU list several
+    times while rendering only pay for one directory round trip. The
+    directory calls of a request also share a time budget of
+    AD_REQUEST_BUDGET seconds (see ldap_deadline).
+    """
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        with ldap_request_scope(), ldap_deadline(settings.AD_REQUEST_BUDGET):
+            return self.get_response(request)
+
+
+class MetricsMiddleware:
+    """
+    Record request count, latency and database usage per URL name
+    
+    Should be first in MIDDLEWARE so the timing covers the whole request.
+    """
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        queries = metrics.QueryTimer()
+        started = time.perf_counter()
+        with connection.execute_wrapper(queries):
+            response = self.get_response(request)
+        metrics.observe_request(request, response, time.perf_counter() - started, queries)
+        return response
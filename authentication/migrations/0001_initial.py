@@ -0,0 +1,59 @@
+# Generated by Django 5.2.11 on 2026-10-16 23:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('Employee', '0003_employee_ad_location'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ADSyncState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('server', models.CharField(max_length=255, unique=True, verbose_name='Domain Controller')),
+                ('highest_usn', models.BigIntegerField(default=0, verbose_name='Highest uSNChanged')),
+                ('last_full_sync', models.DateTimeField(blank=True, null=True)),
+                ('last_sync', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'AD Sync State',
+                'verbose_name_plural': 'AD Sync State',
+                'db_table': 'ad_sync_state',
+            },
+        ),
+        migrations.CreateModel(
+            name='ADUserRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ad_username', models.CharField(max_length=100, unique=True, verbose_name='AD Username (sAMAccountName)')),
+                ('object_guid', models.CharField(blank=True, max_length=36, verbose_name='objectGUID')),
+                ('dn', models.CharField(max_length=512, verbose_name='Distinguished Name')),
+                ('ou_path', models.CharField(blank=True, max_length=255, verbose_name='OU Path')),
+                ('email', models.CharField(blank=True, max_length=255)),
+                ('phone', models.CharField(blank=True, max_length=64)),
+                ('display_name', models.CharField(blank=True, max_length=255)),
+                ('first_name', models.CharField(blank=True, max_length=100)),
+                ('last_name', models.CharField(blank=True, max_length=100)),
+                ('upn', models.CharField(blank=True, max_length=255, verbose_name='User Principal Name')),
+                ('department', models.CharField(blank=True, max_length=100)),
+                ('title', models.CharField(blank=True, max_length=150)),
+                ('usn_changed', models.BigIntegerField(default=0)),
+                ('synced_at', models.DateTimeField(verbose_name='Synced At')),
+                ('employee', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ad_record', to='Employee.employee', verbose_name='Employee')),
+            ],
+            options={
+                'verbose_name': 'AD User Record',
+                'verbose_name_plural': 'AD User Records',
+                'db_table': 'ad_user_records',
+                'ordering': ['ad_username'],
+                'indexes': [models.Index(fields=['ou_path'], name='ad_user_rec_ou_path_99a85d_idx')],
+            },
+        ),
+    ]
@@ -1,3 +1,75 @@
 from django.db import models
+from Employee.models import Employee
 
-# Create your models here.
+
+class ADUserRecord(models.Model):
+    """
+    Local mirror of an Active Directory user account
+    
+    Filled by the AD sync engine (authentication.ad_sync) so pages can read
+    AD attributes from the database instead of querying the DC per request.
+    """
+    
+    # Lowercased sAMAccountName
+    ad_username = models.CharField(max_length=100, unique=True, verbose_name="AD Username (sAMAccountName)")
+    employee = models.OneToOneField(
+        Employee,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='ad_record',
+        verbose_name="Employee"
+    )
+    
+    # Identity and location
+    object_guid = models.CharField(max_length=36, blank=True, verbose_name="objectGUID")
+    dn = models.CharField(max_length=512, verbose_name="Distinguished Name")
+    ou_path = models.CharField(max_length=255, blank=True, verbose_name="OU Path")
+    
+    # Mirrored attributes
+    email = models.CharField(max_length=255, blank=True)
+    phone = models.CharField(max_length=64, blank=True)
+    display_name = models.CharField(max_length=255, blank=True)
+    first_name = models.CharField(max_length=100, blank=True)
+    last_name = models.CharField(max_length=100, blank=True)
+    upn = models.CharField(max_length=255, blank=True, verbose_name="User Principal Name")
+    department = models.CharField(max_length=100, blank=True)
+    title = models.CharField(max_length=150, blank=True)
+    
+    # uSNChanged of the entry when it was last synced
+    usn_changed = models.BigIntegerField(default=0)
+    synced_at = models.DateTimeField(verbose_name="Synced At")
+    
+    class Meta:
+        db_table = 'ad_user_records'
+        verbose_name = 'AD User Record'
+        verbose_name_plural = 'AD User Records'
+        ordering = ['ad_username']
+        indexes = [
+            models.Index(fields=['ou_path']),
+        ]
+    
+    def __str__(self):
+        return f"{self.ad_username} ({self.ou_path or self.dn})"
+
+
+class ADSyncState(models.Model):
+    """
+    High-watermark of the AD sync, per domain controller
+    
+    uSNChanged values are local to the DC that assigned them, so a watermark
+    is only valid against the server it was read from.
+    """
+    
+    server = models.CharField(max_length=255, unique=True, verbose_name="Domain Controller")
+    highest_usn = models.BigIntegerField(default=0, verbose_name="Highest uSNChanged")
+    last_full_sync = models.DateTimeField(null=True, blank=True)
+    last_sync = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'ad_sync_state'
+        verbose_name = 'AD Sync State'
+        verbose_name_plural = 'AD Sync State'
+    
+    def __str__(self):
+        return f"{self.server} @ USN {self.highest_usn}"
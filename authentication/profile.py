@@ -0,0 +1,114 @@
+"""
+AD profile snapshots
+Keeps the AD attributes read at login so pages can render them without LDAP calls
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from .ldap_service import ldap_service, cache_lookup
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class ADProfileSnapshots:
+    """
+    Per-user snapshots of AD profile data in the shared Django cache
+    
+    The login already reads the user's AD attributes; they are stored here
+    (see signals.py) and served until they are AD_PROFILE_MAX_AGE seconds
+    old. A stale snapshot is still served while a background thread reads
+    a fresh copy, so in the common case a page renders without any LDAP
+    call. Callers look the user up inline only when there is no snapshot
+    (e.g. it was evicted).
+    """
+    
+    PREFIX = 'authentication:ad_profile'
+    
+    def __init__(self, max_age=None, background=None, lookup=None):
+        self.max_age = settings.AD_PROFILE_MAX_AGE if max_age is None else max_age
+        self.background = settings.AD_PROFILE_BACKGROUND if background is None else background
+        self.lookup = lookup
+    
+    def store(self, username, ad_data):
+        """
+        Save a snapshot of a user's AD data
+        
+        Returns:
+            dict: The snapshot ({'data', 'fetched_at'}), or None if there was no data
+        """
+        if not ad_data:
+            return None
+        snapshot = {'data': ad_data, 'fetched_at': time.time()}
+        cache.set(self._key(username), snapshot, self._timeout())
+        return snapshot
+    
+    def get(self, username, locator=None):
+        """
+        Return the snapshot of a user's AD data, refreshing it in the background when stale
+        
+        Args:
+            username: AD username
+            locator: Known AD location as returned by Employee.ad_locator() (optional)
+            
+        Returns:
+            dict: AD user data, or None if there is no snapshot
+        """
+        snapshot = self.get_snapshot(username, locator)
+        return snapshot['data'] if snapshot else None
+    
+    def get_snapshot(self, username, locator=None):
+        """
+        Like get(), but return the whole snapshot: {'data': AD user data,
+        'fetched_at': UNIX timestamp of the read}
+        """
+        snapshot = cache.get(self._key(username))
+        cache_lookup.send(sender=self.__class__, cache='ad_profiles', hit=snapshot is not None)
+        if snapshot is None:
+            return None
+        
+        if time.time() - snapshot['fetched_at'] >= self.max_age:
+            # One refresh per stale snapshot across all workers
+            if cache.add(self._key(username, 'refreshing'), True, 60):
+                if self.background:
+                    threading.Thread(
+                        target=self.refresh,
+                        args=(username, locator),
+                        name='ad-profile-refresh',
+                        daemon=True
+                    ).start()
+                else:
+                    self.refresh(username, locator)
+                    return cache.get(self._key(username), snapshot)
+        
+        return snapshot
+    
+    def refresh(self, username, locator=None):
+        """Read a user's AD data and store it as the new snapshot"""
+        lookup = self.lookup or ldap_service.search_user
+        try:
+            ad_data = lookup(username, **(locator or {}))
+            self.store(username, ad_data)
+            return ad_data
+        except Exception as e:
+            logger.error(f"Could not refresh AD profile of {username}: {str(e)}")
+            return None
+        finally:
+            cache.delete(self._key(username, 'refreshing'))
+    
+    def invalidate(self, *usernames):
+        """Drop the snapshots of users (at logout, and after their OU changed)"""
+        cache.delete_many([self._key(username) for username in usernames])
+    
+    def _key(self, username, suffix='data'):
+        return f'{self.PREFIX}:{suffix}:{username.lower()}'
+    
+    def _timeout(self):
+        # Keep a snapshot as long as the session it belongs to can live
+        return max(settings.SESSION_COOKIE_AGE, self.max_age)
+
+
+# Singleton instance
+ad_profiles = ADProfileSnapshots()
@@ -0,0 +1,25 @@
+"""
+Authentication signal handlers
+"""
+
+from django.contrib.auth.signals import user_logged_in
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from Employee.models import Employee
+from .eligibility import eligible_usernames
+from .profile import ad_profiles
+
+
+@receiver(post_save, sender=Employee)
+@receiver(post_delete, sender=Employee)
+def invalidate_eligible_usernames(sender, **kwargs):
+    """Rebuild the login eligibility set after an Employee change"""
+    eligible_usernames.invalidate()
+
+
+@receiver(user_logged_in)
+def snapshot_ad_profile(sender, request, user, **kwargs):
+    """Keep the AD data read during login for the pages that display it"""
+    ad_data = getattr(user, 'ad_data', None)
+    if ad_data:
+        ad_profiles.store(user.username, ad_data)
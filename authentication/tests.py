@@ -3,15 +3,34 @@ Comprehensive Tests for Authentication Flow
 Tests login, LDAP integration, and authentication backend
 """
 
-from django.test import TestCase, Client
+from django.test import TestCase, Client, RequestFactory, override_settings
+from django.core.cache import cache
 from django.contrib.auth.models import User
 from django.urls import reverse
 from Employee.models import Employee
 from authentication.backends import LDAPAuthenticationBackend
-from authentication.ldap_service import ldap_service
+from authentication.ad_sync import ADSyncEngine
+from authentication.eligibility import EligibleUsernames, eligible_usernames
+from authentication.throttle import BindFailureTracker, client_ip
+from authentication.profile import ADProfileSnapshots, ad_profiles
+from authentication.models import ADUserRecord, ADSyncState
+from authentication.ldap_service import (
+    LDAPService, ldap_service, ldap_request_scope, LDAPConnectionPool, LDAPServiceError, TTLCache, OUTreeCache,
+    DSA_INFO_FILE, SCHEMA_INFO_FILE, INVALID_CREDENTIALS, LDAPOperationStats,
+    ldap_stats, CircuitBreaker, LDAPUnavailableError, ldap_deadline, remaining_budget,
+    DomainControllerPool, HedgedReads, FAST_BIND_OID, AdmissionGate, LDAPOverloadedError
+)
 from datetime import date
+from ldap3 import Server, Connection, ALL, NONE, BASE, SUBTREE, MOCK_SYNC, OFFLINE_AD_2012_R2
+from ldap3.core.exceptions import LDAPSocketOpenError, LDAPBindError
 from unittest.mock import patch, MagicMock
 import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +46,10 @@ class LDAPServiceTests(TestCase):
         self.test_username = 'test.user'
         self.test_password = 'test_password_123'
         self.test_domain = 'EISSA'
+        self.ldap_service.user_cache.clear()
+    
+    def tearDown(self):
+        self.ldap_service.user_cache.clear()
     
     @patch('authentication.ldap_service.Connection')
     @patch('authentication.ldap_service.Server')
@@ -96,6 +119,62 @@ class LDAPServiceTests(TestCase):
         self.assertEqual(user_data.get('phone'), '12345')
         logger.info("✅ LDAP search user test passed")
     
+    @override_settings(AD_SEARCH_BATCH_SIZE=2)
+    def test_ldap_search_users_batched(self):
+        """
+        Test batched user lookup with chunked OR filters
+        """
+        mock_entry = MagicMock()
+        mock_entry.sAMAccountName = 'Test.User'
+        mock_entry.distinguishedName = 'CN=Test User,OU=IT,OU=New,DC=eissa,DC=local'
+        
+        mock_conn_instance = MagicMock()
+        mock_conn_instance.entries = [mock_entry]
+        
+        users = self.ldap_service.search_users(
+            ['test.user', 'other.user', 'third*user'],
+            connection=mock_conn_instance
+        )
+        
+        self.assertEqual(mock_conn_instance.search.call_count, 2)
+        filters = [call.kwargs['search_filter'] for call in mock_conn_instance.search.call_args_list]
+        self.assertEqual(filters[0], '(|(sAMAccountName=other.user)(sAMAccountName=test.user))')
+        self.assertEqual(filters[1], '(|(sAMAccountName=third\\2auser))')
+        self.assertEqual(users['test.user']['ou'], 'IT/New')
+        logger.info("✅ LDAP batched user search test passed")
+    
+    def test_ldap_move_users_concurrently(self):
+        """
+        Test that bulk moves prefetch DNs once and keep results in input order
+        """
+        usernames = [f'user.{i}' for i in range(6)]
+        
+        with patch.object(self.ldap_service, 'search_users') as search_users, \
+                patch.object(self.ldap_service, 'move_user', side_effect=lambda name, ou: {'success': True}):
+            results = self.ldap_service.move_users(usernames, 'OU=HR,DC=eissa,DC=local', max_workers=3)
+        
+        search_users.assert_called_once_with(usernames)
+        self.assertEqual([result['username'] for result in results], usernames)
+        logger.info("✅ LDAP bulk move test passed")
+    
+    def test_request_scope_memoizes_lookups(self):
+        """
+        Test that identical lookups within one request scope hit AD once
+        """
+        user_data = {'username': 'test.user', 'dn': 'CN=Test User,OU=IT,OU=New,DC=eissa,DC=local'}
+        
+        with patch.object(self.ldap_service, 'user_cache', TTLCache(maxsize=0)), \
+                patch.object(self.ldap_service, '_with_service_connection', return_value=user_data) as lookup:
+            with ldap_request_scope():
+                self.ldap_service.search_user('test.user')
+                ou_info = self.ldap_service.get_user_ou_info('Test.User')
+            self.assertEqual(lookup.call_count, 1)
+            self.assertEqual(ou_info['ou_path'], 'IT/New')
+            
+            self.ldap_service.search_user('test.user')
+            self.assertEqual(lookup.call_count, 2)
+        logger.info("✅ Request-scoped memoization test passed")
+    
     @patch('authentication.ldap_service.Connection')
     @patch('authentication.ldap_service.Server')
     def test_ldap_connection(self, mock_server, mock_connection):
@@ -112,6 +191,1193 @@ class LDAPServiceTests(TestCase):
         logger.info("✅ LDAP connection test passed")
 
 
+class LDAPConnectionPoolTests(TestCase):
+    """
+    Test pooled service account connections
+    """
+    
+    def make_connection(self):
+        conn = MagicMock()
+        conn.closed = False
+        conn.bound = True
+        return conn
+    
+    def test_connection_is_reused(self):
+        """
+        Test that a released connection is handed out again without a new bind
+        """
+        factory = MagicMock(side_effect=self.make_connection)
+        pool = LDAPConnectionPool(factory, size=2)
+        
+        conn = pool.acquire()
+        pool.release(conn)
+        self.assertIs(pool.acquire(), conn)
+        self.assertEqual(factory.call_count, 1)
+        logger.info("✅ Pool connection reuse test passed")
+    
+    def test_dead_connection_is_replaced(self):
+        """
+        Test that closed or discarded connections are not handed out again
+        """
+        factory = MagicMock(side_effect=self.make_connection)
+        pool = LDAPConnectionPool(factory, size=1)
+        
+        conn = pool.acquire()
+        pool.release(conn)
+        conn.closed = True
+        replacement = pool.acquire()
+        self.assertIsNot(replacement, conn)
+        
+        pool.release(replacement, discard=True)
+        self.assertEqual(pool.stats()['idle'], 0)
+        self.assertEqual(factory.call_count, 2)
+        logger.info("✅ Pool dead connection test passed")
+    
+    def test_idle_connections_are_reaped(self):
+        """
+        Test that connections idle longer than max_idle are closed
+        """
+        factory = MagicMock(side_effect=self.make_connection)
+        pool = LDAPConnectionPool(factory, size=1, max_idle=0)
+        
+        conn = pool.acquire()
+        pool.release(conn)
+        self.assertIsNot(pool.acquire(), conn)
+        conn.unbind.assert_called_once()
+        logger.info("✅ Pool idle reaping test passed")
+    
+    def test_exhausted_pool_times_out(self):
+        """
+        Test that borrowing from a fully used pool fails after the timeout
+        """
+        pool = LDAPConnectionPool(self.make_connection, size=1, timeout=0)
+        pool.acquire()
+        
+        with self.assertRaises(LDAPServiceError):
+            pool.acquire()
+        logger.info("✅ Pool exhaustion test passed")
+
+
+class LDAPPagedSearchTests(TestCase):
+    """
+    Test paged (RFC 2696) streaming searches against an in-memory directory
+    """
+    
+    def setUp(self):
+        server = Server('fake_dc', get_info=OFFLINE_AD_2012_R2)
+        self.conn = Connection(
+            server,
+            user='CN=svc,DC=eissa,DC=local',
+            password='svc_password',
+            client_strategy=MOCK_SYNC
+        )
+        self.conn.strategy.add_entry('CN=svc,DC=eissa,DC=local', {
+            'objectClass': 'user',
+            'userPassword': 'svc_password',
+        })
+        for i in range(7):
+            self.conn.strategy.add_entry(f'OU=Unit{i},OU=New,DC=eissa,DC=local', {
+                'objectClass': 'organizationalUnit',
+                'ou': f'Unit{i}',
+                'uSNChanged': 100 + i,
+            })
+        self.conn.bind()
+    
+    def test_iter_search_walks_all_pages(self):
+        """
+        Test that iter_search follows the paging cookie until the last page
+        """
+        with patch.object(self.conn, 'search', wraps=self.conn.search) as search:
+            records = list(ldap_service.iter_search(
+                '(objectClass=organizationalUnit)',
+                ['ou'],
+                page_size=3,
+                connection=self.conn
+            ))
+        
+        self.assertEqual(len(records), 7)
+        self.assertEqual(search.call_count, 3)
+        self.assertTrue(all(call.kwargs['paged_size'] == 3 for call in search.call_args_list))
+        logger.info("✅ Paged search test passed")
+    
+    @override_settings(AD_PAGE_SIZE=2)
+    def test_ou_listing_uses_paged_search(self):
+        """
+        Test that the OU listing reads every page and tracks the highest uSNChanged
+        """
+        ous, highest_usn = ldap_service._search_ous_on(self.conn)
+        
+        self.assertEqual([ou['name'] for ou in ous], [f'Unit{i}' for i in range(7)])
+        self.assertEqual(ous[0]['path'], 'Unit0/New')
+        self.assertEqual(highest_usn, 106)
+        logger.info("✅ Paged OU listing test passed")
+
+
+class LDAPKnownLocationTests(TestCase):
+    """
+    Test base-scope reads of users whose DN or objectGUID is already known
+    """
+    
+    def setUp(self):
+        server = Server('fake_dc', get_info=OFFLINE_AD_2012_R2)
+        self.conn = Connection(
+            server,
+            user='CN=svc,DC=eissa,DC=local',
+            password='svc_password',
+            client_strategy=MOCK_SYNC
+        )
+        self.conn.strategy.add_entry('CN=svc,DC=eissa,DC=local', {
+            'objectClass': 'user',
+            'userPassword': 'svc_password',
+        })
+        self.conn.strategy.add_entry('CN=John Doe,OU=HR,OU=New,DC=eissa,DC=local', {
+            'objectClass': 'user',
+            'sAMAccountName': 'john.doe',
+            'cn': 'John Doe',
+            'distinguishedName': 'CN=John Doe,OU=HR,OU=New,DC=eissa,DC=local',
+        })
+        self.conn.bind()
+    
+    def test_known_dn_reads_object_directly(self):
+        """
+        Test that a known DN is read with a single base-scope search
+        """
+        with patch.object(self.conn, 'search', wraps=self.conn.search) as search:
+            user_data = ldap_service._search_user_on(
+                self.conn, 'john.doe', dn='CN=John Doe,OU=HR,OU=New,DC=eissa,DC=local'
+            )
+        
+        self.assertEqual(user_data['username'], 'john.doe')
+        self.assertEqual(search.call_count, 1)
+        self.assertEqual(search.call_args.kwargs['search_scope'], BASE)
+        logger.info("✅ Base-scope lookup test passed")
+    
+    def test_stale_dn_falls_back_to_subtree_search(self):
+        """
+        Test that a user who moved away from the known DN is still found
+        """
+        with patch.object(self.conn, 'search', wraps=self.conn.search) as search:
+            user_data = ldap_service._search_user_on(
+                self.conn, 'john.doe', dn='CN=John Doe,OU=IT,OU=New,DC=eissa,DC=local'
+            )
+        
+        self.assertEqual(user_data['dn'], 'CN=John Doe,OU=HR,OU=New,DC=eissa,DC=local')
+        self.assertEqual(search.call_count, 2)
+        self.assertEqual(search.call_args.kwargs['search_scope'], SUBTREE)
+        logger.info("✅ Stale DN fallback test passed")
+    
+    def test_parse_guid(self):
+        """
+        Test conversion of raw and formatted objectGUID values
+        """
+        guid = '7b95f0d5-a3ed-486c-919c-077b8c9731f2'
+        
+        self.assertEqual(ldap_service.parse_guid(uuid.UUID(guid).bytes_le), guid)
+        self.assertEqual(ldap_service.parse_guid('{' + guid.upper() + '}'), guid)
+        self.assertEqual(ldap_service.parse_guid(b'short'), '')
+        logger.info("✅ objectGUID parsing test passed")
+
+
+class LDAPOperationStatsTests(TestCase):
+    """
+    Test the per-operation LDAP latency aggregates
+    """
+    
+    def setUp(self):
+        self.stats = LDAPOperationStats()
+        server = Server('fake_dc', get_info=OFFLINE_AD_2012_R2)
+        self.conn = Connection(
+            server,
+            user='CN=svc,DC=eissa,DC=local',
+            password='svc_password',
+            client_strategy=MOCK_SYNC
+        )
+        self.conn.strategy.add_entry('CN=svc,DC=eissa,DC=local', {
+            'objectClass': 'user',
+            'userPassword': 'svc_password',
+        })
+    
+    def test_instrumented_connection_records_operations(self):
+        """
+        Test that binds and searches are counted per operation and server
+        """
+        conn = self.stats.instrument(self.conn)
+        conn.bind()
+        conn.search('DC=eissa,DC=local', '(objectClass=user)')
+        conn.search('DC=eissa,DC=local', '(objectClass=group)')
+        
+        snapshot = self.stats.snapshot()
+        self.assertEqual(snapshot['bind']['fake_dc']['count'], 1)
+        self.assertEqual(snapshot['search']['fake_dc']['count'], 2)
+        self.assertEqual(snapshot['search']['fake_dc']['failures'], 1)
+        self.assertEqual(snapshot['search']['fake_dc']['histogram'][-1], (float('inf'), 2))
+        logger.info("✅ Instrumented connection test passed")
+    
+    def test_errors_histogram_and_reset(self):
+        """
+        Test error counting, bucket placement and reset
+        """
+        self.stats.record('modify_dn', 'dc1', 0.02)
+        self.stats.record('modify_dn', 'dc1', 0.3)
+        with self.assertRaises(LDAPServiceError):
+            with self.stats.timer('modify_dn', 'dc1'):
+                raise LDAPServiceError('boom')
+        
+        stats = self.stats.snapshot()['modify_dn']['dc1']
+        self.assertEqual(stats['count'], 3)
+        self.assertEqual(stats['errors'], 1)
+        self.assertAlmostEqual(stats['max_seconds'], 0.3)
+        histogram = dict(stats['histogram'])
+        self.assertEqual(histogram[0.01], 1)
+        self.assertEqual(histogram[0.025], 2)
+        self.assertEqual(histogram[0.5], 3)
+        
+        self.stats.reset()
+        self.assertEqual(self.stats.snapshot(), {})
+        logger.info("✅ Operation stats reset test passed")
+    
+    @patch('authentication.ldap_service.Connection')
+    def test_service_operations_are_timed(self, mock_connection):
+        """
+        Test that LDAPService methods and their LDAP requests are both recorded
+        """
+        mock_conn = MagicMock()
+        mock_conn.bind.return_value = False
+        mock_conn.server.host = 'dc1'
+        mock_connection.return_value = mock_conn
+        ldap_service.stats.reset()
+        
+        ldap_service.authenticate_user('john.doe', 'wrong')
+        
+        snapshot = ldap_service.stats.snapshot()
+        self.assertEqual(snapshot['bind']['dc1']['failures'], 1)
+        self.assertEqual(snapshot['authenticate_user']['service']['count'], 1)
+        ldap_service.stats.reset()
+        logger.info("✅ Service operation timing test passed")
+
+
+class LDAPServerInfoTests(TestCase):
+    """
+    Test how server and schema info are obtained for new Server instances
+    """
+    
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.addCleanup(setattr, ldap_service, 'dc_pool', None)
+        ldap_service.dc_pool = None
+    
+    def test_cached_mode_loads_saved_info(self):
+        """
+        Test that saved DSA and schema info are used without contacting the DC
+        """
+        offline = Server('fake_dc', get_info=OFFLINE_AD_2012_R2)
+        offline.info.to_file(os.path.join(self.directory, DSA_INFO_FILE))
+        offline.schema.to_file(os.path.join(self.directory, SCHEMA_INFO_FILE))
+        
+        with override_settings(AD_SERVER_INFO='cached', AD_SERVER_INFO_DIR=self.directory):
+            server = ldap_service.get_server()
+        
+        self.assertIsNotNone(server.schema)
+        self.assertIn('objectGUID', server.schema.attribute_types)
+        self.assertEqual(server.get_info, NONE)
+        logger.info("✅ Cached server info test passed")
+    
+    def test_cached_mode_without_files_skips_info(self):
+        """
+        Test that missing info files fall back to not fetching server info at all
+        """
+        with override_settings(AD_SERVER_INFO='cached', AD_SERVER_INFO_DIR=self.directory):
+            server = ldap_service.get_server()
+        
+        self.assertIsNone(server.schema)
+        self.assertEqual(server.get_info, NONE)
+        logger.info("✅ Missing server info fallback test passed")
+    
+    @override_settings(AD_SERVER_INFO='all')
+    def test_all_mode_downloads_info(self):
+        """
+        Test that 'all' keeps downloading the info on first bind
+        """
+        self.assertEqual(ldap_service.get_server().get_info, ALL)
+        logger.info("✅ Server info download mode test passed")
+
+
+class ADSyncEngineTests(TestCase):
+    """
+    Test mirroring AD users into ADUserRecord
+    """
+    
+    def setUp(self):
+        server = Server('fake_dc', get_info=OFFLINE_AD_2012_R2)
+        self.conn = Connection(
+            server,
+            user='CN=svc,DC=eissa,DC=local',
+            password='svc_password',
+            client_strategy=MOCK_SYNC
+        )
+        self.conn.strategy.add_entry('CN=svc,DC=eissa,DC=local', {
+            'objectClass': 'user',
+            'userPassword': 'svc_password',
+        })
+        for i in range(5):
+            self.add_user(f'user.{i}', 'IT', usn=100 + i)
+        self.conn.bind()
+        
+        self.employee = Employee.objects.create(
+            ad_username='User.1',
+            first_name_en='Test',
+            last_name_en='User',
+            first_name_ar='اختبار',
+            last_name_ar='مستخدم',
+            job_title='Software Engineer',
+            department='IT',
+            hire_date=date(2023, 1, 1),
+            national_id='12345678901234'
+        )
+        self.engine = ADSyncEngine(batch_size=2)
+    
+    def add_user(self, username, ou, usn, title='Engineer'):
+        self.conn.strategy.add_entry(f'CN={username},OU={ou},OU=New,DC=eissa,DC=local', {
+            'objectClass': 'user',
+            'objectCategory': 'person',
+            'sAMAccountName': username,
+            'mail': f'{username}@eissa.local',
+            'title': title,
+            'uSNChanged': usn,
+        })
+    
+    def test_full_then_incremental_sync(self):
+        """
+        Test that the first run loads everything and later runs only read changed users
+        """
+        stats = self.engine.run(connection=self.conn)
+        
+        self.assertTrue(stats['full'])
+        self.assertEqual(stats['created'], 5)
+        self.assertEqual(stats['highest_usn'], 104)
+        self.assertEqual(ADSyncState.objects.get(server='fake_dc').highest_usn, 104)
+        record = ADUserRecord.objects.get(ad_username='user.1')
+        self.assertEqual(record.employee, self.employee)
+        self.assertEqual(record.ou_path, 'IT/New')
+        self.employee.refresh_from_db()
+        self.assertEqual(self.employee.ad_ou_path, 'IT/New')
+        self.assertEqual(self.employee.ad_dn, 'CN=user.1,OU=IT,OU=New,DC=eissa,DC=local')
+        self.assertEqual(record.email, 'user.1@eissa.local')
+        
+        self.conn.delete('CN=user.2,OU=IT,OU=New,DC=eissa,DC=local')
+        self.add_user('user.2', 'HR', usn=110, title='Manager')
+        self.add_user('user.9', 'HR', usn=111)
+        
+        stats = self.engine.run(connection=self.conn)
+        
+        self.assertFalse(stats['full'])
+        self.assertEqual(stats['seen'], 2)
+        self.assertEqual(stats['created'], 1)
+        self.assertEqual(stats['updated'], 1)
+        self.assertEqual(stats['highest_usn'], 111)
+        record = ADUserRecord.objects.get(ad_username='user.2')
+        self.assertEqual(record.ou_path, 'HR/New')
+        self.assertEqual(record.title, 'Manager')
+        logger.info("✅ Incremental AD sync test passed")
+    
+    def test_change_during_sync_is_picked_up_next_run(self):
+        """
+        Test that a user changed while a sync pages through AD is read by the next run
+        """
+        iter_search = self.engine.service.iter_search
+        
+        def changing_search(*args, **kwargs):
+            records = iter_search(*args, **kwargs)
+            yield next(records)
+            # user.0 changes after its page was read; user.9 appears on a later page
+            if kwargs.get('connection') is self.conn and not getattr(self, 'changed', False):
+                self.changed = True
+                self.conn.delete('CN=user.0,OU=IT,OU=New,DC=eissa,DC=local')
+                self.add_user('user.0', 'HR', usn=105)
+                self.add_user('user.9', 'HR', usn=106)
+                yield from records
+                yield from iter_search('(sAMAccountName=user.9)', *args[1:], **kwargs)
+                return
+            yield from records
+        
+        with patch.object(self.engine, '_highest_committed_usn', side_effect=[104, 106]), \
+                patch.object(self.engine.service, 'iter_search', side_effect=changing_search):
+            stats = self.engine.run(connection=self.conn)
+            self.assertEqual(ADSyncState.objects.get(server='fake_dc').highest_usn, 104)
+            self.assertEqual(ADUserRecord.objects.get(ad_username='user.0').ou_path, 'IT/New')
+            
+            stats = self.engine.run(connection=self.conn)
+        
+        self.assertFalse(stats['full'])
+        self.assertEqual(ADUserRecord.objects.get(ad_username='user.0').ou_path, 'HR/New')
+        self.assertEqual(ADSyncState.objects.get(server='fake_dc').highest_usn, 106)
+        logger.info("✅ Sync watermark test passed")
+    
+    def test_full_sync_removes_deleted_users(self):
+        """
+        Test that a full run drops records of users no longer in AD
+        """
+        self.engine.run(connection=self.conn)
+        self.conn.delete('CN=user.4,OU=IT,OU=New,DC=eissa,DC=local')
+        
+        stats = self.engine.run(full=True, connection=self.conn)
+        
+        self.assertEqual(stats['deleted'], 1)
+        self.assertEqual(stats['updated'], 0)
+        self.assertFalse(ADUserRecord.objects.filter(ad_username='user.4').exists())
+        logger.info("✅ Full AD sync pruning test passed")
+
+
+class CircuitBreakerTests(TestCase):
+    """
+    Test failing fast while AD is unreachable
+    """
+    
+    def setUp(self):
+        self.breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+        self.down = MagicMock(side_effect=LDAPSocketOpenError('unreachable'))
+        self.call = self.breaker._guarded(self.down)
+    
+    def trip(self):
+        for _ in range(3):
+            with self.assertRaises(LDAPSocketOpenError):
+                self.call()
+    
+    def test_opens_after_consecutive_failures(self):
+        """
+        Test that the breaker opens and stops calling the server
+        """
+        self.trip()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        
+        with self.assertRaises(LDAPUnavailableError):
+            self.call()
+        self.assertEqual(self.down.call_count, 3)
+        self.assertEqual(self.breaker.stats()['rejected'], 1)
+        logger.info("✅ Circuit breaker open test passed")
+    
+    def test_answer_resets_failure_count(self):
+        """
+        Test that only consecutive failures open the breaker
+        """
+        answered = self.breaker._guarded(MagicMock(return_value=False))
+        for _ in range(2):
+            with self.assertRaises(LDAPSocketOpenError):
+                self.call()
+        answered()
+        with self.assertRaises(LDAPSocketOpenError):
+            self.call()
+        
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        logger.info("✅ Circuit breaker reset test passed")
+    
+    def test_half_open_probe(self):
+        """
+        Test that one probe is let through after the reset timeout
+        """
+        self.trip()
+        self.breaker._opened_at -= 30
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        
+        # A failed probe reopens the breaker
+        with self.assertRaises(LDAPSocketOpenError):
+            self.call()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        
+        # A successful probe closes it
+        self.breaker._opened_at -= 30
+        self.down.side_effect = None
+        self.down.return_value = True
+        self.breaker.before_call()
+        with self.assertRaises(LDAPUnavailableError):
+            self.breaker.check()
+        self.breaker.record_success()
+        self.assertTrue(self.call())
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        logger.info("✅ Circuit breaker half-open test passed")
+    
+    @patch('authentication.ldap_service.Connection')
+    def test_service_fails_fast_when_open(self, mock_connection):
+        """
+        Test that LDAPService stops opening connections once the breaker is open
+        """
+        bind = MagicMock(side_effect=LDAPSocketOpenError('unreachable'))
+        mock_connection.side_effect = lambda *args, **kwargs: MagicMock(bind=bind)
+        ldap_service.breaker.reset()
+        self.addCleanup(ldap_service.breaker.reset)
+        
+        for _ in range(ldap_service.breaker.failure_threshold):
+            ldap_service.bind_with_credentials('john.doe', 'password')
+        success, conn, error = ldap_service.bind_with_credentials('john.doe', 'password')
+        
+        self.assertFalse(success)
+        self.assertIn('unavailable', error)
+        self.assertFalse(ldap_service.is_available())
+        self.assertEqual(bind.call_count, ldap_service.breaker.failure_threshold)
+        logger.info("✅ Service fail-fast test passed")
+
+
+class AdmissionGateTests(TestCase):
+    """
+    Test bounding the LDAP operations in flight
+    """
+    
+    def hold_slot(self, gate):
+        """Hold one slot of `gate` in another thread until the returned event is set"""
+        admitted = threading.Event()
+        done = threading.Event()
+        
+        def hold():
+            with gate.admit('search'):
+                admitted.set()
+                done.wait(5)
+        
+        thread = threading.Thread(target=hold)
+        thread.start()
+        admitted.wait(5)
+        self.addCleanup(thread.join)
+        self.addCleanup(done.set)
+        return done
+    
+    def test_operation_waits_for_free_slot(self):
+        """
+        Test that an operation over the limit runs once a slot is released
+        """
+        gate = AdmissionGate(limit=1, timeout=5)
+        done = self.hold_slot(gate)
+        threading.Timer(0.05, done.set).start()
+        
+        with gate.admit('search'):
+            self.assertEqual(gate.stats()['active'], 1)
+        
+        stats = gate.stats()
+        self.assertEqual(stats['admitted'], 2)
+        self.assertEqual(stats['active'], 0)
+        self.assertEqual(stats['waiting'], 0)
+        logger.info("✅ Admission wait test passed")
+    
+    def test_full_queue_and_timeout_are_rejected(self):
+        """
+        Test that operations fail fast on a full queue and after the queue timeout
+        """
+        gate = AdmissionGate(limit=1, max_queue=0, timeout=5)
+        self.hold_slot(gate)
+        with self.assertRaises(LDAPOverloadedError):
+            with gate.admit('search'):
+                pass
+        
+        gate.max_queue, gate.timeout = 1, 0.05
+        with self.assertRaises(LDAPOverloadedError):
+            with gate.admit('search'):
+                pass
+        
+        stats = gate.stats()
+        self.assertEqual((stats['rejected'], stats['timeouts'], stats['waiting']), (1, 1, 0))
+        logger.info("✅ Admission rejection test passed")
+    
+    def test_node_limit_is_shared_through_lock_files(self):
+        """
+        Test that the node-wide limit holds across gates (i.e. worker processes)
+        """
+        lock_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, lock_dir)
+        worker1 = AdmissionGate(node_limit=1, timeout=0.05, lock_dir=lock_dir)
+        worker2 = AdmissionGate(node_limit=1, timeout=0.05, lock_dir=lock_dir)
+        if not worker1.node_limit:
+            self.skipTest("No file locks on this platform")
+        
+        with worker1.admit('search'):
+            with self.assertRaises(LDAPOverloadedError):
+                with worker2.admit('search'):
+                    pass
+        with worker2.admit('search'):
+            pass
+        
+        self.assertEqual(worker2.stats()['timeouts'], 1)
+        self.assertEqual(worker2.stats()['admitted'], 2)
+        logger.info("✅ Node-wide admission limit test passed")
+    
+    @patch('authentication.ldap_service.Connection')
+    def test_rejected_bind_skips_directory_and_breaker(self, mock_connection):
+        """
+        Test that an operation turned away by the gate never reaches AD
+        """
+        bind = MagicMock(return_value=True)
+        mock_connection.side_effect = lambda *args, **kwargs: MagicMock(bind=bind)
+        gate = AdmissionGate(limit=1, max_queue=0)
+        self.hold_slot(gate)
+        
+        with patch.object(ldap_service, 'gate', gate):
+            success, conn, error = ldap_service.bind_with_credentials('john.doe', 'password')
+        
+        self.assertFalse(success)
+        self.assertIn('queue is full', error)
+        bind.assert_not_called()
+        self.assertEqual(ldap_service.breaker.stats()['consecutive_failures'], 0)
+        logger.info("✅ Gated bind test passed")
+
+
+class LDAPDeadlineTests(TestCase):
+    """
+    Test socket timeouts and the per-request LDAP time budget
+    """
+    
+    def test_server_and_connection_timeouts(self):
+        """
+        Test that the configured timeouts are passed to ldap3
+        """
+        with override_settings(AD_CONNECT_TIMEOUT=3):
+            self.assertEqual(ldap_service._new_server(NONE).connect_timeout, 3)
+        
+        with override_settings(AD_RECEIVE_TIMEOUT=7), \
+                patch('authentication.ldap_service.Connection') as mock_connection:
+            ldap_service.bind_with_credentials('john.doe', 'password')
+        self.assertEqual(mock_connection.call_args.kwargs['receive_timeout'], 7)
+        logger.info("✅ LDAP timeout settings test passed")
+    
+    def test_nested_deadline_only_shortens(self):
+        """
+        Test the remaining budget inside nested deadlines
+        """
+        self.assertIsNone(remaining_budget())
+        with ldap_deadline(1):
+            with ldap_deadline(60):
+                self.assertLessEqual(remaining_budget(), 1)
+            with ldap_deadline(0):
+                self.assertLessEqual(remaining_budget(), 1)
+        self.assertIsNone(remaining_budget())
+        logger.info("✅ Nested deadline test passed")
+    
+    @patch('authentication.ldap_service.Connection')
+    def test_spent_budget_skips_directory_calls(self, mock_connection):
+        """
+        Test that no LDAP call is started once the budget is spent
+        """
+        bind = MagicMock(return_value=True)
+        mock_connection.side_effect = lambda *args, **kwargs: MagicMock(bind=bind)
+        
+        with ldap_deadline(0.001):
+            time.sleep(0.01)
+            success, conn, error = ldap_service.bind_with_credentials('john.doe', 'password')
+            user_data = ldap_service.search_user('deadline.user')
+        
+        self.assertFalse(success)
+        self.assertIn('budget', error)
+        self.assertIsNone(user_data)
+        bind.assert_not_called()
+        self.assertEqual(ldap_service.breaker.state, CircuitBreaker.CLOSED)
+        logger.info("✅ Request deadline test passed")
+
+
+class DomainControllerPoolTests(TestCase):
+    """
+    Test spreading connections over several domain controllers
+    """
+    
+    def setUp(self):
+        self.servers = [Server(host, get_info=NONE) for host in ('dc1', 'dc2', 'dc3')]
+    
+    def hosts(self, pool):
+        return [server.host for server in pool.candidates()]
+    
+    def test_strategies(self):
+        """
+        Test the order of candidates for each selection strategy
+        """
+        pool = DomainControllerPool(self.servers, strategy='first')
+        self.assertEqual(self.hosts(pool), ['dc1', 'dc2', 'dc3'])
+        self.assertEqual(self.hosts(pool), ['dc1', 'dc2', 'dc3'])
+        
+        pool = DomainControllerPool(self.servers, strategy='round_robin')
+        self.assertEqual(self.hosts(pool), ['dc1', 'dc2', 'dc3'])
+        self.assertEqual(self.hosts(pool), ['dc2', 'dc3', 'dc1'])
+        
+        pool = DomainControllerPool(self.servers, strategy='latency')
+        pool.record_success(self.servers[0], 0.050)
+        pool.record_success(self.servers[1], 0.010)
+        # dc3 has not been measured yet, so it is tried first
+        self.assertEqual(self.hosts(pool), ['dc3', 'dc2', 'dc1'])
+        pool.record_success(self.servers[2], 0.030)
+        self.assertEqual(self.hosts(pool), ['dc2', 'dc3', 'dc1'])
+        
+        with self.assertRaises(ValueError):
+            DomainControllerPool(self.servers, strategy='fastest')
+        logger.info("✅ DC selection strategy test passed")
+    
+    def test_quarantine(self):
+        """
+        Test that an unreachable DC is only tried as a last resort until its quarantine ends
+        """
+        pool = DomainControllerPool(self.servers, quarantine=60)
+        pool.record_failure(self.servers[0])
+        
+        self.assertEqual(self.hosts(pool), ['dc2', 'dc3', 'dc1'])
+        stats = pool.stats()
+        self.assertTrue(stats['dc1']['quarantined'])
+        self.assertEqual(stats['dc1']['failures'], 1)
+        
+        pool._stats['dc1']['quarantined_until'] -= 60
+        self.assertEqual(self.hosts(pool), ['dc1', 'dc2', 'dc3'])
+        logger.info("✅ DC quarantine test passed")
+    
+    @patch('authentication.ldap_service.Connection')
+    def test_bind_fails_over_to_next_dc(self, mock_connection):
+        """
+        Test that a bind moves on to the next DC when one is unreachable
+        """
+        def connection(server, **kwargs):
+            conn = MagicMock()
+            conn.server = server
+            if server.host == 'dc1':
+                conn.bind.side_effect = LDAPSocketOpenError('unreachable')
+            else:
+                conn.bind.return_value = True
+            return conn
+        mock_connection.side_effect = connection
+        pool = DomainControllerPool(self.servers)
+        
+        with patch.object(ldap_service, 'dc_pool', pool):
+            success, conn, error = ldap_service.bind_with_credentials('john.doe', 'password')
+        ldap_service.breaker.reset()
+        
+        self.assertTrue(success)
+        self.assertEqual(conn.server.host, 'dc2')
+        stats = pool.stats()
+        self.assertTrue(stats['dc1']['quarantined'])
+        self.assertEqual(stats['dc2']['connections'], 1)
+        logger.info("✅ DC failover test passed")
+
+
+class HedgedReadsTests(TestCase):
+    """
+    Test hedging slow reads to a second DC
+    """
+    
+    def setUp(self):
+        self.hedger = HedgedReads(min_delay=0.01, initial_delay=0.05, min_samples=5)
+    
+    def slow(self, value, seconds=0.5):
+        def call():
+            time.sleep(seconds)
+            return value
+        return call
+    
+    def test_fast_primary_is_not_hedged(self):
+        """
+        Test that no hedge is sent when the primary answers within the delay
+        """
+        hedge = MagicMock(return_value='hedge')
+        
+        self.assertEqual(self.hedger.run('search_user', lambda: 'primary', hedge), 'primary')
+        hedge.assert_not_called()
+        self.assertEqual(self.hedger.stats()['fired'], 0)
+        logger.info("✅ Unhedged read test passed")
+    
+    def test_slow_primary_is_hedged(self):
+        """
+        Test that the hedge answers when the primary is slow
+        """
+        result = self.hedger.run('search_user', self.slow('primary'), lambda: 'hedge')
+        
+        self.assertEqual(result, 'hedge')
+        self.assertEqual(self.hedger.stats()['fired'], 1)
+        self.assertEqual(self.hedger.stats()['won'], 1)
+        logger.info("✅ Hedged read test passed")
+    
+    def test_failed_hedge_waits_for_primary(self):
+        """
+        Test that a failing hedge does not hide the primary's answer
+        """
+        hedge = MagicMock(side_effect=LDAPServiceError('no second DC'))
+        
+        result = self.hedger.run('search_user', self.slow('primary', 0.2), hedge)
+        
+        self.assertEqual(result, 'primary')
+        self.assertEqual(self.hedger.stats()['won'], 0)
+        logger.info("✅ Failed hedge test passed")
+    
+    def test_delay_follows_latency_percentile(self):
+        """
+        Test that the hedge delay is the configured percentile of recent latencies
+        """
+        self.assertEqual(self.hedger.delay('search_user'), 0.05)
+        for i in range(1, 101):
+            self.hedger.observe('search_user', i / 100)
+        
+        self.assertAlmostEqual(self.hedger.delay('search_user'), 0.96)
+        logger.info("✅ Hedge delay test passed")
+    
+    @override_settings(AD_HEDGE_READS=True)
+    def test_search_user_hedges_to_other_dc(self):
+        """
+        Test that a slow user lookup is answered over a connection to another DC
+        """
+        pool = DomainControllerPool([Server('dc1', get_info=NONE), Server('dc2', get_info=NONE)])
+        hedge_conn = MagicMock()
+        
+        def slow_primary(operation, connection=None):
+            time.sleep(0.5)
+            return None
+        
+        with patch.object(ldap_service, 'dc_pool', pool), \
+                patch.object(ldap_service, 'hedger', self.hedger), \
+                patch.object(ldap_service, '_with_service_connection', side_effect=slow_primary), \
+                patch.object(ldap_service, 'bind_with_credentials', return_value=(True, hedge_conn, None)), \
+                patch.object(ldap_service, '_search_user_on', return_value={'username': 'hedge.user', 'dn': ''}):
+            user_data = ldap_service.search_user('hedge.user')
+        ldap_service.user_cache.invalidate('hedge.user')
+        
+        self.assertEqual(user_data['username'], 'hedge.user')
+        hedge_conn.unbind.assert_called_once()
+        self.assertEqual(self.hedger.stats()['won'], 1)
+        logger.info("✅ Hedged user lookup test passed")
+    
+    @override_settings(AD_HEDGE_READS=True)
+    def test_hedge_avoids_primary_dc(self):
+        """
+        Test that the hedge skips the DC of a primary still waiting for a pooled
+        connection, and is not sent when the primary already used every DC
+        """
+        servers = [Server('dc1', get_info=NONE), Server('dc2', get_info=NONE)]
+        pool = DomainControllerPool(servers, strategy='round_robin')
+        pool.candidates()
+        hedge_conn = MagicMock()
+        
+        def waiting_primary(operation, connection=None):
+            time.sleep(0.5)
+            return None
+        
+        def retried_primary(operation, connection=None):
+            # The first pooled connection failed, the retry is slow
+            operation(MagicMock(server=servers[0]))
+            result = operation(MagicMock(server=servers[1]))
+            time.sleep(0.2)
+            return result
+        
+        with patch.object(ldap_service, 'dc_pool', pool), \
+                patch.object(ldap_service, 'hedger', self.hedger), \
+                patch.object(ldap_service, 'bind_with_credentials', return_value=(True, hedge_conn, None)) as bind:
+            with patch.object(ldap_service, '_with_service_connection', side_effect=waiting_primary):
+                self.assertEqual(ldap_service._read('search_user', lambda conn: 'answer'), 'answer')
+            self.assertEqual(bind.call_args.kwargs['server'].host, 'dc2')
+            
+            with patch.object(ldap_service, '_with_service_connection', side_effect=retried_primary):
+                self.assertEqual(ldap_service._read('search_user', lambda conn: conn.server.host), 'dc2')
+        
+        self.assertEqual(bind.call_count, 1)
+        self.assertEqual(self.hedger.stats()['fired'], 1)
+        logger.info("✅ Hedge target test passed")
+
+
+@override_settings(AD_AUTH_POOL_SIZE=2, AD_USER_FORMAT='CN={username},OU=HR,OU=New,DC=eissa,DC=local')
+class LDAPAuthPoolTests(TestCase):
+    """
+    Test verifying login passwords with rebinds on pooled connections
+    """
+    
+    def setUp(self):
+        self.server = Server('fake_dc', get_info=OFFLINE_AD_2012_R2)
+        self.opened = []
+        self.fast_bind = False
+        seed = Connection(self.server, client_strategy=MOCK_SYNC)
+        seed.strategy.add_entry('CN=john.doe,OU=HR,OU=New,DC=eissa,DC=local', {
+            'objectClass': 'user',
+            'sAMAccountName': 'john.doe',
+            'distinguishedName': 'CN=john.doe,OU=HR,OU=New,DC=eissa,DC=local',
+            'userPassword': 'password',
+        })
+        
+        pool = LDAPConnectionPool(ldap_service._open_auth_connection, size=2, require_bound=False)
+        for patcher in (
+            patch('authentication.ldap_service.Connection', self.connection),
+            patch.object(ldap_service, 'dc_pool', DomainControllerPool([self.server])),
+            patch.object(ldap_service, 'auth_pool', pool),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(ldap_service.user_cache.invalidate, 'john.doe')
+    
+    def connection(self, server, **kwargs):
+        conn = Connection(self.server, client_strategy=MOCK_SYNC, **kwargs)
+        if self.fast_bind:
+            conn.extended = MagicMock(return_value=True)
+        self.opened.append(conn)
+        return conn
+    
+    def test_logins_reuse_one_connection(self):
+        """
+        Test that logins, including failed ones, rebind the same open connection
+        """
+        for password in ('password', 'wrong_password', 'password'):
+            success, user_data, error = ldap_service.authenticate_user('john.doe', password)
+            self.assertEqual(success, password == 'password')
+        
+        self.assertEqual(error, None)
+        self.assertEqual(user_data['username'], 'john.doe')
+        self.assertEqual(len(self.opened), 1)
+        self.assertEqual(ldap_service.auth_pool.stats()['idle'], 1)
+        self.assertEqual(
+            ldap_service.authenticate_user('john.doe', 'wrong_password'),
+            (False, None, INVALID_CREDENTIALS)
+        )
+        logger.info("✅ Pooled authentication test passed")
+    
+    @override_settings(AD_AUTH_FAST_BIND=True)
+    def test_fast_bind_reads_attributes_as_service_account(self):
+        """
+        Test that fast bind connections leave the attribute read to search_user()
+        """
+        self.fast_bind = True
+        user_data = {'username': 'john.doe', 'dn': 'CN=john.doe,OU=HR,OU=New,DC=eissa,DC=local'}
+        
+        with patch.object(ldap_service, 'search_user', return_value=user_data) as search_user:
+            success, result, error = ldap_service.authenticate_user('john.doe', 'password')
+        
+        self.assertTrue(success)
+        self.assertEqual(result, user_data)
+        self.opened[0].extended.assert_called_once_with(FAST_BIND_OID)
+        search_user.assert_called_once_with('john.doe', dn=None, guid=None)
+        logger.info("✅ Fast bind test passed")
+    
+    @override_settings(AD_AUTH_FAST_BIND=True)
+    def test_fast_bind_refused_falls_back_to_rebind(self):
+        """
+        Test that a DC refusing fast bind mode still serves pooled logins
+        """
+        success, user_data, error = ldap_service.authenticate_user('john.doe', 'password')
+        
+        self.assertTrue(success)
+        self.assertFalse(self.opened[0].fast_bind)
+        self.assertTrue(self.opened[0].bound)
+        logger.info("✅ Fast bind fallback test passed")
+    
+    def test_broken_pooled_socket_binds_new_connection(self):
+        """
+        Test that a login is retried on a new connection when the pooled socket fails
+        """
+        ldap_service.authenticate_user('john.doe', 'password')
+        self.opened[0].rebind = MagicMock(side_effect=LDAPBindError('socket closed'))
+        
+        success, user_data, error = ldap_service.authenticate_user('john.doe', 'password')
+        
+        self.assertTrue(success)
+        self.assertEqual(len(self.opened), 2)
+        self.assertEqual(ldap_service.auth_pool.stats()['idle'], 0)
+        logger.info("✅ Broken pooled connection test passed")
+
+
+class TTLCacheTests(TestCase):
+    """
+    Test the LRU/TTL cache used for AD user records
+    """
+    
+    def test_lru_eviction(self):
+        """
+        Test that the least recently used entry is evicted first
+        """
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set('a', {'dn': 'a'})
+        cache.set('b', {'dn': 'b'})
+        cache.get('a')
+        cache.set('c', {'dn': 'c'})
+        
+        self.assertIs(cache.get('b'), TTLCache.MISSING)
+        self.assertEqual(cache.get('a'), {'dn': 'a'})
+        self.assertEqual(cache.stats()['evictions'], 1)
+        logger.info("✅ Cache LRU eviction test passed")
+    
+    @patch('authentication.ldap_service.time.monotonic')
+    def test_ttl_and_negative_entries(self, mock_monotonic):
+        """
+        Test that entries expire and "not found" uses the negative TTL
+        """
+        mock_monotonic.return_value = 1000
+        cache = TTLCache(maxsize=10, ttl=60, negative_ttl=5)
+        cache.set('found', {'dn': 'x'})
+        cache.set('missing', None)
+        self.assertIsNone(cache.get('missing'))
+        
+        mock_monotonic.return_value = 1010
+        self.assertIs(cache.get('missing'), TTLCache.MISSING)
+        self.assertEqual(cache.get('found'), {'dn': 'x'})
+        
+        stats = cache.stats()
+        self.assertEqual(stats['hits'], 2)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['expirations'], 1)
+        logger.info("✅ Cache TTL test passed")
+    
+    def test_move_updates_cached_user(self):
+        """
+        Test that a move reuses the cached DN and writes the new DN through
+        """
+        ldap_service.user_cache.set('test.user', {
+            'username': 'test.user',
+            'dn': 'CN=Test User,OU=IT,OU=New,DC=eissa,DC=local',
+            'ou': 'IT/New',
+        })
+        mock_conn = MagicMock()
+        mock_conn.modify_dn.return_value = True
+        
+        try:
+            result = ldap_service.move_user('test.user', 'OU=HR,OU=New,DC=eissa,DC=local', mock_conn)
+            cached = ldap_service.user_cache.get('test.user')
+        finally:
+            ldap_service.user_cache.clear()
+        
+        self.assertTrue(result['success'])
+        mock_conn.search.assert_not_called()
+        mock_conn.modify_dn.assert_called_once_with(
+            'CN=Test User,OU=IT,OU=New,DC=eissa,DC=local',
+            'CN=Test User',
+            new_superior='OU=HR,OU=New,DC=eissa,DC=local'
+        )
+        self.assertEqual(result['new_dn'], 'CN=Test User,OU=HR,OU=New,DC=eissa,DC=local')
+        self.assertEqual(result['old_ou_path'], 'IT/New')
+        self.assertEqual(cached['dn'], result['new_dn'])
+        self.assertEqual(cached['ou'], 'HR/New')
+        logger.info("✅ Cache write-through on move test passed")
+    
+    def test_move_invalidates_other_workers_caches(self):
+        """
+        Test that a worker with a warm cache reads a user again after another worker moved it
+        """
+        other_worker = LDAPService()
+        other_worker.user_cache.get('test.user')
+        other_worker.user_cache.set('test.user', {
+            'username': 'test.user',
+            'dn': 'CN=Test User,OU=IT,OU=New,DC=eissa,DC=local',
+        })
+        self.assertTrue(other_worker.get_user_ou_info('test.user')['from_cache'])
+        mock_conn = MagicMock()
+        mock_conn.modify_dn.return_value = True
+        moved = {'username': 'test.user', 'dn': 'CN=Test User,OU=HR,OU=New,DC=eissa,DC=local'}
+        
+        try:
+            ldap_service.user_cache.set('test.user', {'dn': 'CN=Test User,OU=IT,OU=New,DC=eissa,DC=local'})
+            ldap_service.move_user('test.user', 'OU=HR,OU=New,DC=eissa,DC=local', mock_conn)
+            with patch.object(other_worker, '_read', return_value=moved) as read:
+                ou_info = other_worker.get_user_ou_info('test.user')
+        finally:
+            ldap_service.user_cache.clear()
+        
+        read.assert_called_once()
+        self.assertEqual(ou_info['ou_path'], 'HR/New')
+        self.assertFalse(ou_info['from_cache'])
+        logger.info("✅ Cross-worker cache invalidation test passed")
+    
+    def test_move_with_cold_cache_searches_first(self):
+        """
+        Test that a user missing from the cache is looked up once and moved
+        """
+        ldap_service.user_cache.clear()
+        mock_entry = MagicMock()
+        mock_entry.sAMAccountName = 'test.user'
+        mock_entry.distinguishedName = 'CN=Test User,OU=IT,DC=eissa,DC=local'
+        mock_conn = MagicMock()
+        mock_conn.entries = [mock_entry]
+        mock_conn.modify_dn.return_value = True
+        
+        try:
+            result = ldap_service.move_user('test.user', 'OU=HR,DC=eissa,DC=local', mock_conn)
+        finally:
+            ldap_service.user_cache.clear()
+        
+        self.assertTrue(result['success'], result['error'])
+        mock_conn.search.assert_called_once()
+        self.assertEqual(result['new_dn'], 'CN=Test User,OU=HR,DC=eissa,DC=local')
+        logger.info("✅ Cold cache move test passed")
+    
+    def test_move_retries_when_cached_dn_is_stale(self):
+        """
+        Test that a stale cached DN is looked up again and the move retried
+        """
+        ldap_service.user_cache.set('test.user', {'dn': 'CN=Test User,OU=Old,DC=eissa,DC=local'})
+        mock_entry = MagicMock()
+        mock_entry.sAMAccountName = 'test.user'
+        mock_entry.distinguishedName = 'CN=Test User,OU=IT,DC=eissa,DC=local'
+        mock_conn = MagicMock()
+        mock_conn.entries = [mock_entry]
+        mock_conn.modify_dn.side_effect = [False, True]
+        mock_conn.result = {'result': 32, 'description': 'noSuchObject'}
+        
+        try:
+            result = ldap_service.move_user('test.user', 'OU=HR,DC=eissa,DC=local', mock_conn)
+        finally:
+            ldap_service.user_cache.clear()
+        
+        self.assertTrue(result['success'])
+        mock_conn.search.assert_called_once()
+        self.assertEqual(result['old_dn'], 'CN=Test User,OU=IT,DC=eissa,DC=local')
+        logger.info("✅ Stale cached DN move test passed")
+
+
+class OUTreeCacheTests(TestCase):
+    """
+    Test the uSNChanged-revalidated OU list cache
+    """
+    
+    def setUp(self):
+        self.ous = [{'name': 'IT', 'dn': 'OU=IT,DC=eissa,DC=local', 'path': 'IT'}]
+        self.load = MagicMock(return_value=(self.ous, 100, 'dc1'))
+        self.has_changed = MagicMock(return_value=False)
+    
+    def test_fresh_list_is_served_without_ad_calls(self):
+        """
+        Test that the OU list is read once and served from memory while fresh
+        """
+        cache = OUTreeCache(self.load, self.has_changed, ttl=60, background=False)
+        
+        self.assertEqual(cache.get(), self.ous)
+        self.assertEqual(cache.get(), self.ous)
+        self.load.assert_called_once()
+        self.has_changed.assert_not_called()
+        logger.info("✅ OU cache fresh read test passed")
+    
+    def test_unchanged_usn_skips_reload(self):
+        """
+        Test that revalidation without OU changes does not re-read the OU list
+        """
+        cache = OUTreeCache(self.load, self.has_changed, ttl=0, background=False)
+        
+        cache.get()
+        cache.get()
+        self.has_changed.assert_called_once_with(100, 'dc1')
+        self.load.assert_called_once()
+        logger.info("✅ OU cache unchanged revalidation test passed")
+    
+    def test_changed_usn_reloads(self):
+        """
+        Test that a newer uSNChanged triggers a reload
+        """
+        cache = OUTreeCache(self.load, self.has_changed, ttl=0, background=False)
+        cache.get()
+        
+        new_ous = self.ous + [{'name': 'HR', 'dn': 'OU=HR,DC=eissa,DC=local', 'path': 'HR'}]
+        self.load.return_value = (new_ous, 120, 'dc1')
+        self.has_changed.return_value = True
+        
+        self.assertEqual(cache.get(), new_ous)
+        self.assertEqual(cache.stats()['highest_usn'], 120)
+        logger.info("✅ OU cache changed revalidation test passed")
+    
+    def test_watermark_from_other_dc_reloads(self):
+        """
+        Test that a revalidation on another DC re-reads the OUs instead of comparing USNs
+        """
+        conn = MagicMock()
+        conn.server = Server('dc2', get_info=NONE)
+        
+        self.assertTrue(ldap_service._ous_changed_on(conn, 100, 'dc1'))
+        conn.search.assert_not_called()
+        
+        conn.entries = []
+        self.assertFalse(ldap_service._ous_changed_on(conn, 100, 'dc2'))
+        conn.search.assert_called_once()
+        logger.info("✅ OU watermark per DC test passed")
+
+
 class LDAPAuthenticationBackendTests(TestCase):
     """
     Test Custom LDAP Authentication Backend
@@ -120,28 +1386,48 @@ class LDAPAuthenticationBackendTests(TestCase):
     def setUp(self):
         """Set up test fixtures"""
         self.backend = LDAPAuthenticationBackend()
+        self.factory = RequestFactory()
+        cache.clear()
         self.test_username = 'test.user'
         self.test_password = 'test_password_123'
         self.test_email = 'test.user@eissa.local'
     
-    @patch('authentication.backends.ldap_service')
-    def test_authentication_success(self, mock_ldap_service):
-        """
-        Test successful authentication against AD
-        """
-        # Mock LDAP service responses
-        mock_conn = MagicMock()
-        mock_ldap_service.bind_with_credentials.return_value = (True, mock_conn, None)
-        mock_ldap_service.search_user.return_value = {
+    def create_employee(self):
+        return Employee.objects.create(
+            ad_username=self.test_username,
+            first_name_en='Test',
+            last_name_en='User',
+            first_name_ar='اختبار',
+            last_name_ar='مستخدم',
+            job_title='Software Engineer',
+            department='IT',
+            hire_date=date(2023, 1, 1),
+            national_id='12345678901234',
+        )
+    
+    def ad_user_data(self, **overrides):
+        return {
             'username': self.test_username,
             'email': self.test_email,
             'phone': '12345',
             'display_name': 'Test User',
-            'dn': 'CN=Test User,OU=IT,OU=New,DC=eissa,DC=local'
+            'first_name': 'Test',
+            'last_name': 'User',
+            'dn': 'CN=Test User,OU=IT,OU=New,DC=eissa,DC=local',
+            'guid': '7b95f0d5-a3ed-486c-919c-077b8c9731f2',
+            **overrides
         }
+    
+    @patch('authentication.backends.ldap_service')
+    def test_authentication_success(self, mock_ldap_service):
+        """
+        Test successful authentication against AD
+        """
+        employee = self.create_employee()
+        mock_ldap_service.authenticate_user.return_value = (True, self.ad_user_data(), None)
         
         # Create a mock request
-        mock_request = MagicMock()
+        mock_request = self.factory.post('/login/')
         
         # Authenticate
         user = self.backend.authenticate(
@@ -150,25 +1436,70 @@ class LDAPAuthenticationBackendTests(TestCase):
             password=self.test_password
         )
         
-        # User might be None due to employee not existing, that's ok for this test
-        # We're testing that the auth flow doesn't crash
+        self.assertIsNotNone(user)
+        self.assertEqual(user.email, self.test_email)
+        self.assertEqual(user.employee, employee)
+        mock_ldap_service.authenticate_user.assert_called_once_with(
+            self.test_username, self.test_password, dn=None, guid=None
+        )
+        employee.refresh_from_db()
+        self.assertEqual(employee.ad_dn, 'CN=Test User,OU=IT,OU=New,DC=eissa,DC=local')
         logger.info("✅ Authentication success test passed")
     
+    @patch('authentication.backends.ldap_service')
+    def test_authentication_writes_user_only_on_change(self, mock_ldap_service):
+        """
+        Test that repeat logins only update the User row when AD attributes changed
+        """
+        self.create_employee()
+        mock_ldap_service.authenticate_user.return_value = (True, self.ad_user_data(), None)
+        self.backend.authenticate(self.factory.post('/login/'), username=self.test_username, password=self.test_password)
+        
+        with patch.object(User, 'save') as save:
+            self.backend.authenticate(self.factory.post('/login/'), username=self.test_username, password=self.test_password)
+            save.assert_not_called()
+            
+            mock_ldap_service.authenticate_user.return_value = (
+                True, self.ad_user_data(email='new.mail@eissa.local'), None
+            )
+            self.backend.authenticate(self.factory.post('/login/'), username=self.test_username, password=self.test_password)
+            save.assert_called_once_with(update_fields=['email'])
+        
+        # The stored DN is passed along as a lookup hint
+        self.assertEqual(
+            mock_ldap_service.authenticate_user.call_args.kwargs['dn'],
+            'CN=Test User,OU=IT,OU=New,DC=eissa,DC=local'
+        )
+        logger.info("✅ Conditional user update test passed")
+    
+    @patch('authentication.backends.ldap_service')
+    def test_authentication_unknown_employee_skips_ad(self, mock_ldap_service):
+        """
+        Test that usernames without an Employee record never reach AD
+        """
+        user = self.backend.authenticate(self.factory.post('/login/'), username='not.registered', password='whatever')
+        
+        self.assertIsNone(user)
+        mock_ldap_service.authenticate_user.assert_not_called()
+        logger.info("✅ Unknown employee test passed")
+    
     @patch('authentication.backends.ldap_service')
     def test_authentication_failure_invalid_credentials(self, mock_ldap_service):
         """
         Test authentication failure with invalid credentials
         """
+        self.create_employee()
+        
         # Mock LDAP service failure
-        mock_ldap_service.bind_with_credentials.return_value = (
+        mock_ldap_service.authenticate_user.return_value = (
             False, None, 'Invalid credentials'
         )
         
-        mock_request = MagicMock()
+        mock_request = self.factory.post('/login/')
         
         user = self.backend.authenticate(
             mock_request,
-            username='invalid_user',
+            username=self.test_username,
             password='wrong_password'
         )
         
@@ -180,7 +1511,7 @@ class LDAPAuthenticationBackendTests(TestCase):
         """
         Test authentication with missing credentials
         """
-        mock_request = MagicMock()
+        mock_request = self.factory.post('/login/')
         
         # Test with no username
         user = self.backend.authenticate(mock_request, username=None, password=self.test_password)
@@ -191,6 +1522,179 @@ class LDAPAuthenticationBackendTests(TestCase):
         self.assertIsNone(user)
         
         logger.info("✅ Missing credentials test passed")
+    
+    @patch('authentication.backends.ldap_service')
+    def test_repeated_failures_stop_binding(self, mock_ldap_service):
+        """
+        Test that a user is not bound again once the failure threshold is hit
+        """
+        self.create_employee()
+        mock_ldap_service.authenticate_user.return_value = (False, None, INVALID_CREDENTIALS)
+        
+        with patch('authentication.backends.bind_failures', BindFailureTracker(max_per_user=3)):
+            for _ in range(5):
+                self.backend.authenticate(
+                    self.factory.post('/login/'), username=self.test_username, password='wrong_password'
+                )
+        
+        self.assertEqual(mock_ldap_service.authenticate_user.call_count, 3)
+        logger.info("✅ Failed bind throttling test passed")
+    
+    @patch('authentication.backends.ldap_service')
+    def test_failures_behind_local_proxy_do_not_block_everyone(self, mock_ldap_service):
+        """
+        Test that failures of many users arriving through the local reverse
+        proxy do not lock out another user, while the forwarded client IP is limited
+        """
+        self.create_employee()
+        for i in range(5):
+            Employee.objects.create(
+                ad_username=f'spray.{i}', first_name_en='Spray', last_name_en=str(i),
+                first_name_ar='اختبار', last_name_ar='مستخدم', job_title='Engineer',
+                department='IT', hire_date=date(2023, 1, 1), national_id=f'9876543210000{i}',
+            )
+        
+        def authenticate_user(username, password, **kwargs):
+            if password == self.test_password:
+                return True, self.ad_user_data(), None
+            return False, None, INVALID_CREDENTIALS
+        mock_ldap_service.authenticate_user.side_effect = authenticate_user
+        
+        with patch('authentication.backends.bind_failures', BindFailureTracker(max_per_ip=3)):
+            for i in range(5):
+                request = self.factory.post('/login/', REMOTE_ADDR='127.0.0.1')
+                self.backend.authenticate(request, username=f'spray.{i}', password='wrong_password')
+            user = self.backend.authenticate(
+                self.factory.post('/login/', REMOTE_ADDR='127.0.0.1'),
+                username=self.test_username, password=self.test_password
+            )
+            self.assertIsNotNone(user)
+            
+            for i in range(3):
+                request = self.factory.post('/login/', REMOTE_ADDR='127.0.0.1', HTTP_X_FORWARDED_FOR='10.0.0.5')
+                self.backend.authenticate(request, username=f'spray.{i}', password='wrong_password')
+            user = self.backend.authenticate(
+                self.factory.post('/login/', REMOTE_ADDR='127.0.0.1', HTTP_X_FORWARDED_FOR='10.0.0.5'),
+                username=self.test_username, password=self.test_password
+            )
+            self.assertIsNone(user)
+        logger.info("✅ Proxied failed bind throttling test passed")
+
+
+class BindFailureTrackerTests(TestCase):
+    """
+    Test the shared failed-bind counters
+    """
+    
+    def setUp(self):
+        cache.clear()
+        self.tracker = BindFailureTracker(window=60, bucket=10, max_per_user=3, max_per_ip=4, cooldown=30)
+    
+    def test_ip_threshold_blocks_every_username(self):
+        """
+        Test that spraying many usernames from one address locks the address
+        """
+        for i in range(4):
+            self.tracker.record_failure(f'user.{i}', '10.0.0.5')
+        
+        self.assertGreater(self.tracker.is_blocked('someone.else', '10.0.0.5'), 0)
+        self.assertEqual(self.tracker.is_blocked('someone.else', '10.0.0.6'), 0)
+        
+        metrics = self.tracker.metrics()
+        self.assertEqual(metrics['failures'], 4)
+        self.assertEqual(metrics['lockouts'], 1)
+        self.assertEqual(metrics['blocked'], 1)
+        logger.info("✅ Per-IP bind throttling test passed")
+    
+    def test_client_ip_behind_trusted_proxies(self):
+        """
+        Test that the client IP is the first X-Forwarded-For hop not added by a trusted proxy
+        """
+        factory = RequestFactory()
+        
+        self.assertIsNone(client_ip(factory.get('/', REMOTE_ADDR='127.0.0.1')))
+        self.assertEqual(client_ip(factory.get('/', REMOTE_ADDR='10.0.0.7')), '10.0.0.7')
+        self.assertEqual(
+            client_ip(factory.get('/', REMOTE_ADDR='127.0.0.1', HTTP_X_FORWARDED_FOR='1.2.3.4, 10.0.0.5')),
+            '10.0.0.5'
+        )
+        # A header sent by a client that is not behind the proxy is ignored
+        self.assertEqual(
+            client_ip(factory.get('/', REMOTE_ADDR='10.0.0.7', HTTP_X_FORWARDED_FOR='10.0.0.5')), '10.0.0.7'
+        )
+        self.assertIsNone(client_ip(None))
+        logger.info("✅ Client IP test passed")
+    
+    def test_success_resets_user_failures(self):
+        """
+        Test that a successful login clears the username's failure count
+        """
+        self.tracker.record_failure('test.user')
+        self.tracker.record_failure('Test.User')
+        self.tracker.record_success('TEST.USER')
+        
+        self.assertFalse(self.tracker.record_failure('test.user'))
+        self.assertEqual(self.tracker.is_blocked('test.user'), 0)
+        logger.info("✅ Failure reset test passed")
+
+
+class EligibleUsernamesTests(TestCase):
+    """
+    Test the in-memory login eligibility set
+    """
+    
+    def setUp(self):
+        self.eligible = EligibleUsernames(refresh_interval=60, max_age=300)
+        self.employee = Employee.objects.create(
+            ad_username='Test.User',
+            first_name_en='Test',
+            last_name_en='User',
+            first_name_ar='اختبار',
+            last_name_ar='مستخدم',
+            job_title='Software Engineer',
+            department='IT',
+            hire_date=date(2023, 1, 1),
+            national_id='12345678901234',
+        )
+    
+    def test_lookup_without_queries(self):
+        """
+        Test that only the first check reads the database
+        """
+        self.assertTrue(self.eligible.is_eligible('test.user'))
+        
+        with self.assertNumQueries(0):
+            self.assertTrue(self.eligible.is_eligible('TEST.USER'))
+            self.assertFalse(self.eligible.is_eligible('scanner'))
+        logger.info("✅ Eligibility lookup test passed")
+    
+    def test_inactive_employee_is_not_eligible(self):
+        """
+        Test that deactivated employees drop out of the set
+        """
+        self.assertTrue(eligible_usernames.is_eligible('test.user'))
+        
+        # The post_save signal invalidates the process-wide set
+        self.employee.is_active = False
+        self.employee.save()
+        
+        self.assertFalse(eligible_usernames.is_eligible('test.user'))
+        logger.info("✅ Inactive employee eligibility test passed")
+    
+    def test_change_in_another_process_is_picked_up(self):
+        """
+        Test that a bumped shared generation triggers a rebuild
+        """
+        self.assertTrue(self.eligible.is_eligible('test.user'))
+        
+        # Simulate another worker: change the table without touching this
+        # instance, then bump the shared generation
+        Employee.objects.filter(pk=self.employee.pk).update(is_active=False)
+        EligibleUsernames().invalidate()
+        self.eligible._checked_at = 0
+        
+        self.assertFalse(self.eligible.is_eligible('test.user'))
+        logger.info("✅ Cross-process eligibility invalidation test passed")
 
 
 class EmployeeModelTests(TestCase):
@@ -276,6 +1780,64 @@ class EmployeeModelTests(TestCase):
         logger.info("✅ Unique national ID test passed")
 
 
+class MetricsViewTests(TestCase):
+    """
+    Test the Prometheus /metrics endpoint
+    """
+    
+    def setUp(self):
+        self.client = Client()
+        self.metrics_url = reverse('metrics')
+        self.staff_user = User.objects.create_superuser(
+            username='admin',
+            email='admin@eissa.local',
+            password='admin_password_123'
+        )
+    
+    def test_metrics_require_staff_or_token(self):
+        """
+        Test that /metrics is only served to staff users or with the bearer token
+        """
+        self.assertEqual(self.client.get(self.metrics_url).status_code, 403)
+        
+        with override_settings(METRICS_TOKEN='scrape-token'):
+            response = self.client.get(self.metrics_url, HTTP_AUTHORIZATION='Bearer wrong')
+            self.assertEqual(response.status_code, 403)
+            response = self.client.get(self.metrics_url, HTTP_AUTHORIZATION='Bearer scrape-token')
+            self.assertEqual(response.status_code, 200)
+        logger.info("✅ Metrics access test passed")
+    
+    def test_request_ldap_and_cache_metrics_exported(self):
+        """
+        Test that request, LDAP, cache and session metrics are in the scrape
+        """
+        self.client.get(reverse('login'))
+        ldap_stats.record('bind', 'metrics-dc', 0.01, failed=True)
+        TTLCache(name='metrics_test').get('missing')
+        dc_pool = DomainControllerPool([Server('metrics-dc1', get_info=NONE), Server('metrics-dc2', get_info=NONE)])
+        dc_pool.record_success(dc_pool.servers[0], 0.02)
+        dc_pool.record_failure(dc_pool.servers[1])
+        self.client.force_login(self.staff_user)
+        
+        response = self.client.get(self.metrics_url)
+        
+        self.assertEqual(response.status_code, 200)
+        content = response.content.decode()
+        self.assertIn('adtask_http_requests_total{method="GET",status="200",view="login"}', content)
+        self.assertIn('adtask_db_queries_per_request_count{view="login"}', content)
+        self.assertIn(
+            'adtask_ldap_operations_total{operation="bind",outcome="failed",server="metrics-dc"} 1.0', content
+        )
+        self.assertIn('adtask_cache_lookups_total{cache="metrics_test",result="miss"} 1.0', content)
+        self.assertIn('adtask_active_sessions 1.0', content)
+        self.assertIn('adtask_ldap_admission_queue_depth', content)
+        self.assertIn('adtask_ldap_dc_connections_total{server="metrics-dc1"} 1.0', content)
+        self.assertIn('adtask_ldap_dc_failures_total{server="metrics-dc2"} 1.0', content)
+        self.assertIn('adtask_ldap_dc_latency_seconds{server="metrics-dc1"} 0.02', content)
+        ldap_stats.reset()
+        logger.info("✅ Metrics export test passed")
+
+
 class LoginViewTests(TestCase):
     """
     Test Authentication Views (Login Flow)
@@ -404,11 +1966,14 @@ class LoginViewTests(TestCase):
         self.user.backend = 'authentication.backends.LDAPAuthenticationBackend'
         self.client.force_login(self.user)
         
+        ad_profiles.store('test.user', {'display_name': 'Test User'})
+        
         # Logout
         response = self.client.get(self.logout_url)
         
         self.assertEqual(response.status_code, 302)
         self.assertIn(self.login_url, response.url)
+        self.assertIsNone(ad_profiles.get_snapshot('test.user'))
         logger.info("✅ Logout test passed")
 
 
@@ -422,6 +1987,7 @@ class DashboardViewTests(TestCase):
         self.client = Client()
         self.dashboard_url = reverse('dashboard')
         self.login_url = reverse('login')
+        cache.clear()
         
         # Create test employee
         self.employee = Employee.objects.create(
@@ -490,6 +2056,86 @@ class DashboardViewTests(TestCase):
         # Should load successfully
         self.assertEqual(response.status_code, 200)
         logger.info("✅ Dashboard displays employee data test passed")
+    
+    @patch('authentication.views.ldap_service')
+    def test_dashboard_uses_login_snapshot(self, mock_ldap):
+        """
+        Test that the dashboard renders the login-time AD snapshot without LDAP calls
+        """
+        self.user.backend = 'authentication.backends.LDAPAuthenticationBackend'
+        self.user.ad_data = {
+            'email': 'test.user@eissa.local',
+            'phone': '12345',
+            'display_name': 'Snapshot User',
+            'dn': 'CN=Test User,OU=IT,OU=New,DC=eissa,DC=local'
+        }
+        self.client.force_login(self.user)
+        
+        response = self.client.get(self.dashboard_url)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Snapshot User')
+        mock_ldap.search_user.assert_not_called()
+        logger.info("✅ Dashboard login snapshot test passed")
+    
+    def test_dashboard_conditional_get(self):
+        """
+        Test that an unchanged dashboard is answered with 304 Not Modified
+        """
+        self.user.backend = 'authentication.backends.LDAPAuthenticationBackend'
+        self.client.force_login(self.user)
+        ad_profiles.store('test.user', {'display_name': 'Test User', 'email': 'test.user@eissa.local'})
+        
+        response = self.client.get(self.dashboard_url)
+        etag = response['ETag']
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Last-Modified', response)
+        
+        response = self.client.get(self.dashboard_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        
+        self.employee.job_title = 'Team Lead'
+        self.employee.save()
+        response = self.client.get(self.dashboard_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Team Lead')
+        self.assertNotEqual(response['ETag'], etag)
+        logger.info("✅ Dashboard conditional GET test passed")
+    
+    def test_dashboard_not_cached_with_pending_messages(self):
+        """
+        Test that pending messages are never hidden behind a 304
+        """
+        self.user.backend = 'authentication.backends.LDAPAuthenticationBackend'
+        self.client.force_login(self.user)
+        ad_profiles.store('test.user', {'display_name': 'Test User'})
+        etag = self.client.get(self.dashboard_url)['ETag']
+        
+        # The login view queues a welcome message before redirecting here
+        with patch('authentication.views.authenticate', return_value=self.user):
+            self.client.logout()
+            self.client.post(self.login_url, {'username': 'test.user', 'password': 'test_password_123'})
+        
+        response = self.client.get(self.dashboard_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Welcome back')
+        logger.info("✅ Dashboard messages bypass test passed")
+    
+    def test_stale_snapshot_is_refreshed(self):
+        """
+        Test that a snapshot older than the max age is read again
+        """
+        lookup = MagicMock(return_value={'display_name': 'Fresh User'})
+        profiles = ADProfileSnapshots(max_age=60, background=False, lookup=lookup)
+        profiles.store('test.user', {'display_name': 'Old User'})
+        
+        self.assertEqual(profiles.get('test.user')['display_name'], 'Old User')
+        lookup.assert_not_called()
+        
+        with patch('authentication.profile.time.time', return_value=time.time() + 61):
+            self.assertEqual(profiles.get('test.user', {'dn': None, 'guid': None})['display_name'], 'Fresh User')
+        lookup.assert_called_once_with('test.user', dn=None, guid=None)
+        logger.info("✅ Stale AD snapshot refresh test passed")
 
 
 class LoginFormTests(TestCase):
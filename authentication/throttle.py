@@ -0,0 +1,180 @@
+"""
+Failed login throttling
+Counts failed AD binds per username and per client IP and short-circuits
+further binds once a threshold is reached
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+import hashlib
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class BindFailureTracker:
+    """
+    Sliding-window counters of failed AD binds, shared through the Django cache
+    
+    Each window is split into buckets of AD_LOGIN_FAILURE_BUCKET seconds;
+    a failure increments the current bucket of its username and of its
+    client IP, and the window count is the sum of the buckets it covers.
+    Once a count reaches its threshold a cool-down key is set, and every
+    attempt for that username or IP is rejected without a bind until it
+    expires. Because the counters live in the Django cache, all workers
+    share them. The increments are atomic with memcached or Redis; with the
+    file-based cache concurrent failures can overwrite each other's
+    increment, so the counts are best-effort there.
+    
+    Global counters of failures, blocked attempts and lockouts are kept
+    with the same buckets (see metrics()).
+    """
+    
+    PREFIX = 'authentication:bind_failures'
+    METRICS = ('failures', 'blocked', 'lockouts')
+    
+    def __init__(self, window=None, bucket=None, max_per_user=None, max_per_ip=None, cooldown=None):
+        self.window = window or settings.AD_LOGIN_FAILURE_WINDOW
+        self.bucket = bucket or settings.AD_LOGIN_FAILURE_BUCKET
+        self.max_per_user = max_per_user or settings.AD_LOGIN_MAX_FAILURES_PER_USER
+        self.max_per_ip = max_per_ip or settings.AD_LOGIN_MAX_FAILURES_PER_IP
+        self.cooldown = cooldown or settings.AD_LOGIN_COOLDOWN
+    
+    def is_blocked(self, username, ip=None):
+        """
+        Check whether binds for this username or client IP are cooling down
+        
+        Args:
+            username: AD username
+            ip: Client IP address (optional)
+            
+        Returns:
+            int: Seconds until the attempt is allowed again (0 if not blocked)
+        """
+        keys = [self._lock_key(scope, value) for scope, value in self._scopes(username, ip)]
+        now = time.time()
+        retry_after = max(
+            [int(until - now) + 1 for until in cache.get_many(keys).values() if until > now],
+            default=0
+        )
+        if retry_after:
+            self._count('blocked')
+        return retry_after
+    
+    def record_failure(self, username, ip=None):
+        """
+        Count a rejected bind and start a cool-down when a threshold is reached
+        
+        Returns:
+            bool: True if this failure locked the username or IP
+        """
+        self._count('failures')
+        locked = False
+        limits = {'user': self.max_per_user, 'ip': self.max_per_ip}
+        
+        for scope, value in self._scopes(username, ip):
+            self._increment(self._bucket_key(scope, value, self._current_bucket()))
+            failures = self._window_count(lambda index: self._bucket_key(scope, value, index))
+            if failures >= limits[scope]:
+                cache.set(self._lock_key(scope, value), time.time() + self.cooldown, self.cooldown)
+                self._count('lockouts')
+                logger.warning(
+                    f"{failures} failed AD binds for {scope} {value} within {self.window}s, "
+                    f"blocking binds for {self.cooldown}s"
+                )
+                locked = True
+        return locked
+    
+    def record_success(self, username):
+        """Forget the failures of a username after a successful bind"""
+        current = self._current_bucket()
+        cache.delete_many([
+            self._bucket_key('user', username.lower(), index)
+            for index in range(current - self._bucket_count() + 1, current + 1)
+        ])
+    
+    def metrics(self):
+        """
+        Return the global counters for the current window and bucket
+        
+        Returns:
+            dict: {'window_seconds', 'bucket_seconds', '<metric>': count in
+                   the window, '<metric>_current_bucket': count in the bucket}
+        """
+        result = {'window_seconds': self.window, 'bucket_seconds': self.bucket}
+        current = self._current_bucket()
+        for name in self.METRICS:
+            result[name] = self._window_count(lambda index: self._metric_key(name, index))
+            result[f'{name}_current_bucket'] = cache.get(self._metric_key(name, current), 0)
+        return result
+    
+    def _scopes(self, username, ip):
+        scopes = [('user', username.lower())]
+        if ip:
+            scopes.append(('ip', ip))
+        return scopes
+    
+    def _bucket_count(self):
+        return max(1, -(-self.window // self.bucket))
+    
+    def _current_bucket(self):
+        return int(time.time() // self.bucket)
+    
+    def _window_count(self, key_for):
+        current = self._current_bucket()
+        keys = [key_for(index) for index in range(current - self._bucket_count() + 1, current + 1)]
+        return sum(cache.get_many(keys).values())
+    
+    def _increment(self, key):
+        # Buckets outlive the window by one bucket so a full window is always readable
+        cache.add(key, 0, self.window + self.bucket)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, self.window + self.bucket)
+    
+    def _count(self, name):
+        self._increment(self._metric_key(name, self._current_bucket()))
+    
+    def _digest(self, value):
+        # Usernames and IPs may contain characters memcached does not allow in keys
+        return hashlib.sha1(value.encode('utf-8')).hexdigest()
+    
+    def _bucket_key(self, scope, value, index):
+        return f'{self.PREFIX}:{scope}:{self._digest(value)}:{index}'
+    
+    def _lock_key(self, scope, value):
+        return f'{self.PREFIX}:lock:{scope}:{self._digest(value)}'
+    
+    def _metric_key(self, name, index):
+        return f'{self.PREFIX}:metric:{name}:{index}'
+
+
+def client_ip(request):
+    """
+    Return the address of the client behind the app's own reverse proxies
+    
+    Starting at REMOTE_ADDR, X-Forwarded-For hops are followed from the
+    right for as long as the address is one of AD_LOGIN_TRUSTED_PROXIES;
+    hops further left were written by the client and are not trusted.
+    
+    Returns:
+        str: Client IP, or None when it is unknown (no request, or only
+             trusted proxies seen), in which case no per-IP limit applies
+    """
+    if request is None:
+        return None
+    
+    trusted = set(settings.AD_LOGIN_TRUSTED_PROXIES)
+    hops = [hop.strip() for hop in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if hop.strip()]
+    ip = request.META.get('REMOTE_ADDR')
+    while ip in trusted and hops:
+        ip = hops.pop()
+    if not ip or ip in trusted:
+        return None
+    return ip
+
+
+# Singleton instance
+bind_failures = BindFailureTracker()
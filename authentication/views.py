@@ -2,13 +2,23 @@
 Authentication Views
 """
 
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
 from django.shortcuts import render, redirect
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from prometheus_client import CONTENT_TYPE_LATEST
 from .forms import LoginForm
+from . import metrics
 from .ldap_service import ldap_service
+from .profile import ad_profiles
 from Employee.models import Employee
+import hashlib
+import hmac
+import json
 
 
 def home_view(request):
@@ -53,29 +63,78 @@ def logout_view(request):
     """
     Handle employee logout
     """
+    if request.user.is_authenticated:
+        # The next login stores a fresh snapshot
+        ad_profiles.invalidate(request.user.username)
     logout(request)
     messages.success(request, 'You have been logged out successfully.')
     return redirect('login')
 
 
+def dashboard_validator(employee, ad_data, username):
+    """
+    Compute the ETag of a dashboard page
+    
+    The page only shows the employee record, the user's AD attributes and
+    the username, so a hash of those identifies its content. Admin actions
+    change is_active with queryset.update(), which leaves updated_at alone,
+    so it is hashed explicitly.
+    """
+    fingerprint = json.dumps(
+        [username, employee.pk, employee.updated_at.isoformat(), employee.is_active, ad_data],
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha1(fingerprint.encode('utf-8')).hexdigest()
+
+
 @login_required(login_url='login')
 def dashboard_view(request):
     """
     Employee dashboard showing database and AD information
+    
+    Answers conditional requests with 304 Not Modified when the client
+    already has the current version, and caches the rendered panels under
+    the same validator.
     """
     try:
         # Get employee from database
         employee = Employee.objects.get(ad_username=request.user.username)
         
-        # Get AD information
-        ad_data = ldap_service.search_user(request.user.username)
+        # Get AD information from the login-time snapshot; only look it up
+        # when there is none, reading the known object directly when possible
+        locator = employee.ad_locator()
+        snapshot = ad_profiles.get_snapshot(request.user.username, locator)
+        if snapshot is None:
+            ad_data = ldap_service.search_user(request.user.username, **locator)
+            snapshot = ad_profiles.store(request.user.username, ad_data)
+            employee.remember_ad_location(ad_data)
+        ad_data = snapshot['data'] if snapshot else None
+        
+        validator = dashboard_validator(employee, ad_data, request.user.username)
+        last_modified = int(max(
+            employee.updated_at.timestamp(),
+            snapshot['fetched_at'] if snapshot else 0
+        ))
+        
+        # Pending messages are part of the page, so never answer 304 over them
+        if not len(messages.get_messages(request)):
+            not_modified = get_conditional_response(request, etag=quote_etag(validator), last_modified=last_modified)
+            if not_modified is not None:
+                return _with_validators(not_modified, validator, last_modified)
         
         context = {
             'employee': employee,
             'ad_data': ad_data,
+            'validator': validator,
+            'fragment_timeout': settings.DASHBOARD_FRAGMENT_CACHE_TIMEOUT,
         }
         
-        return render(request, 'authentication/dashboard.html', context)
+        return _with_validators(
+            render(request, 'authentication/dashboard.html', context),
+            validator,
+            last_modified
+        )
         
     except Employee.DoesNotExist:
         messages.error(request, 'Employee record not found.')
@@ -84,3 +143,31 @@ def dashboard_view(request):
     except Exception as e:
         messages.error(request, f'An error occurred: {str(e)}')
         return redirect('login')
+
+
+def _with_validators(response, validator, last_modified):
+    """Set the conditional GET headers of a dashboard response"""
+    response['ETag'] = quote_etag(validator)
+    response['Last-Modified'] = http_date(last_modified)
+    # Per-user page: browsers may keep it but must revalidate every time
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def metrics_view(request):
+    """
+    Prometheus metrics of all workers on this node
+    
+    Requires `Authorization: Bearer <METRICS_TOKEN>`, or a logged-in staff
+    user when no token is configured.
+    """
+    token = settings.METRICS_TOKEN
+    if token:
+        supplied = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+        allowed = hmac.compare_digest(supplied.encode(), token.encode())
+    else:
+        allowed = request.user.is_authenticated and request.user.is_staff
+    if not allowed:
+        return HttpResponseForbidden()
+    
+    return HttpResponse(metrics.render(), content_type=CONTENT_TYPE_LATEST)
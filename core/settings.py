@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 from decouple import config, Csv
+import os
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -48,11 +49,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'authentication.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'authentication.middleware.LDAPRequestScopeMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -178,6 +181,126 @@ AD_USE_SSL = config('AD_USE_SSL', default=False, cast=bool)
 AD_BASE_DN = config('AD_BASE_DN', default='DC=eissa,DC=local')
 AD_BIND_USER = config('AD_BIND_USER', default='')
 AD_BIND_PASSWORD = config('AD_BIND_PASSWORD', default='')
+AD_USER_FORMAT = config('AD_USER_FORMAT', default='EISSA\\{username}')  # Bind name for a sAMAccountName
+
+# Domain controllers to spread connections over (defaults to AD_SERVER alone)
+AD_SERVERS = config('AD_SERVERS', default=AD_SERVER, cast=Csv())
+AD_SERVER_STRATEGY = config('AD_SERVER_STRATEGY', default='first')  # 'first', 'round_robin' or 'latency'
+AD_SERVER_QUARANTINE = config('AD_SERVER_QUARANTINE', default=60, cast=int)  # Seconds an unreachable DC is skipped
+
+# Hedged user lookups: ask a second DC when the first is slower than usual (needs 2+ AD_SERVERS)
+AD_HEDGE_READS = config('AD_HEDGE_READS', default=False, cast=bool)
+AD_HEDGE_PERCENTILE = config('AD_HEDGE_PERCENTILE', default=95, cast=int)  # Recent-latency percentile to wait before hedging
+AD_HEDGE_MIN_DELAY = config('AD_HEDGE_MIN_DELAY', default=0.05, cast=float)  # Seconds to wait at least
+AD_HEDGE_INITIAL_DELAY = config('AD_HEDGE_INITIAL_DELAY', default=0.5, cast=float)  # Seconds to wait until enough samples
+
+# DSA/schema info: 'all' downloads it on the first bind of every worker, 'cached' loads it
+# from AD_SERVER_INFO_DIR, 'none' skips it. Opt in to 'cached' after running
+# `manage.py refresh_ad_server_info` as a deploy step
+AD_SERVER_INFO = config('AD_SERVER_INFO', default='all')
+AD_SERVER_INFO_DIR = config('AD_SERVER_INFO_DIR', default=str(BASE_DIR / 'ad_server_info'))
+
+# Socket timeouts in seconds (0: operating system default)
+AD_CONNECT_TIMEOUT = config('AD_CONNECT_TIMEOUT', default=5, cast=int)  # Opening the TCP connection
+AD_RECEIVE_TIMEOUT = config('AD_RECEIVE_TIMEOUT', default=10, cast=int)  # Waiting for each response
+
+# Seconds one HTTP request may spend on AD calls before further calls are skipped (0: no limit)
+AD_REQUEST_BUDGET = config('AD_REQUEST_BUDGET', default=15, cast=int)
+
+# Pool of long-lived service account (AD_BIND_USER) connections
+AD_POOL_SIZE = config('AD_POOL_SIZE', default=5, cast=int)
+AD_POOL_MAX_IDLE = config('AD_POOL_MAX_IDLE', default=300, cast=int)  # Seconds before an idle connection is closed
+AD_POOL_PING_AFTER = config('AD_POOL_PING_AFTER', default=60, cast=int)  # Idle seconds before a liveness check on reuse
+AD_POOL_TIMEOUT = config('AD_POOL_TIMEOUT', default=10, cast=int)  # Seconds to wait for a free connection
+
+# Open connections that verify login passwords with a rebind, skipping the TCP/TLS handshake
+# (0: bind every login on a new connection). A pooled connection stays bound as the last
+# user who logged in on it, unless fast bind mode is on.
+AD_AUTH_POOL_SIZE = config('AD_AUTH_POOL_SIZE', default=0, cast=int)
+AD_AUTH_FAST_BIND = config('AD_AUTH_FAST_BIND', default=False, cast=bool)  # AD fast concurrent bind: verify only
+
+# Circuit breaker: fail AD calls fast after repeated connection errors or timeouts
+AD_BREAKER_FAILURES = config('AD_BREAKER_FAILURES', default=5, cast=int)  # Consecutive failures before opening (0 disables)
+AD_BREAKER_RESET_TIMEOUT = config('AD_BREAKER_RESET_TIMEOUT', default=30, cast=int)  # Seconds open before a probe
+
+# Admission gate: LDAP operations in flight to the DCs (0: no limit). Operations over the limit
+# wait in a bounded queue and fail once it is full or the wait times out
+AD_MAX_CONCURRENT = config('AD_MAX_CONCURRENT', default=16, cast=int)  # Per worker process
+AD_NODE_MAX_CONCURRENT = config('AD_NODE_MAX_CONCURRENT', default=0, cast=int)  # All workers sharing AD_ADMISSION_LOCK_DIR
+AD_ADMISSION_QUEUE = config('AD_ADMISSION_QUEUE', default=100, cast=int)  # Operations waiting per worker
+AD_ADMISSION_TIMEOUT = config('AD_ADMISSION_TIMEOUT', default=5, cast=float)  # Seconds an operation may wait
+AD_ADMISSION_LOCK_DIR = config('AD_ADMISSION_LOCK_DIR', default=str(BASE_DIR / 'run' / 'ldap_admission'))  # Slot lock files
+
+# Usernames per OR-filtered search when looking up many users at once
+AD_SEARCH_BATCH_SIZE = config('AD_SEARCH_BATCH_SIZE', default=100, cast=int)
+
+# Entries per page for paged searches (must not exceed the DC's MaxPageSize, 1000 by default)
+AD_PAGE_SIZE = config('AD_PAGE_SIZE', default=500, cast=int)
+
+# In-process LRU cache of AD user records
+AD_USER_CACHE_SIZE = config('AD_USER_CACHE_SIZE', default=1024, cast=int)
+AD_USER_CACHE_TTL = config('AD_USER_CACHE_TTL', default=300, cast=int)  # Seconds a found user is cached
+AD_USER_CACHE_NEGATIVE_TTL = config('AD_USER_CACHE_NEGATIVE_TTL', default=60, cast=int)  # Seconds a "not found" is cached
+
+# Process-level OU list cache, revalidated by uSNChanged
+AD_OU_CACHE_TTL = config('AD_OU_CACHE_TTL', default=60, cast=int)  # Seconds before checking AD for OU changes
+AD_OU_CACHE_MAX_AGE = config('AD_OU_CACHE_MAX_AGE', default=3600, cast=int)  # Seconds before a full re-read
+AD_OU_CACHE_BACKGROUND = config('AD_OU_CACHE_BACKGROUND', default=True, cast=bool)  # Revalidate without blocking requests
+
+# Rows per bulk upsert when mirroring AD users into the database (`manage.py sync_ad_users`)
+AD_SYNC_BATCH_SIZE = config('AD_SYNC_BATCH_SIZE', default=500, cast=int)
+
+# In-memory set of active employee usernames checked before any AD bind
+AD_ELIGIBILITY_REFRESH = config('AD_ELIGIBILITY_REFRESH', default=5, cast=int)  # Seconds between checks for changes made by other workers
+AD_ELIGIBILITY_MAX_AGE = config('AD_ELIGIBILITY_MAX_AGE', default=300, cast=int)  # Seconds before an unconditional rebuild
+
+# Failed login throttling, shared by all workers through the cache (exact only with an atomic backend, see CACHES)
+AD_LOGIN_FAILURE_WINDOW = config('AD_LOGIN_FAILURE_WINDOW', default=300, cast=int)  # Sliding window in seconds
+AD_LOGIN_FAILURE_BUCKET = config('AD_LOGIN_FAILURE_BUCKET', default=30, cast=int)  # Window resolution in seconds
+AD_LOGIN_MAX_FAILURES_PER_USER = config('AD_LOGIN_MAX_FAILURES_PER_USER', default=5, cast=int)
+AD_LOGIN_MAX_FAILURES_PER_IP = config('AD_LOGIN_MAX_FAILURES_PER_IP', default=20, cast=int)
+AD_LOGIN_COOLDOWN = config('AD_LOGIN_COOLDOWN', default=300, cast=int)  # Seconds binds are refused once a limit is hit
+# Addresses of the app's own reverse proxies (IIS forwards to gunicorn from 127.0.0.1). The client IP is
+# taken from the X-Forwarded-For hops they add; requests seen only from these addresses get no per-IP limit
+AD_LOGIN_TRUSTED_PROXIES = config('AD_LOGIN_TRUSTED_PROXIES', default='127.0.0.1,::1', cast=Csv())
+
+# AD profile shown on the dashboard, snapshotted at login
+AD_PROFILE_MAX_AGE = config('AD_PROFILE_MAX_AGE', default=300, cast=int)  # Seconds before a snapshot is refreshed
+AD_PROFILE_BACKGROUND = config('AD_PROFILE_BACKGROUND', default=True, cast=bool)  # Refresh without blocking the page
+
+# Seconds the rendered dashboard panels stay in the cache (keyed on the page's ETag)
+DASHBOARD_FRAGMENT_CACHE_TIMEOUT = config('DASHBOARD_FRAGMENT_CACHE_TIMEOUT', default=3600, cast=int)
+
+# Concurrent modify_dn requests for the bulk "move to OU" admin action
+AD_BULK_MOVE_CONCURRENCY = config('AD_BULK_MOVE_CONCURRENCY', default=4, cast=int)
+
+
+# Cache shared by all workers on this host (login throttling, eligibility invalidation, AD
+# profile snapshots, dashboard fragments). The file-based default needs no server, but its
+# incr() is a read-then-write across processes, so concurrent failed logins can be under-counted
+# and the login throttle is best-effort. Use memcached or Redis (e.g. CACHE_BACKEND=
+# django.core.cache.backends.redis.RedisCache) for atomic counters.
+CACHE_BACKEND = config('CACHE_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache')
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': config('CACHE_LOCATION', default=str(BASE_DIR / '.cache')),
+    }
+}
+if CACHE_BACKEND.endswith('.FileBasedCache'):
+    # Files kept before a random third is culled (Django's default of 300 would also cull
+    # cool-down keys and snapshots under normal load)
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=10000, cast=int)}
+
+
+# Metrics Configuration
+# Directory shared by the gunicorn workers for Prometheus multiprocess mode (see gunicorn.conf.py);
+# empty keeps the metrics in-process (runserver, single worker)
+PROMETHEUS_MULTIPROC_DIR = config('PROMETHEUS_MULTIPROC_DIR', default='')
+if PROMETHEUS_MULTIPROC_DIR:
+    # prometheus_client reads it from the environment when it is first imported
+    os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', PROMETHEUS_MULTIPROC_DIR)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')  # Bearer token for /metrics; empty: staff users only
 
 
 # Session Configuration
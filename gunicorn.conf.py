@@ -0,0 +1,28 @@
+"""
+Gunicorn configuration
+Loaded automatically when gunicorn is started from the project directory
+"""
+
+from decouple import config
+import os
+import shutil
+
+# Prometheus multiprocess mode: every worker writes its metrics to files in
+# this directory and /metrics sums them (see authentication/metrics.py)
+PROMETHEUS_MULTIPROC_DIR = config('PROMETHEUS_MULTIPROC_DIR', default='')
+if PROMETHEUS_MULTIPROC_DIR:
+    os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', PROMETHEUS_MULTIPROC_DIR)
+
+
+def on_starting(server):
+    """Start every run with an empty metrics directory"""
+    if PROMETHEUS_MULTIPROC_DIR:
+        shutil.rmtree(PROMETHEUS_MULTIPROC_DIR, ignore_errors=True)
+        os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+
+
+def child_exit(server, worker):
+    """Drop the live gauges of a worker that exited"""
+    if PROMETHEUS_MULTIPROC_DIR:
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)